@@ -0,0 +1,201 @@
+"""HTTP API inferensi tanpa Streamlit (stdlib http.server).
+
+    python api.py --host 127.0.0.1 --port 8000
+
+Endpoint:
+    POST /classify   body: bytes gambar mentah
+    POST /detect     body: bytes gambar mentah
+    GET  /health
+    GET  /metrics        (format teks Prometheus)
+    GET  /metrics.json
+    GET  /history.csv       ?start=&end=(epoch detik)&task_type=&session_id=
+    GET  /history.parquet   (butuh pyarrow)
+
+Hasil berupa dict yang sama dengan predict_classification / predict_detection,
+diserialisasi sebagai JSON. Filter input memeriksa konten gambar, sama seperti dashboard. Antrean inferensi dibagi
+adil per klien (header X-Session-Id, atau alamat IP); bila antrean penuh,
+responsnya 503 dengan Retry-After. Ekspor riwayat dikirim
+per chunk dari SQLite, jadi ukurannya tidak dibatasi memori server.
+"""
+import argparse
+import io
+import json
+import logging
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from PIL import UnidentifiedImageError
+
+from inference import ImageTooLargeError, decode_image, predict_classification, predict_detection
+from history_store import get_history_store
+from inference_cache import result_cache
+from near_duplicates import near_duplicate_index
+from metrics import stage_metrics
+from model_handles import HANDLES, start_idle_reaper
+from scheduler import SCHEDULERS, current_session
+
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+
+logger = logging.getLogger("api")
+
+
+def _json_default(o):
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def to_json(payload):
+    return json.dumps(payload, default=_json_default).encode('utf-8')
+
+
+class _StreamSink:
+    """File-like tulis-saja di atas socket dengan tell() (dibutuhkan ParquetWriter)."""
+
+    closed = False
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.position = 0
+
+    def write(self, data):
+        self.wfile.write(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        self.wfile.flush()
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    server_version = "DashboardInference/1.0"
+
+    routes = {
+        '/classify': predict_classification,
+        '/detect': predict_detection,
+    }
+
+    def _send(self, status, payload, headers=None):
+        body = to_json(payload)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status, text, content_type):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_history(self, url, fmt):
+        query = parse_qs(url.query)
+        try:
+            filters = {
+                'start': float(query['start'][0]) if 'start' in query else None,
+                'end': float(query['end'][0]) if 'end' in query else None,
+                'task_type': query.get('task_type', [None])[0],
+                'session_id': query.get('session_id', [None])[0],
+            }
+        except ValueError:
+            return self._send(400, {'error': 'start/end must be epoch seconds'})
+        if fmt == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return self._send(501, {'error': 'Parquet export needs pyarrow'})
+
+        # Tanpa Content-Length: body ditulis per chunk lalu koneksi ditutup (HTTP/1.0)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.apache.parquet' if fmt == 'parquet' else 'text/csv; charset=utf-8')
+        self.send_header('Content-Disposition', f'attachment; filename="prediction_history.{fmt}"')
+        self.end_headers()
+        store = get_history_store()
+        store.flush()
+        if fmt == 'parquet':
+            store.write_parquet(_StreamSink(self.wfile), **filters)
+        else:
+            for chunk in store.iter_csv(**filters):
+                self.wfile.write(chunk)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path
+        if path in ('/history.csv', '/history.parquet'):
+            return self._send_history(url, path.rsplit('.', 1)[1])
+        if path == '/metrics':
+            return self._send_text(200, stage_metrics.to_prometheus(), 'text/plain; version=0.0.4')
+        if path == '/metrics.json':
+            return self._send_text(200, stage_metrics.to_json(), 'application/json')
+        if path != '/health':
+            return self._send(404, {'error': 'Not found'})
+        self._send(200, {
+            'status': 'ok',
+            'models': {name: handle.status() for name, handle in HANDLES.items()},
+            'cache': result_cache.stats(),
+            'near_duplicates': near_duplicate_index.stats(),
+            'schedulers': {name: scheduler.status() for name, scheduler in SCHEDULERS.items()},
+        })
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        predict = self.routes.get(url.path)
+        if predict is None:
+            return self._send(404, {'error': 'Not found'})
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            return self._send(400, {'error': 'Empty body, send raw image bytes'})
+        if length > MAX_UPLOAD_BYTES:
+            return self._send(413, {'error': f'Image larger than {MAX_UPLOAD_BYTES} bytes'})
+
+        try:
+            image = decode_image(io.BytesIO(self.rfile.read(length)))
+        except ImageTooLargeError as e:
+            return self._send(413, {'error': str(e)})
+        except (UnidentifiedImageError, OSError) as e:
+            return self._send(400, {'error': f'Cannot decode image: {e}'})
+
+        current_session.set(self.headers.get('X-Session-Id') or self.client_address[0])
+        result = predict(image)
+        if result.get('retry'):
+            return self._send(503, result, headers={'Retry-After': '1'})
+        self._send(200, result)
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless HTTP inference API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    start_idle_reaper()
+    server = ThreadingHTTPServer((args.host, args.port), InferenceHandler)
+    logger.info("Listening on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
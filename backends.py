@@ -0,0 +1,430 @@
+"""Backend inferensi CPU (ONNX Runtime / TFLite / OpenVINO) untuk kedua model.
+
+Backend dipilih per model lewat environment variable:
+    DASHBOARD_CLASSIFIER_BACKEND = keras | onnx | tflite | tflite_dynamic | tflite_int8 | openvino   (default: keras)
+    DASHBOARD_DETECTOR_BACKEND   = pytorch | onnx | tflite | openvino (default: pytorch)
+
+Model harus diekspor lebih dulu, lalu dicek paritasnya terhadap framework aslinya:
+    python backends.py export --model classifier --backend onnx
+    python backends.py parity --model classifier --backend onnx
+
+Classifier juga bisa dikuantisasi pasca-training ke TFLite: tflite_dynamic (bobot
+int8, aktivasi float) atau tflite_int8 (bobot + aktivasi int8, dikalibrasi dengan
+gambar beras di sample image/). Bandingkan dengan model float:
+    python backends.py export --model classifier --backend tflite_int8
+    python backends.py report --model classifier --backend tflite_int8
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+CLASSIFIER_BACKENDS = ('keras', 'onnx', 'tflite', 'tflite_dynamic', 'tflite_int8', 'openvino')
+QUANTIZED_BACKENDS = ('tflite_dynamic', 'tflite_int8')
+DETECTOR_BACKENDS = ('pytorch', 'onnx', 'tflite', 'openvino')
+
+CLASSIFIER_BACKEND = os.environ.get("DASHBOARD_CLASSIFIER_BACKEND", "keras").lower()
+DETECTOR_BACKEND = os.environ.get("DASHBOARD_DETECTOR_BACKEND", "pytorch").lower()
+
+# Toleransi paritas: probabilitas kelas (0-1), koordinat box (piksel), confidence box (0-1)
+PROB_TOLERANCE = 1e-3
+BOX_TOLERANCE = 2.0
+BOX_CONF_TOLERANCE = 0.02
+# Model terkuantisasi: probabilitas boleh bergeser lebih jauh, top-1 tetap harus sama
+QUANT_PROB_TOLERANCE = 0.05
+
+RICE_SAMPLE_PREFIXES = ('arborio', 'basmati', 'ipsala', 'jasmine', 'karacadag')
+
+# Backend yang bisa diekspor per model (tanpa framework aslinya); kuantisasi hanya untuk classifier
+EXPORT_BACKENDS = {
+    'classifier': tuple(b for b in CLASSIFIER_BACKENDS if b != 'keras'),
+    'detector': tuple(b for b in DETECTOR_BACKENDS if b != 'pytorch'),
+}
+
+
+class BackendError(RuntimeError):
+    pass
+
+
+def exported_path(model_path, backend):
+    """Lokasi file hasil ekspor untuk model + backend (mengikuti penamaan Ultralytics)."""
+    stem, ext = os.path.splitext(model_path)
+    name = os.path.basename(stem)
+    if backend == 'onnx':
+        return f"{stem}.onnx"
+    if backend == 'openvino':
+        return os.path.join(f"{stem}_openvino_model", f"{name}.xml")
+    if backend == 'tflite':
+        if ext == '.pt':
+            return os.path.join(f"{stem}_saved_model", f"{name}_float32.tflite")
+        return f"{stem}.tflite"
+    if backend in QUANTIZED_BACKENDS:
+        return f"{stem}_{backend.split('_', 1)[1]}.tflite"
+    return model_path
+
+
+def served_model_path(model_path, backend):
+    """File yang benar-benar dipakai untuk inferensi (untuk identitas model di cache)."""
+    if backend in ('keras', 'pytorch'):
+        return model_path
+    return exported_path(model_path, backend)
+
+
+# --- CLASSIFIER RUNNERS ---
+# Semua runner punya .predict(batch) -> np.ndarray, sama seperti ClassifierEngine.
+
+class OnnxClassifier:
+    def __init__(self, path):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise BackendError("onnxruntime is not installed.") from e
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        return self.session.run(None, {self.input_name: np.asarray(batch, dtype=np.float32)})[0]
+
+
+class TFLiteClassifier:
+    def __init__(self, path):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            try:
+                import tensorflow as tf
+            except ImportError as e:
+                raise BackendError("Neither tflite-runtime nor TensorFlow is installed.") from e
+            Interpreter = tf.lite.Interpreter
+        self.interpreter = Interpreter(model_path=path, num_threads=os.cpu_count())
+        input_detail = self.interpreter.get_input_details()[0]
+        output_detail = self.interpreter.get_output_details()[0]
+        self.input_index = input_detail['index']
+        self.output_index = output_detail['index']
+        # Model full-int8 memakai input/output int8: (scale, zero_point) untuk konversi dari/ke float
+        self.input_dtype = input_detail['dtype']
+        self.input_quant = input_detail['quantization']
+        self.output_quant = output_detail['quantization'] if output_detail['dtype'] != np.float32 else None
+        self._batch_size = None
+        # Satu Interpreter tidak thread-safe: resize/set/invoke/get harus berurutan per pemanggilan
+        self._lock = threading.Lock()
+
+    def _quantize_input(self, batch):
+        if self.input_dtype == np.float32:
+            return batch
+        scale, zero_point = self.input_quant
+        info = np.iinfo(self.input_dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(self.input_dtype)
+
+    def predict(self, batch):
+        batch = self._quantize_input(np.asarray(batch, dtype=np.float32))
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+            self.interpreter.set_tensor(self.input_index, batch)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self.output_index).copy()
+        if self.output_quant is None:
+            return output
+        scale, zero_point = self.output_quant
+        return (output.astype(np.float32) - zero_point) * np.float32(scale)
+
+
+class OpenVINOClassifier:
+    def __init__(self, path):
+        try:
+            import openvino as ov
+        except ImportError as e:
+            raise BackendError("OpenVINO is not installed.") from e
+        self.compiled = ov.Core().compile_model(path, 'CPU')
+        self.output = self.compiled.output(0)
+
+    def predict(self, batch):
+        return self.compiled(np.asarray(batch, dtype=np.float32))[self.output]
+
+
+CLASSIFIER_RUNNERS = {'onnx': OnnxClassifier, 'tflite': TFLiteClassifier, 'tflite_dynamic': TFLiteClassifier,
+                      'tflite_int8': TFLiteClassifier, 'openvino': OpenVINOClassifier}
+
+
+def _require_exported(model_path, backend):
+    path = exported_path(model_path, backend)
+    if not os.path.exists(path):
+        raise BackendError(f"Exported {backend} model NOT FOUND: {path}. Run: python backends.py export --backend {backend}")
+    return path
+
+
+def load_classifier_backend(model_path, backend=CLASSIFIER_BACKEND):
+    if backend not in CLASSIFIER_BACKENDS:
+        raise BackendError(f"Unknown classifier backend {backend!r}, expected one of {CLASSIFIER_BACKENDS}")
+    if backend == 'keras':
+        from classifier_engine import ClassifierEngine
+        from model_handles import load_keras
+        return ClassifierEngine(load_keras(model_path))
+    return CLASSIFIER_RUNNERS[backend](_require_exported(model_path, backend))
+
+
+def rice_sample_batch(sample_dir):
+    """Gambar beras di sample_dir sebagai batch float32 (N, 128, 128, 3), lewat preprocessing yang sama dengan inferensi."""
+    from PIL import Image
+    from preprocessing import preprocess_batch
+
+    paths = _sample_paths(sample_dir, RICE_SAMPLE_PREFIXES)
+    if not paths:
+        raise BackendError(f"No rice sample images in {sample_dir!r}")
+    return preprocess_batch([Image.open(p).convert('RGB') for p in paths]).copy()
+
+
+def load_detector_backend(model_path, backend=DETECTOR_BACKEND):
+    """Model YOLO untuk backend terpilih. Format ekspor tetap dijalankan lewat API Ultralytics
+    (AutoBackend), sehingga parsing hasil di predict_detection tidak berubah."""
+    if backend not in DETECTOR_BACKENDS:
+        raise BackendError(f"Unknown detector backend {backend!r}, expected one of {DETECTOR_BACKENDS}")
+    from model_handles import load_yolo
+    if backend == 'pytorch':
+        return load_yolo(model_path)
+    path = _require_exported(model_path, backend)
+    if backend == 'openvino':
+        path = os.path.dirname(path)
+    from ultralytics import YOLO
+    return YOLO(path, task='detect')
+
+
+# --- EXPORT ---
+
+def _quantized_tflite(model, backend, sample_dir):
+    """Kuantisasi pasca-training: bobot int8 (dynamic), atau bobot + aktivasi int8 dengan kalibrasi (int8)."""
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if backend == 'tflite_int8':
+        calibration = rice_sample_batch(sample_dir)
+        converter.representative_dataset = lambda: ([sample[None]] for sample in calibration)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def export_classifier(model_path, backend, sample_dir='sample image'):
+    from model_handles import load_keras
+    import tensorflow as tf
+
+    model = load_keras(model_path)
+    out = exported_path(model_path, backend)
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    spec = (tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32, name='input'),)
+    if backend == 'onnx':
+        import tf2onnx
+        tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=out)
+    elif backend == 'tflite':
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        with open(out, 'wb') as f:
+            f.write(converter.convert())
+    elif backend in QUANTIZED_BACKENDS:
+        with open(out, 'wb') as f:
+            f.write(_quantized_tflite(model, backend, sample_dir))
+    elif backend == 'openvino':
+        import openvino as ov
+        ov.save_model(ov.convert_model(model, input=[(-1,) + tuple(model.input_shape[1:])]), out)
+    else:
+        raise BackendError(f"Cannot export classifier to {backend!r}")
+    return out
+
+
+def export_detector(model_path, backend, sample_dir=None):
+    from model_handles import load_yolo
+
+    if backend not in ('onnx', 'tflite', 'openvino'):
+        raise BackendError(f"Cannot export detector to {backend!r}")
+    # dynamic=True agar ONNX/OpenVINO menerima batch list gambar (tflite selalu statis)
+    load_yolo(model_path).export(format=backend, dynamic=backend != 'tflite')
+    return exported_path(model_path, backend)
+
+
+# --- PARITY CHECK ---
+
+def _sample_paths(sample_dir, prefixes):
+    return sorted(p for p in glob.glob(os.path.join(sample_dir, '*.jpg'))
+                  if os.path.basename(p).lower().startswith(prefixes))
+
+
+def classifier_parity(model_path, backend, sample_dir, tolerance=None):
+    if tolerance is None:
+        tolerance = QUANT_PROB_TOLERANCE if backend in QUANTIZED_BACKENDS else PROB_TOLERANCE
+    batch = rice_sample_batch(sample_dir)
+    reference = load_classifier_backend(model_path, 'keras').predict(batch)
+    candidate = load_classifier_backend(model_path, backend).predict(batch)
+
+    max_diff = float(np.abs(reference - candidate).max())
+    top1_agree = int((reference.argmax(axis=1) == candidate.argmax(axis=1)).sum())
+    return {
+        'images': len(batch), 'top1_agreement': top1_agree, 'max_abs_prob_diff': max_diff,
+        'ok': top1_agree == len(batch) and max_diff <= tolerance,
+    }
+
+
+def _per_image_latency_ms(runner, batch, repeats):
+    """Median latensi satu gambar (batch 1), setelah satu pemanggilan warm-up."""
+    runner.predict(batch[:1])
+    timings = []
+    for _ in range(repeats):
+        for i in range(len(batch)):
+            t0 = time.perf_counter()
+            runner.predict(batch[i:i + 1])
+            timings.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(timings))
+
+
+def _model_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+    return os.path.getsize(path)
+
+
+def classifier_quant_report(model_path, backend, sample_dir, repeats=3):
+    """Bandingkan classifier `backend` dengan model float (Keras): top-1, drift confidence per kelas, ukuran, latensi.
+
+    Catatan: sample image/ juga dipakai sebagai set kalibrasi tflite_int8, jadi
+    angka akurasi di sini optimistis; jalankan ulang dengan --samples folder lain bila ada.
+    """
+    from inference import CLASSIFICATION_CATEGORIES
+
+    batch = rice_sample_batch(sample_dir)
+    reference_runner = load_classifier_backend(model_path, 'keras')
+    candidate_runner = load_classifier_backend(model_path, backend)
+    reference = reference_runner.predict(batch)
+    candidate = candidate_runner.predict(batch)
+
+    ref_top1 = reference.argmax(axis=1)
+    drift = {}
+    for i, name in enumerate(CLASSIFICATION_CATEGORIES):
+        mask = ref_top1 == i
+        if mask.any():
+            delta = candidate[mask, i] - reference[mask, i]
+            drift[name] = {'images': int(mask.sum()), 'mean_drift': float(delta.mean()),
+                           'max_abs_drift': float(np.abs(delta).max())}
+
+    reference_size = _model_size(model_path)
+    candidate_size = _model_size(served_model_path(model_path, backend))
+    reference_ms = _per_image_latency_ms(reference_runner, batch, repeats)
+    candidate_ms = _per_image_latency_ms(candidate_runner, batch, repeats)
+    return {
+        'backend': backend, 'images': len(batch),
+        'top1_agreement': float((ref_top1 == candidate.argmax(axis=1)).mean()),
+        'max_abs_prob_diff': float(np.abs(reference - candidate).max()),
+        'class_confidence_drift': drift,
+        'size_bytes': {'float': reference_size, backend: candidate_size, 'ratio': reference_size / max(candidate_size, 1)},
+        'latency_ms_per_image': {'float': reference_ms, backend: candidate_ms, 'speedup': reference_ms / max(candidate_ms, 1e-9)},
+    }
+
+
+def print_quant_report(report):
+    backend = report['backend']
+    size, latency = report['size_bytes'], report['latency_ms_per_image']
+    print(f"{backend} vs float Keras on {report['images']} images")
+    print(f"  top-1 agreement   {report['top1_agreement']:.1%}   max |prob diff| {report['max_abs_prob_diff']:.4f}")
+    print(f"  model size        {size['float'] / 1e6:.2f} MB -> {size[backend] / 1e6:.2f} MB ({size['ratio']:.1f}x smaller)")
+    print(f"  latency / image   {latency['float']:.2f} ms -> {latency[backend]:.2f} ms ({latency['speedup']:.1f}x faster)")
+    print(f"  {'class':<12}{'images':>7}{'mean drift':>12}{'max |drift|':>13}")
+    for name, d in report['class_confidence_drift'].items():
+        print(f"  {name:<12}{d['images']:>7}{d['mean_drift']:>+12.4f}{d['max_abs_drift']:>13.4f}")
+
+
+def _match_boxes(ref, cand):
+    """Pasangkan box kandidat ke box referensi (greedy, kelas sama, IoU tertinggi)."""
+    pairs, used = [], set()
+    for r in ref:
+        best, best_iou = None, 0.0
+        for j, c in enumerate(cand):
+            if j in used or int(c[5]) != int(r[5]):
+                continue
+            ix1, iy1 = max(r[0], c[0]), max(r[1], c[1])
+            ix2, iy2 = min(r[2], c[2]), min(r[3], c[3])
+            inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+            union = (r[2] - r[0]) * (r[3] - r[1]) + (c[2] - c[0]) * (c[3] - c[1]) - inter
+            iou = inter / union if union > 0 else 0.0
+            if iou > best_iou:
+                best, best_iou = j, iou
+        if best is not None:
+            used.add(best)
+            pairs.append((r, cand[best]))
+    return pairs
+
+
+def detector_parity(model_path, backend, sample_dir, conf=0.25, iou=0.45,
+                    box_tolerance=BOX_TOLERANCE, conf_tolerance=BOX_CONF_TOLERANCE):
+    paths = _sample_paths(sample_dir, ('smoking', 'notsmoking'))
+    reference = load_detector_backend(model_path, 'pytorch')
+    candidate = load_detector_backend(model_path, backend)
+
+    ok, max_box, max_conf = True, 0.0, 0.0
+    for p in paths:
+        ref = reference(p, conf=conf, iou=iou, verbose=False)[0].boxes.data.tolist()
+        cand = candidate(p, conf=conf, iou=iou, verbose=False)[0].boxes.data.tolist()
+        pairs = _match_boxes(ref, cand)
+        if len(pairs) != len(ref) or len(cand) != len(ref):
+            ok = False
+        for r, c in pairs:
+            max_box = max(max_box, max(abs(a - b) for a, b in zip(r[:4], c[:4])))
+            max_conf = max(max_conf, abs(r[4] - c[4]))
+    return {
+        'images': len(paths), 'max_box_diff_px': max_box, 'max_conf_diff': max_conf,
+        'ok': ok and max_box <= box_tolerance and max_conf <= conf_tolerance,
+    }
+
+
+def main(argv=None):
+    from model_handles import CLASSIFIER_MODEL_PATH, YOLO_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Export models to CPU inference runtimes and check parity.")
+    parser.add_argument('command', choices=('export', 'parity', 'report'))
+    parser.add_argument('--model', choices=('classifier', 'detector'), default='classifier')
+    parser.add_argument('--backend', required=True, choices=EXPORT_BACKENDS['classifier'],
+                        help="detector: " + ", ".join(EXPORT_BACKENDS['detector']))
+    parser.add_argument('--samples', default='sample image', help="parity / report images, and int8 calibration set")
+    parser.add_argument('--output', help="report: also write the report as JSON")
+    args = parser.parse_args(argv)
+    if args.backend not in EXPORT_BACKENDS[args.model]:
+        parser.error(f"--backend {args.backend} is not available for the {args.model} "
+                     f"(choose from {', '.join(EXPORT_BACKENDS[args.model])})")
+
+    if args.command == 'report':
+        if args.model != 'classifier':
+            parser.error("report is only available for the classifier")
+        report = classifier_quant_report(CLASSIFIER_MODEL_PATH, args.backend, args.samples)
+        print_quant_report(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        return 0
+
+    if args.model == 'classifier':
+        model_path = CLASSIFIER_MODEL_PATH
+        export, parity = export_classifier, classifier_parity
+    else:
+        model_path = YOLO_MODEL_PATH
+        export, parity = export_detector, detector_parity
+
+    if args.command == 'export':
+        print(f"Exported {args.model} -> {export(model_path, args.backend, args.samples)}")
+        return 0
+
+    report = parity(model_path, args.backend, args.samples)
+    for key, value in report.items():
+        print(f"{key:>20}: {value}")
+    return 0 if report['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Micro-benchmark latensi per gambar: model.predict vs ClassifierEngine.
+
+Jalankan dari root repo:
+    python benchmarks/classifier_latency.py [--repeat 5]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classifier_engine import ClassifierEngine, CLASSIFIER_INPUT_SHAPE  # noqa: E402
+from model_handles import CLASSIFIER_MODEL_PATH, load_keras  # noqa: E402
+
+RICE_PREFIXES = ('arborio', 'basmati', 'ipsala', 'jasmine', 'karacadag')
+
+
+def load_samples(sample_dir):
+    paths = sorted(p for p in glob.glob(os.path.join(sample_dir, '*.jpg'))
+                   if os.path.basename(p).lower().startswith(RICE_PREFIXES))
+    size = CLASSIFIER_INPUT_SHAPE[:2][::-1]
+    return [np.expand_dims(np.array(Image.open(p).convert('RGB').resize(size)) / 255.0, axis=0) for p in paths]
+
+
+def time_per_image(fn, samples, repeat):
+    timings = []
+    for _ in range(repeat):
+        for x in samples:
+            t0 = time.perf_counter()
+            fn(x)
+            timings.append((time.perf_counter() - t0) * 1000)
+    return np.array(timings)
+
+
+def report(name, timings):
+    print(f"{name:<22} mean {timings.mean():7.2f} ms   p50 {np.percentile(timings, 50):7.2f} ms   "
+          f"p95 {np.percentile(timings, 95):7.2f} ms   ({len(timings)} calls)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=CLASSIFIER_MODEL_PATH)
+    parser.add_argument('--samples', default='sample image')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    if not samples:
+        sys.exit(f"No rice images found in {args.samples!r}")
+
+    model = load_keras(args.model)
+    model.predict(samples[0], verbose=0)  # warm-up yang sama untuk baseline
+
+    t0 = time.perf_counter()
+    engine = ClassifierEngine(model)
+    print(f"ClassifierEngine build + warm-up: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    before = time_per_image(lambda x: model.predict(x, verbose=0), samples, args.repeat)
+    after = time_per_image(engine.predict, samples, args.repeat)
+
+    report("model.predict", before)
+    report("ClassifierEngine", after)
+    print(f"Speed-up (mean): {before.mean() / after.mean():.1f}x")
+
+    agree = all(np.argmax(model.predict(x, verbose=0)) == np.argmax(engine.predict(x)) for x in samples)
+    print(f"Top-1 agreement: {'OK' if agree else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Jarak hash perseptual untuk varian gambar (encode ulang, resize, crop) dan biaya lookup indeks.
+
+Jalankan dari root repo:
+    python benchmarks/near_duplicates.py --index-size 100000
+
+Bagian pertama membandingkan jarak Hamming antara setiap gambar di `sample image/`
+dan variannya dengan jarak antar gambar yang berbeda, untuk memilih
+DASHBOARD_NEAR_DUP_MAX_DISTANCE. Pasangan gambar berbeda dalam batas jarak adalah
+false match (hasil gambar lain dipakai ulang); exit code 1 bila ada. Bagian kedua
+mengukur waktu lookup pada indeks berisi `--index-size` hash acak.
+"""
+import argparse
+import glob
+import io
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicates import NEAR_DUP_MAX_DISTANCE, MultiIndexHash, hamming, perceptual_hash  # noqa: E402
+
+
+def _reencode(image, quality):
+    buf = io.BytesIO()
+    image.save(buf, format='JPEG', quality=quality)
+    buf.seek(0)
+    return Image.open(buf).convert('RGB')
+
+
+VARIANTS = {
+    'jpeg_q70': lambda im: _reencode(im, 70),
+    'resize_75': lambda im: im.resize((round(im.width * 0.75), round(im.height * 0.75)), Image.BICUBIC),
+    'crop_3pct': lambda im: im.crop((round(im.width * 0.03), round(im.height * 0.03), im.width, im.height)),
+    'crop_10pct': lambda im: im.crop((round(im.width * 0.1), round(im.height * 0.1), im.width, im.height)),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', default='sample image')
+    parser.add_argument('--index-size', type=int, default=100_000)
+    parser.add_argument('--max-distance', type=int, default=NEAR_DUP_MAX_DISTANCE)
+    args = parser.parse_args(argv)
+
+    paths = sorted(glob.glob(os.path.join(args.samples, '*.jpg')))
+    images = [Image.open(p).convert('RGB') for p in paths]
+    hashes = [perceptual_hash(im) for im in images]
+
+    print(f"{len(images)} images, max distance {args.max_distance}")
+    print(f"{'variant':<12}{'median':>8}{'max':>6}{'reused':>9}")
+    for name, make in VARIANTS.items():
+        d = np.array([hamming(h, perceptual_hash(make(im))) for im, h in zip(images, hashes)])
+        print(f"{name:<12}{np.median(d):>8.0f}{d.max():>6}{(d <= args.max_distance).mean():>9.0%}")
+    pairs = [(i, j, hamming(hashes[i], hashes[j])) for i in range(len(hashes)) for j in range(i + 1, len(hashes))]
+    different = np.array([d for _, _, d in pairs])
+    false_matches = [(i, j, d) for i, j, d in pairs if d <= args.max_distance]
+    print(f"{'different':<12}{np.median(different):>8.0f}{different.min():>6}"
+          f"{len(false_matches) / len(pairs):>9.0%}  ({len(false_matches)} of {len(pairs)} pairs are false matches)")
+    for i, j, d in sorted(false_matches, key=lambda m: m[2]):
+        print(f"  false match at distance {d}: {os.path.basename(paths[i])} ~ {os.path.basename(paths[j])}")
+
+    rng = random.Random(0)
+    index = MultiIndexHash()
+    for _ in range(args.index_size):
+        index.add(rng.getrandbits(64), None)
+    queries = [rng.getrandbits(64) for _ in range(1000)]
+    t0 = time.perf_counter()
+    for q in queries:
+        index.nearest(q, args.max_distance)
+    lookup_ms = (time.perf_counter() - t0) / len(queries) * 1000
+    t0 = time.perf_counter()
+    for im in images:
+        perceptual_hash(im.copy())  # salinan: memo thumbnail di image.info tidak berlaku
+    hash_ms = (time.perf_counter() - t0) / len(images) * 1000
+    print(f"pHash {hash_ms:.2f} ms/image; lookup over {len(index)} hashes {lookup_ms:.3f} ms")
+    if different.min() <= args.max_distance:
+        print(f"FAIL: max distance {args.max_distance} reuses results across different images "
+              f"(closest pair at {different.min()}); lower DASHBOARD_NEAR_DUP_MAX_DISTANCE", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
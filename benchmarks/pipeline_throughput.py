@@ -0,0 +1,95 @@
+"""Throughput pipeline decode -> preprocess -> infer terhadap jumlah worker.
+
+Jalankan dari root repo:
+    python benchmarks/pipeline_throughput.py --task classify --workers 1 2 4 8 --repeat 4
+
+Korpus `sample image/` diulang `--repeat` kali dan dibaca dari bytes di memori
+(tanpa I/O disk). Baris "serial" adalah alur lama: decode semua gambar, lalu
+predict_*_batch. Cache hasil, cache input gate dan indeks near-duplicate
+dimatikan agar setiap gambar benar-benar diproses.
+"""
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference import BATCH_SIZE, decode_image, predict_classification_batch, predict_detection_batch  # noqa: E402
+from inference_cache import result_cache  # noqa: E402
+from input_gate import input_gate  # noqa: E402
+from metrics import stage_metrics  # noqa: E402
+from model_handles import classifier_handle, yolo_handle  # noqa: E402
+from near_duplicates import near_duplicate_index  # noqa: E402
+from pipeline import InferencePipeline  # noqa: E402
+
+RICE_PREFIXES = ('arborio', 'basmati', 'ipsala', 'jasmine', 'karacadag')
+PERSON_PREFIXES = ('smoking', 'notsmoking')
+
+
+def load_sources(sample_dir, task, repeat):
+    prefixes = RICE_PREFIXES if task == 'classify' else PERSON_PREFIXES
+    paths = sorted(p for p in glob.glob(os.path.join(sample_dir, '*.jpg'))
+                   if os.path.basename(p).lower().startswith(prefixes))
+    blobs = []
+    for p in paths:
+        with open(p, 'rb') as f:
+            blobs.append((os.path.basename(p), f.read()))
+    return [(f"{r}/{name}", data) for r in range(repeat) for name, data in blobs]
+
+
+def run_serial(sources, task, batch_size):
+    images = [decode_image(io.BytesIO(data)) for _, data in sources]
+    predict = predict_classification_batch if task == 'classify' else predict_detection_batch
+    return predict(images, batch_size)
+
+
+def run_pipeline(sources, task, batch_size, workers):
+    pipeline = InferencePipeline(task, batch_size=batch_size, workers=workers)
+    return pipeline.predict((name, io.BytesIO(data)) for name, data in sources)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--task', choices=('classify', 'detect'), default='classify')
+    parser.add_argument('--samples', default='sample image')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--repeat', type=int, default=4, help="times the corpus is repeated per run")
+    args = parser.parse_args(argv)
+
+    sources = load_sources(args.samples, args.task, args.repeat)
+    if not sources:
+        print(f"No {args.task} images in {args.samples}", file=sys.stderr)
+        return 1
+    result_cache.max_bytes = 0
+    input_gate.cache.max_bytes = 0
+    near_duplicate_index.max_distance = -1
+    (classifier_handle if args.task == 'classify' else yolo_handle).get()  # muat model di luar pengukuran
+    run_pipeline(sources[:args.batch_size], args.task, args.batch_size, 1)  # warm-up
+
+    print(f"{args.task}: {len(sources)} images, batch size {args.batch_size}, {os.cpu_count()} CPUs")
+    print(f"{'mode':<14}{'seconds':>9}{'img/s':>9}{'speedup':>9}")
+    t0 = time.perf_counter()
+    run_serial(sources, args.task, args.batch_size)
+    serial = time.perf_counter() - t0
+    print(f"{'serial':<14}{serial:>9.2f}{len(sources) / serial:>9.1f}{1.0:>8.2f}x")
+    for workers in args.workers:
+        stage_metrics.reset()
+        t0 = time.perf_counter()
+        items = run_pipeline(sources, args.task, args.batch_size, workers)
+        elapsed = time.perf_counter() - t0
+        errors = sum(1 for item in items if item.error)
+        print(f"{f'pipeline x{workers}':<14}{elapsed:>9.2f}{len(sources) / elapsed:>9.1f}{serial / elapsed:>8.2f}x"
+              + (f"  ({errors} errors)" if errors else ""))
+    stages = stage_metrics.snapshot()
+    print("last run, p50 per call: " + ", ".join(
+        f"{name.split('.', 1)[1]} {stats['p50_ms']:.1f}ms" for name, stats in sorted(stages.items())
+        if name.startswith('pipeline.')))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
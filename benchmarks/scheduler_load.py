@@ -0,0 +1,88 @@
+"""Simulasi beban scheduler inferensi dengan banyak sesi serentak (tanpa model).
+
+Jalankan dari root repo:
+    python benchmarks/scheduler_load.py --sessions 8 --heavy 2 --duration 5
+
+Setiap sesi adalah thread yang terus memanggil "model" tiruan (time.sleep) lewat
+InferenceScheduler. Sesi "heavy" mengirim burst beberapa panggilan sekaligus (seperti
+upload batch). Laporan: jumlah panggilan selesai per sesi, penolakan "busy",
+dan p50/p95/max waktu tunggu antrean. Dengan antrean adil, sesi ringan tetap
+mendapat giliran walau ada sesi berat.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import StageMetrics  # noqa: E402
+from scheduler import InferenceScheduler, SchedulerBusy  # noqa: E402
+
+
+def run_session(scheduler, session, service_ms, burst, stop, stats):
+    with ThreadPoolExecutor(max_workers=burst) as pool:
+        while not stop.is_set():
+            def call():
+                try:
+                    waited = scheduler.acquire(session)
+                except SchedulerBusy:
+                    stats['busy'] += 1
+                    time.sleep(service_ms / 1000)  # klien menunggu sebentar lalu mencoba lagi
+                    return
+                try:
+                    time.sleep(service_ms / 1000)
+                finally:
+                    scheduler.release()
+                stats['done'] += 1
+                stats['waits'].append(waited)
+            for future in [pool.submit(call) for _ in range(burst)]:
+                future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--heavy', type=int, default=2, help="sessions that submit bursts")
+    parser.add_argument('--burst', type=int, default=8, help="calls per burst for heavy sessions")
+    parser.add_argument('--concurrency', type=int, default=2)
+    parser.add_argument('--max-queue', type=int, default=16)
+    parser.add_argument('--service-ms', type=float, default=20.0)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    metrics = StageMetrics()
+    scheduler = InferenceScheduler('sim', max_concurrency=args.concurrency, max_queue=args.max_queue,
+                                   max_wait=10, metrics=metrics)
+    stop = threading.Event()
+    stats = {f"s{i}": {'done': 0, 'busy': 0, 'waits': []} for i in range(args.sessions)}
+    threads = [
+        threading.Thread(target=run_session, args=(scheduler, name, args.service_ms,
+                                                    args.burst if i < args.heavy else 1, stop, stats[name]))
+        for i, name in enumerate(stats)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(f"concurrency={args.concurrency} max_queue={args.max_queue} service={args.service_ms:.0f}ms "
+          f"duration={args.duration:.0f}s")
+    print(f"{'session':<10}{'kind':<7}{'done':>7}{'busy':>7}{'wait p50':>11}{'wait p95':>11}{'wait max':>11}")
+    for i, (name, s) in enumerate(stats.items()):
+        waits = np.array(s['waits']) * 1000 if s['waits'] else np.zeros(1)
+        print(f"{name:<10}{'heavy' if i < args.heavy else 'light':<7}{s['done']:>7}{s['busy']:>7}"
+              f"{np.percentile(waits, 50):>9.1f}ms{np.percentile(waits, 95):>9.1f}ms{waits.max():>9.1f}ms")
+    wait = metrics.snapshot()['queue.sim.wait']
+    print(f"queue.sim.wait histogram: count={wait['count']} p95={wait['p95_ms']:.1f}ms; rejected={scheduler.rejected}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""Benchmark per tahap atas korpus `sample image/` dengan baseline regresi.
+
+Jalankan dari root repo:
+    python benchmarks/suite.py --output bench.json
+    python benchmarks/suite.py --output bench.json --compare benchmarks/baseline.json
+
+Tahap: decode, preprocess (resize + normalisasi), classifier, yolo, render,
+serta ops_pil / ops_opencv (decode + resize + letterbox per backend image ops)
+dan yolo_tiled (deteksi bertile vs pass tunggal pada decode resolusi tinggi).
+Untuk setiap tahap dicatat latensi p50/p95/p99 (ms per panggilan) dan, untuk
+tahap model, throughput (gambar/detik) pada beberapa ukuran batch. Mode
+--compare menandai regresi terhadap baseline dan keluar dengan kode 1.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_ops import get_ops  # noqa: E402
+from inference import (  # noqa: E402
+    CLASSIFIER_INPUT_SIZE, DECODE_MAX_SIDE, TILED_DECODE_MAX_SIDE, YOLO_CONF_THRESHOLD, YOLO_IMGSZ, YOLO_IOU_THRESHOLD,
+    _detection_result, decode_image, draw_bounding_boxes, predict_detection, predict_detection_tiled,
+    preprocess_classification_batch,
+)
+from inference_cache import result_cache  # noqa: E402
+from near_duplicates import near_duplicate_index  # noqa: E402
+from preprocessing import preprocess_batch  # noqa: E402
+from model_handles import classifier_handle, yolo_handle  # noqa: E402
+
+RICE_PREFIXES = ('arborio', 'basmati', 'ipsala', 'jasmine', 'karacadag')
+PERSON_PREFIXES = ('smoking', 'notsmoking')
+
+CLASSIFIER_BATCH_SIZES = (1, 8, 32)
+YOLO_BATCH_SIZES = (1, 4, 8)
+REGRESSION_THRESHOLD = 0.10
+
+
+# --- KORPUS & PENGUKURAN ---
+
+def load_corpus(sample_dir):
+    paths = sorted(glob.glob(os.path.join(sample_dir, '*.jpg')))
+    names = [os.path.basename(p).lower() for p in paths]
+    rice = [p for p, n in zip(paths, names) if n.startswith(RICE_PREFIXES)]
+    person = [p for p, n in zip(paths, names) if n.startswith(PERSON_PREFIXES)]
+    return rice, person
+
+
+def latency_ms(fn, items, repeat=1):
+    timings = []
+    for _ in range(repeat):
+        for item in items:
+            t0 = time.perf_counter()
+            fn(item)
+            timings.append((time.perf_counter() - t0) * 1000)
+    return timings
+
+
+def summarize(timings):
+    t = np.asarray(timings)
+    return {
+        'n': int(t.size), 'mean_ms': float(t.mean()),
+        'p50_ms': float(np.percentile(t, 50)), 'p95_ms': float(np.percentile(t, 95)), 'p99_ms': float(np.percentile(t, 99)),
+    }
+
+
+def throughput(fn, images, batch_sizes, repeat=1):
+    """Gambar/detik untuk setiap ukuran batch (`fn` menerima list gambar)."""
+    out = {}
+    for bs in batch_sizes:
+        batches = [images[i:i + bs] for i in range(0, len(images), bs)]
+        fn(batches[0])  # warm-up untuk bentuk batch ini
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for batch in batches:
+                fn(batch)
+        out[str(bs)] = len(images) * repeat / (time.perf_counter() - t0)
+    return out
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+# --- TAHAP ---
+
+def bench_decode(ctx):
+    return summarize(latency_ms(decode_image, ctx['rice'] + ctx['person'], ctx['repeat']))
+
+
+def bench_preprocess(ctx):
+    stats = summarize(latency_ms(lambda img: preprocess_classification_batch([img]), ctx['rice_images'], ctx['repeat']))
+    # Harus identik dengan jalur lama np.array(img) / 255.0 (float64) yang di-cast ke float32
+    reference = np.stack([np.array(img.resize(CLASSIFIER_INPUT_SIZE)) / 255.0 for img in ctx['rice_images']]).astype(np.float32)
+    stats['max_abs_diff_vs_float64'] = float(np.abs(preprocess_classification_batch(ctx['rice_images']) - reference).max())
+    return stats
+
+
+def bench_classifier(ctx):
+    engine = classifier_handle.get()
+    batches = [preprocess_classification_batch([img]).copy() for img in ctx['rice_images']]  # buffer dipakai ulang
+    engine.predict(batches[0])
+    stats = summarize(latency_ms(engine.predict, batches, ctx['repeat']))
+    stats['throughput_ips'] = throughput(
+        lambda imgs: engine.predict(preprocess_classification_batch(imgs)), ctx['rice_images'], CLASSIFIER_BATCH_SIZES, ctx['repeat'])
+    return stats
+
+
+def _yolo(model, images):
+    return model(images, conf=YOLO_CONF_THRESHOLD, iou=YOLO_IOU_THRESHOLD, verbose=False)
+
+
+def bench_yolo(ctx):
+    model = yolo_handle.get()
+    _yolo(model, ctx['person_images'][:1])
+    stats = summarize(latency_ms(lambda img: _yolo(model, img), ctx['person_images'], ctx['repeat']))
+    stats['throughput_ips'] = throughput(lambda imgs: _yolo(model, imgs), ctx['person_images'], YOLO_BATCH_SIZES, ctx['repeat'])
+    ctx['detections'] = [_detection_result(r)['objects'] for r in _yolo(model, ctx['person_images'])]
+    return stats
+
+
+def bench_yolo_tiled(ctx):
+    """Biaya deteksi bertile dibanding pass tunggal, keduanya pada gambar yang didecode hingga TILED_DECODE_MAX_SIDE."""
+    images = [decode_image(p, TILED_DECODE_MAX_SIDE) for p in ctx['person']]
+    yolo_handle.get()
+
+    def uncached(fn):
+        def call(img):
+            result_cache.clear()  # setiap panggilan benar-benar menjalankan model
+            near_duplicate_index.clear()
+            return fn(img, 'smoking.jpg')
+        return call
+
+    single = uncached(predict_detection)
+    tiled = uncached(predict_detection_tiled)
+    tiled(images[0])
+    stats = summarize(latency_ms(tiled, images, ctx['repeat']))
+    stats['single_pass'] = summarize(latency_ms(single, images, ctx['repeat']))
+    stats['cost_vs_single_pass'] = stats['mean_ms'] / stats['single_pass']['mean_ms']
+    tiled_results = [tiled(img) for img in images]
+    stats['tiles_run_mean'] = float(np.mean([r.get('tiles', {}).get('run', 0) for r in tiled_results]))
+    stats['tiles_skipped_mean'] = float(np.mean([r.get('tiles', {}).get('skipped', 0) for r in tiled_results]))
+    stats['objects'] = {'single_pass': sum(single(img)['total_objects'] for img in images),
+                        'tiled': sum(r['total_objects'] for r in tiled_results)}
+    return stats
+
+
+def bench_render(ctx):
+    detections = ctx.get('detections')
+    if detections is None:
+        # Tanpa model YOLO: box sintetis agar biaya render tetap terukur
+        detections = [[{'class': 'Smoking', 'confidence': 90.0, 'bbox': [w * 0.2, h * 0.2, w * 0.6, h * 0.8]}]
+                      for w, h in (img.size for img in ctx['person_images'])]
+    pairs = list(zip(ctx['person_images'], detections))
+    return summarize(latency_ms(lambda p: draw_bounding_boxes(*p), pairs, ctx['repeat']))
+
+
+def _bench_image_ops(ctx, name):
+    """Latensi decode -> resize classifier -> letterbox YOLO untuk satu backend image ops."""
+    ops = get_ops(name)
+
+    def decode(path):
+        rgb = ops.decode(path, target_side=DECODE_MAX_SIDE)
+        if max(rgb.shape[:2]) > DECODE_MAX_SIDE:
+            scale = DECODE_MAX_SIDE / max(rgb.shape[:2])
+            rgb = ops.resize(rgb, (round(rgb.shape[1] * scale), round(rgb.shape[0] * scale)))
+        return rgb
+
+    def chain(path):
+        rgb = decode(path)
+        ops.resize(rgb, CLASSIFIER_INPUT_SIZE)
+        ops.letterbox(rgb, YOLO_IMGSZ)
+
+    paths = ctx['rice'] + ctx['person']
+    decoded = [decode(p) for p in paths]
+    stats = summarize(latency_ms(chain, paths, ctx['repeat']))
+    stats['ops'] = {
+        'decode': summarize(latency_ms(decode, paths, ctx['repeat'])),
+        'resize_classifier': summarize(latency_ms(lambda rgb: ops.resize(rgb, CLASSIFIER_INPUT_SIZE), decoded, ctx['repeat'])),
+        'letterbox_yolo': summarize(latency_ms(lambda rgb: ops.letterbox(rgb, YOLO_IMGSZ), decoded, ctx['repeat'])),
+    }
+    return stats
+
+
+def bench_ops_pil(ctx):
+    return _bench_image_ops(ctx, 'pil')
+
+
+def bench_ops_opencv(ctx):
+    stats = _bench_image_ops(ctx, 'opencv')
+    # Toleransi: output classifier dengan preprocessing OpenCV vs PIL pada gambar beras
+    try:
+        engine = classifier_handle.get()
+    except Exception as e:
+        stats['classifier_tolerance'] = {'skipped': f"{type(e).__name__}: {e}"}
+        return stats
+    pil = engine.predict(preprocess_batch(ctx['rice_images'], ops=get_ops('pil')).copy())
+    cv = engine.predict(preprocess_batch(ctx['rice_images'], ops=get_ops('opencv')).copy())
+    stats['classifier_tolerance'] = {
+        'max_abs_prob_diff': float(np.abs(pil - cv).max()),
+        'top1_agreement': int((pil.argmax(axis=1) == cv.argmax(axis=1)).sum()), 'images': len(ctx['rice_images']),
+    }
+    return stats
+
+
+STAGES = {
+    'decode': bench_decode,
+    'preprocess': bench_preprocess,
+    'classifier': bench_classifier,
+    'yolo': bench_yolo,
+    'yolo_tiled': bench_yolo_tiled,
+    'render': bench_render,
+    'ops_pil': bench_ops_pil,
+    'ops_opencv': bench_ops_opencv,
+}
+
+
+def run(sample_dir, stages, repeat):
+    rice, person = load_corpus(sample_dir)
+    ctx = {
+        'rice': rice, 'person': person, 'repeat': repeat,
+        'rice_images': [decode_image(p) for p in rice], 'person_images': [decode_image(p) for p in person],
+    }
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+            'machine': platform.machine(), 'cpus': os.cpu_count(),
+            'corpus': {'rice': len(rice), 'person': len(person)}, 'repeat': repeat,
+        },
+        'stages': {},
+    }
+    for name in stages:
+        try:
+            report['stages'][name] = STAGES[name](ctx)
+        except Exception as e:
+            report['stages'][name] = {'skipped': f"{type(e).__name__}: {e}"}
+    report['peak_rss_mb'] = peak_rss_mb()
+    return report
+
+
+# --- PERBANDINGAN BASELINE ---
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """Daftar regresi: latensi naik atau throughput turun lebih dari `threshold` (relatif)."""
+    regressions = []
+    for stage, cur in current['stages'].items():
+        base = baseline.get('stages', {}).get(stage)
+        if not base or 'skipped' in cur or 'skipped' in base:
+            continue
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if key in base and base[key] > 0 and cur[key] > base[key] * (1 + threshold):
+                regressions.append(f"{stage}.{key}: {base[key]:.2f} -> {cur[key]:.2f} ms (+{cur[key] / base[key] - 1:.0%})")
+        for bs, ips in cur.get('throughput_ips', {}).items():
+            base_ips = base.get('throughput_ips', {}).get(bs)
+            if base_ips and ips < base_ips * (1 - threshold):
+                regressions.append(f"{stage}.throughput[bs={bs}]: {base_ips:.1f} -> {ips:.1f} img/s ({ips / base_ips - 1:.0%})")
+    base_rss = baseline.get('peak_rss_mb')
+    if base_rss and current['peak_rss_mb'] > base_rss * (1 + threshold):
+        regressions.append(f"peak_rss_mb: {base_rss:.0f} -> {current['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def print_report(report):
+    for stage, stats in report['stages'].items():
+        if 'skipped' in stats:
+            print(f"{stage:<12} skipped ({stats['skipped']})")
+            continue
+        line = f"{stage:<12} p50 {stats['p50_ms']:8.2f}  p95 {stats['p95_ms']:8.2f}  p99 {stats['p99_ms']:8.2f} ms"
+        if 'throughput_ips' in stats:
+            line += "   " + "  ".join(f"bs={bs}: {ips:.1f} img/s" for bs, ips in stats['throughput_ips'].items())
+        if 'cost_vs_single_pass' in stats:
+            line += f"   {stats['cost_vs_single_pass']:.1f}x single pass, {stats['tiles_run_mean']:.1f} tiles run / {stats['tiles_skipped_mean']:.1f} skipped"
+        print(line)
+    print(f"{'peak RSS':<12} {report['peak_rss_mb']:.0f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage benchmark over the sample image/ corpus.")
+    parser.add_argument('--samples', default='sample image')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None, help="Write results as JSON")
+    parser.add_argument('--compare', default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    report = run(args.samples, args.stages, args.repeat)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"\nREGRESSIONS vs {args.compare}:")
+            for r in regressions:
+                print(f"  {r}")
+            return 1
+        print(f"\nNo regressions vs {args.compare} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
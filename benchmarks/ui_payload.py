@@ -0,0 +1,44 @@
+"""Ukuran aset inline (CSS + logo) yang dikirim ke browser per rerun, sebelum vs sesudah ui_assets.
+
+Jalankan dari root repo:
+    python benchmarks/ui_payload.py
+
+"Sebelum" = CSS apa adanya + logo PNG asli di-base64 inline di setiap tempat logo
+tampil (sidebar di semua halaman, ditambah header Home). "Sesudah" = CSS minified
++ `src` logo dari ui_assets.logo_src() (URL static, atau data URI logo kecil bila
+static serving nonaktif). File static diunduh sekali lalu di-cache browser.
+"""
+import base64
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ui_assets import CSS_PATH, LOGO_PATH, _logo_png, dashboard_css, logo_src  # noqa: E402
+
+# Jumlah logo per halaman: sidebar selalu, Home menambah satu di header
+LOGOS_PER_PAGE = {'Home': 2, 'Model Prediction': 1, 'Analytics': 1, 'About': 1}
+
+
+def main():
+    with open(CSS_PATH, encoding='utf-8') as f:
+        css_before = len(f"<style>{f.read()}</style>".encode('utf-8'))
+    with open(LOGO_PATH, 'rb') as f:
+        logo_before = len("data:image/png;base64,") + len(base64.b64encode(f.read()))
+    css_after = len(dashboard_css().encode('utf-8'))
+    src = logo_src()
+    logo_after = len(src)
+
+    print(f"CSS:  {css_before:>9,} B -> {css_after:>9,} B per rerun")
+    print(f"Logo: {logo_before:>9,} B -> {logo_after:>9,} B per occurrence"
+          + (f" (static file {len(_logo_png()):,} B, fetched once)" if not src.startswith('data:') else ''))
+    print(f"{'Page':<18}{'before (B)':>14}{'after (B)':>14}{'saved':>9}")
+    for page, n_logos in LOGOS_PER_PAGE.items():
+        before = css_before + n_logos * logo_before
+        after = css_after + n_logos * logo_after
+        print(f"{page:<18}{before:>14,}{after:>14,}{1 - after / before:>9.1%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,33 +1,38 @@
+import sys
+
+# `python -m dashboard score <dir> ...` menjalankan batch scorer tanpa memuat UI Streamlit
+if __name__ == "__main__" and sys.argv[1:2] == ["score"]:
+    from scorer import main as score_main
+    sys.exit(score_main(sys.argv[2:]))
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-from PIL import Image, ImageDraw
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import time
 import os
-
-# TAMBAHKAN IMPORT DARI TORCHVISION DAN ULTRALYTICS 
-try:
-    import torch
-    from torchvision import transforms
-    TORCH_AVAILABLE = True
-except ImportError:
-    TORCH_AVAILABLE = False
-
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    TENSORFLOW_AVAILABLE = True
-except ImportError:
-    TENSORFLOW_AVAILABLE = False
-    
-try:
-    from ultralytics import YOLO
-    ULTRALYTICS_AVAILABLE = True
-except ImportError:
-    ULTRALYTICS_AVAILABLE = False
+import uuid
+import tempfile
+import zipfile
+import io
+from PIL import Image
+
+from inference import (
+    BATCH_SIZE, DECODE_MAX_SIDE, TILED_DECODE_MAX_SIDE, ImageTooLargeError, decode_image, draw_bounding_boxes,
+    predict_image,
+)
+from downsampling import TREND_POINT_BUDGET, lttb
+from history_store import get_history_store
+from inference_cache import result_cache
+from near_duplicates import near_duplicate_index
+from metrics import span, stage_metrics, timed
+from pipeline import InferencePipeline
+from model_handles import classifier_handle, yolo_handle, start_idle_reaper
+from scheduler import current_session
+from video import VideoDetectionError, VideoDetector, summarize
+from ui_assets import EXPORT_MAX_AGE, dashboard_css, logo_src, publish_export, static_serving_enabled
 
 st.set_page_config(
     page_title="ML Dashboard",
@@ -37,597 +42,14 @@ st.set_page_config(
 )
 
 # --- CSS STYLING  ---
-def load_css():
-    return """
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=DM+Sans:wght@400;500;600;700&display=swap');
-
-    /* Global Reset & Base */
-    * {
-        font-family: 'DM Sans', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif !important;
-        margin: 0;
-        padding: 0;
-    }
-
-    /* Root Variables - Purple Theme */
-    :root {
-        --primary: #a855f7;
-        --primary-dark: #9333ea;
-        --secondary: #c084fc;
-        --background: #0a1929;
-        --surface: rgba(168, 85, 247, 0.05);
-        --text-primary: #ffffff;
-        --text-secondary: #d8b4fe;
-        --text-muted: #c084fc;
-        --border: rgba(168, 85, 247, 0.3);
-        --success: #00e676;
-        --error: #ff1744;
-        --warning: #ffc400;
-        --info: #a855f7;
-    }
-
-    /* Main Background - Purple Theme */
-    .main {
-        background:
-            linear-gradient(135deg, #0a1929 0%, #1a0d2e 25%, #2d1b4e 50%, #1e0d3a 75%, #0a1929 100%),
-            radial-gradient(ellipse at top left, rgba(168, 85, 247, 0.12) 0%, transparent 50%),
-            radial-gradient(ellipse at bottom right, rgba(192, 132, 252, 0.08) 0%, transparent 50%);
-        color: var(--text-primary);
-        min-height: 100vh;
-        position: relative;
-        overflow-x: hidden;
-    }
-
-    .main::before {
-        content: '';
-        position: fixed;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background:
-            radial-gradient(circle at 20% 30%, rgba(168, 85, 247, 0.15) 0%, transparent 60%),
-            radial-gradient(circle at 80% 70%, rgba(192, 132, 252, 0.12) 0%, transparent 60%),
-            radial-gradient(circle at 50% 50%, rgba(147, 51, 234, 0.08) 0%, transparent 70%);
-        pointer-events: none;
-        z-index: 0;
-        animation: backgroundShift 20s ease-in-out infinite;
-    }
-
-    @keyframes backgroundShift {
-        0%, 100% { 
-            transform: translateX(0) translateY(0) scale(1);
-            opacity: 1;
-        }
-        25% { 
-            transform: translateX(-10px) translateY(-5px) scale(1.02);
-            opacity: 0.8;
-        }
-        50% { 
-            transform: translateX(5px) translateY(-10px) scale(0.98);
-            opacity: 0.9;
-        }
-        75% { 
-            transform: translateX(-5px) translateY(5px) scale(1.01);
-            opacity: 0.85;
-        }
-    }
-
-    .main > div {
-        position: relative;
-        z-index: 1;
-    }
-
-    /* Sidebar - Purple Theme */
-    [data-testid="stSidebar"] {
-        background: rgba(26, 13, 46, 0.98) !important;
-        backdrop-filter: blur(40px) saturate(180%);
-        -webkit-backdrop-filter: blur(40px) saturate(180%);
-        border-right: 1px solid var(--border);
-        box-shadow: 4px 0 24px rgba(168, 85, 247, 0.2);
-    }
-
-    [data-testid="stSidebar"] > div {
-        background: transparent !important;
-        padding: 2rem 1.5rem !important;
-    }
-
-    [data-testid="stSidebar"] * {
-        color: var(--text-primary) !important;
-    }
-
-    /* Sidebar Section Headers */
-    [data-testid="stSidebar"] h1,
-    [data-testid="stSidebar"] h2,
-    [data-testid="stSidebar"] h3 {
-        color: var(--text-primary) !important;
-    }
-
-    /* Typography - Black for main content */
-    .main h1 {
-        font-weight: 700 !important;
-        color: #000000 !important;
-        font-size: 2.25rem !important;
-        line-height: 1.2 !important;
-        letter-spacing: -0.03em !important;
-        margin-bottom: 0.5rem !important;
-    }
-
-    .main h2 {
-        font-weight: 600 !important;
-        color: #000000 !important;
-        font-size: 1.75rem !important;
-        line-height: 1.3 !important;
-        letter-spacing: -0.02em !important;
-        margin-top: 2rem !important;
-    }
-
-    .main h3 {
-        font-weight: 600 !important;
-        color: #000000 !important;
-        font-size: 1.125rem !important;
-        line-height: 1.5 !important;
-    }
-
-    /* Sidebar headings remain white */
-    [data-testid="stSidebar"] h1,
-    [data-testid="stSidebar"] h2,
-    [data-testid="stSidebar"] h3 {
-        color: #ffffff !important;
-    }
-
-    /* Main content text - BLACK */
-    .main p,
-    .main label,
-    .main span,
-    .main div {
-        color: #000000 !important;
-        line-height: 1.6 !important;
-    }
-
-    /* Ensure readability for all text in main */
-    .main .stMarkdown p,
-    .main .stMarkdown span,
-    .main .stMarkdown div {
-        color: #000000 !important;
-    }
-
-    /* Placeholder text */
-    input::placeholder {
-        color: #666666 !important;
-    }
-
-    /* Sidebar text remains white */
-    [data-testid="stSidebar"] p,
-    [data-testid="stSidebar"] label,
-    [data-testid="stSidebar"] span,
-    [data-testid="stSidebar"] div {
-        color: #ffffff !important;
-    }
-
-    /* Glass Card Base - Ultra Premium */
-    .glass-card {
-        background: linear-gradient(135deg, rgba(255, 255, 255, 0.08) 0%, rgba(255, 255, 255, 0.02) 100%) !important;
-        backdrop-filter: blur(20px) saturate(200%);
-        -webkit-backdrop-filter: blur(20px) saturate(200%);
-        border: 1px solid rgba(255, 255, 255, 0.15);
-        border-radius: 24px;
-        box-shadow:
-            0 12px 40px rgba(0, 0, 0, 0.4),
-            inset 0 1px 0 rgba(255, 255, 255, 0.2),
-            0 0 0 1px rgba(139, 92, 246, 0.1);
-        transition: all 0.5s cubic-bezier(0.4, 0, 0.2, 1);
-        position: relative;
-        overflow: hidden;
-    }
-
-    .glass-card:hover {
-        border-color: rgba(139, 92, 246, 0.6);
-        box-shadow:
-            0 20px 60px rgba(139, 92, 246, 0.3),
-            inset 0 1px 0 rgba(255, 255, 255, 0.3),
-            0 0 0 1px rgba(139, 92, 246, 0.2);
-        transform: translateY(-8px) scale(1.02);
-        background: linear-gradient(135deg, rgba(255, 255, 255, 0.12) 0%, rgba(255, 255, 255, 0.04) 100%) !important;
-    }
-
-    /* Buttons - Purple Theme */
-    .stButton > button {
-        background: linear-gradient(135deg, rgba(168, 85, 247, 0.9) 0%, rgba(147, 51, 234, 0.9) 100%) !important;
-        backdrop-filter: blur(10px);
-        color: #ffffff !important;
-        font-weight: 600 !important;
-        border: 1px solid rgba(168, 85, 247, 0.4) !important;
-        border-radius: 14px !important;
-        padding: 0.875rem 2rem !important;
-        font-size: 0.9375rem !important;
-        letter-spacing: 0.01em !important;
-        box-shadow:
-            0 4px 20px rgba(168, 85, 247, 0.5),
-            inset 0 1px 0 rgba(255, 255, 255, 0.2) !important;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
-    }
-
-    .stButton > button:hover {
-        background: linear-gradient(135deg, rgba(192, 132, 252, 1) 0%, rgba(168, 85, 247, 1) 100%) !important;
-        box-shadow:
-            0 8px 30px rgba(168, 85, 247, 0.7),
-            inset 0 1px 0 rgba(255, 255, 255, 0.3) !important;
-        transform: translateY(-2px) scale(1.02) !important;
-        border-color: rgba(192, 132, 252, 0.6) !important;
-    }
-
-    /* Radio Button Styling - Perfect Consistency */
-    .stRadio > div {
-        gap: 0.75rem !important;
-        display: flex !important;
-        flex-direction: column !important;
-    }
-
-    .stRadio > div > label {
-        background: var(--surface) !important;
-        backdrop-filter: blur(15px);
-        border: 1px solid var(--border) !important;
-        border-radius: 16px !important;
-        padding: 1rem 1.25rem !important;
-        transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1) !important;
-        cursor: pointer !important;
-        position: relative !important;
-        overflow: hidden !important;
-        min-height: 60px !important;
-        height: 60px !important;
-        width: 100% !important;
-        display: flex !important;
-        align-items: center !important;
-        justify-content: flex-start !important;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1) !important;
-    }
-
-    .stRadio > div > label::before {
-        content: '';
-        position: absolute;
-        left: 0;
-        top: 0;
-        width: 4px;
-        height: 100%;
-        background: transparent;
-        transition: all 0.3s ease;
-        border-radius: 0 4px 4px 0;
-    }
-
-    .stRadio > div > label:hover {
-        background: rgba(255, 255, 255, 0.08) !important;
-        border-color: var(--primary) !important;
-        transform: translateX(4px) !important;
-        box-shadow: 0 6px 20px rgba(139, 92, 246, 0.2) !important;
-    }
-
-    .stRadio > div > label:hover::before {
-        background: linear-gradient(180deg, var(--primary) 0%, var(--secondary) 100%);
-    }
-
-    /* Hide default radio button circle */
-    .stRadio > div > label > div:first-child {
-        display: none !important;
-    }
-
-    .stRadio > div > label > div {
-        font-weight: 600 !important;
-        color: var(--text-primary) !important;
-        font-size: 1rem !important;
-        display: flex !important;
-        align-items: center !important;
-        gap: 0rem !important;
-        margin-left: 0rem !important;
-        width: 100% !important;
-    }
-
-    /* Slider Styling */
-    .stSlider > div > div > div {
-        background: var(--surface) !important;
-        border-radius: 8px !important;
-        height: 6px !important;
-    }
-
-    .stSlider > div > div > div > div {
-        background: linear-gradient(90deg, var(--primary) 0%, var(--secondary) 100%) !important;
-    }
-
-    .stSlider > div > div > div > div > div {
-        background: #ffffff !important;
-        border: 2px solid var(--primary) !important;
-        box-shadow: 0 2px 8px rgba(139, 92, 246, 0.3) !important;
-        width: 18px !important;
-        height: 18px !important;
-    }
-
-    /* File Uploader - Glass with Purple Theme */
-    [data-testid="stFileUploader"] {
-        background: rgba(168, 85, 247, 0.08);
-        backdrop-filter: blur(10px);
-        border: 2px dashed rgba(168, 85, 247, 0.5);
-        border-radius: 20px;
-        padding: 3rem 2rem;
-        transition: all 0.3s ease;
-    }
-
-    [data-testid="stFileUploader"]:hover {
-        border-color: rgba(192, 132, 252, 0.7);
-        background: rgba(168, 85, 247, 0.12);
-        box-shadow: 0 8px 30px rgba(168, 85, 247, 0.3);
-    }
-
-    /* File Uploader Text - BLACK */
-    [data-testid="stFileUploader"] label,
-    [data-testid="stFileUploader"] span,
-    [data-testid="stFileUploader"] p,
-    [data-testid="stFileUploader"] div {
-        color: #000000 !important;
-        font-weight: 500 !important;
-    }
-
-    [data-testid="stFileUploader"] small {
-        color: #333333 !important;
-    }
-
-    /* Metrics - Glass Style */
-    [data-testid="stMetric"] {
-        background: rgba(255, 255, 255, 0.05);
-        backdrop-filter: blur(16px) saturate(180%);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        border-radius: 16px;
-        padding: 1.5rem !important;
-        box-shadow:
-            0 4px 20px rgba(0, 0, 0, 0.2),
-            inset 0 1px 0 rgba(255, 255, 255, 0.1);
-        transition: all 0.3s ease;
-    }
-
-    [data-testid="stMetric"]:hover {
-        border-color: rgba(139, 92, 246, 0.3);
-        box-shadow:
-            0 8px 30px rgba(139, 92, 246, 0.15),
-            inset 0 1px 0 rgba(255, 255, 255, 0.15);
-        transform: translateY(-2px);
-    }
-
-    [data-testid="stMetricValue"] {
-        font-weight: 700 !important;
-        color: var(--text-primary) !important;
-        font-size: 2rem !important;
-        letter-spacing: -0.02em !important;
-    }
-
-    [data-testid="stMetricLabel"] {
-        font-weight: 500 !important;
-        color: var(--text-secondary) !important;
-        font-size: 0.8125rem !important;
-        text-transform: uppercase !important;
-        letter-spacing: 0.08em !important;
-        margin-bottom: 0.5rem !important;
-    }
-
-    /* Alert Boxes - Glass with Better Visibility */
-    .stAlert {
-        backdrop-filter: blur(10px);
-        border-radius: 14px;
-        border: 1px solid;
-        padding: 1rem 1.5rem;
-        font-weight: 600;
-    }
-
-    .stSuccess {
-        background: rgba(34, 197, 94, 0.2) !important;
-        color: #ffffff !important;
-        border-color: rgba(34, 197, 94, 0.5) !important;
-    }
-
-    .stError {
-        background: rgba(239, 68, 68, 0.2) !important;
-        color: #ffffff !important;
-        border-color: rgba(239, 68, 68, 0.5) !important;
-    }
-
-    /* All Alert text should be BLACK */
-    .stAlert div,
-    .stAlert p,
-    .stAlert span {
-        color: #000000 !important;
-    }
-
-    /* Progress Bar */
-    .stProgress > div > div > div > div {
-        background: linear-gradient(90deg, var(--primary) 0%, var(--secondary) 100%) !important;
-    }
-
-    .stProgress > div > div {
-        background: rgba(255, 255, 255, 0.1) !important;
-        border-radius: 10px !important;
-    }
-
-    /* Dataframe - Glass */
-    .dataframe {
-        background: rgba(255, 255, 255, 0.04) !important;
-        backdrop-filter: blur(10px);
-        border: 1px solid rgba(255, 255, 255, 0.1) !important;
-        border-radius: 14px !important;
-        overflow: hidden !important;
-    }
-
-    .dataframe thead tr {
-        background: rgba(139, 92, 246, 0.15) !important;
-    }
-
-    .dataframe th {
-        color: var(--text-primary) !important;
-        font-weight: 600 !important;
-        text-transform: uppercase !important;
-        font-size: 0.75rem !important;
-        letter-spacing: 0.08em !important;
-        padding: 1rem !important;
-        border-color: rgba(255, 255, 255, 0.08) !important;
-    }
-
-    .dataframe td {
-        color: var(--text-secondary) !important;
-        padding: 0.875rem 1rem !important;
-        border-color: rgba(255, 255, 255, 0.05) !important;
-    }
-
-    .dataframe tbody tr:hover {
-        background: rgba(139, 92, 246, 0.08) !important;
-    }
-
-    /* Hide Streamlit Elements */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-
-    /* Hide sidebar collapse button completely */
-    [data-testid="collapsedControl"] {
-        display: none !important;
-    }
-
-    /* Hide sidebar collapse button in header */
-    [data-testid="stSidebar"] button[kind="header"] {
-        display: none !important;
-    }
-
-    /* Hide all collapse control buttons */
-    button[aria-label*="collapse"] {
-        display: none !important;
-    }
-
-    /* Hide Material Icon text fallback */
-    .material-icons {
-        font-size: 0 !important;
-    }
-
-    /* Hide keyboard_double_arrow text specifically */
-    [data-testid="stSidebar"] button {
-        font-size: 0 !important;
-    }
-
-    [data-testid="stSidebar"] button svg {
-        display: block !important;
-    }
-
-    /* Alternative: hide the entire sidebar nav button area */
-    section[data-testid="stSidebar"] > div > div > button {
-        display: none !important;
-    }
-
-    /* Hide the collapsible trigger */
-    .css-1544g2n, .css-nahz7x, .css-10trblm {
-        display: none !important;
-    }
-
-    /* Balance/Result Card - Purple Theme */
-    .balance-card {
-        background: linear-gradient(135deg, rgba(168, 85, 247, 0.2) 0%, rgba(147, 51, 234, 0.15) 100%);
-        backdrop-filter: blur(20px) saturate(180%);
-        -webkit-backdrop-filter: blur(20px) saturate(180%);
-        border: 1px solid rgba(168, 85, 247, 0.4);
-        border-radius: 24px;
-        padding: 2.5rem;
-        box-shadow:
-            0 8px 32px rgba(168, 85, 247, 0.3),
-            inset 0 1px 0 rgba(255, 255, 255, 0.1);
-        position: relative;
-        overflow: hidden;
-        transition: all 0.4s ease;
-    }
-
-    .balance-card:hover {
-        border-color: rgba(192, 132, 252, 0.6);
-        box-shadow:
-            0 12px 40px rgba(168, 85, 247, 0.4),
-            inset 0 1px 0 rgba(255, 255, 255, 0.15);
-        transform: translateY(-4px);
-    }
-
-    /* Chart Container - Glass */
-    .js-plotly-plot {
-        background: rgba(255, 255, 255, 0.03) !important;
-        backdrop-filter: blur(10px);
-        border-radius: 16px !important;
-        border: 1px solid rgba(255, 255, 255, 0.08) !important;
-        padding: 1rem !important;
-    }
-
-    /* Image Container */
-    [data-testid="stImage"] {
-        border-radius: 16px;
-        overflow: hidden;
-        box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-    }
-
-    /* Custom Loading Animation */
-    .loading-container {
-        display: flex;
-        flex-direction: column;
-        align-items: center;
-        justify-content: center;
-        padding: 2rem;
-        background: rgba(255, 255, 255, 0.03);
-        backdrop-filter: blur(10px);
-        border-radius: 20px;
-        border: 1px solid rgba(255, 255, 255, 0.1);
-    }
-
-    .loading-dots {
-        display: flex;
-        gap: 8px;
-        margin-top: 1rem;
-    }
-
-    .loading-dot {
-        width: 12px;
-        height: 12px;
-        background: linear-gradient(135deg, var(--primary) 0%, var(--secondary) 100%);
-        border-radius: 50%;
-        animation: bounce 1.4s ease-in-out infinite both;
-    }
-
-    .loading-dot:nth-child(1) { animation-delay: -0.32s; }
-    .loading-dot:nth-child(2) { animation-delay: -0.16s; }
-    .loading-dot:nth-child(3) { animation-delay: 0s; }
-
-    @keyframes bounce {
-        0%, 80%, 100% {
-            transform: scale(0);
-        }
-        40% {
-            transform: scale(1);
-        }
-    }
-
-    /* Divider */
-    hr {
-        border-color: rgba(255, 255, 255, 0.08) !important;
-        margin: 2rem 0 !important;
-    }
-    
-    /* Perbaikan Visual untuk st.selectbox di Prediksi Model */
-    [data-testid="stSelectbox"] div[data-baseweb="select"] {
-        background: rgba(168, 85, 247, 0.05) !important;
-        border: 1px solid rgba(168, 85, 247, 0.3) !important;
-        border-radius: 14px !important;
-        color: #000000 !important; /* Teks SelectBox di main content harus hitam */
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1) !important;
-    }
-
-    [data-testid="stSelectbox"] div[data-baseweb="select"] input {
-        color: #000000 !important;
-    }
-    </style>
-    """
-st.markdown(load_css(), unsafe_allow_html=True)
+# CSS ada di assets/dashboard.css; dibaca dan diminify sekali per proses (lihat ui_assets.py)
+st.markdown(dashboard_css(), unsafe_allow_html=True)
 
 # --- SESSION STATE INITIALIZATION ---
-if 'prediction_history' not in st.session_state:
-    st.session_state.prediction_history = []
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+# Antrean inferensi dibagi adil per sesi (lihat scheduler.py)
+current_session.set(st.session_state.session_id)
 if 'total_predictions' not in st.session_state:
     st.session_state.total_predictions = 0
 if 'accuracy_score' not in st.session_state:
@@ -638,234 +60,164 @@ if 'model_loaded' not in st.session_state:
     st.session_state.model_loaded = False
 if 'current_page' not in st.session_state:
     st.session_state.current_page = "Dashboard"
-if 'uploaded_filename' not in st.session_state:
-    st.session_state.uploaded_filename = None
-# State untuk menyimpan hasil deteksi (agar konsisten untuk gambar yang sama)
-if 'detection_cache' not in st.session_state:
-    st.session_state.detection_cache = {}
-
-# KELAS UNTUK KLASIFIKASI (5 JENIS BERAS) DAN DETEKSI (SMOKING/NOT SMOKING)
-CLASSIFICATION_CATEGORIES = ['Arborio', 'Basmati', 'Ipsala', 'Jasmine', 'Karacadag'] 
-DETECTION_CLASSES = ['NotSmoking', 'Smoking'] 
-
-YOLO_CONF_THRESHOLD = 0.60 
-YOLO_IOU_THRESHOLD = 0.45
-
-# --- MODEL LOADING ---
+if 'history_export' not in st.session_state:
+    st.session_state.history_export = None  # (URL static, nama file, waktu dibuat) ekspor riwayat terakhir
+
+# Model dimuat per-handle saat pertama kali dipakai (lihat model_handles.py)
+start_idle_reaper()
+
+# Riwayat prediksi disimpan di SQLite, dibagi semua sesi (lihat history_store.py)
+history_store = get_history_store()
+HISTORY_TIME_RANGES = {"Last hour": 3600, "Last 24 hours": 86400, "Last 7 days": 7 * 86400, "All time": None}
+HISTORY_PAGE_SIZES = [25, 50, 100, 250]
+VIDEO_DISPLAY_FPS = 10
+WEBGL_MIN_POINTS = 200  # di atas ini grafik tren memakai Scattergl
+HISTORY_FLUSH_TIMEOUT = 1.0  # detik; render Analytics tidak menunggu writer riwayat lebih lama dari ini
+# Riwayat dibagi semua sesi: Clear hanya menghapus baris sesi ini, kecuali deployment mengizinkan hapus semua sesi
+HISTORY_ADMIN_CLEAR = os.environ.get("DASHBOARD_HISTORY_ADMIN_CLEAR", "0").lower() in ('1', 'true', 'yes')
 
-@st.cache_resource
-def load_models():
-    
-    # --- MODEL DETEKSI OBJEK (YOLO) ---
-    yolo_model_path = "model/Shafa_Laporan 4.pt" 
-    yolo_model = None
-    if ULTRALYTICS_AVAILABLE:
-        try:
-            if not os.path.exists(yolo_model_path):
-                st.error(f"FATAL: File Yolo NOT FOUND {yolo_model_path}")
-            else:
-                yolo_model = YOLO(yolo_model_path)
-                
-        except Exception as e:
-            st.error(f"Failed to load Object Detection Model (Shafa_Laporan 4.pt) as YOLO: {e}")
-    
-    # --- MODEL KLASIFIKASI (TENSORFLOW) ---
-    classifier_path = "model/Shafa_Laporan 2.h5"
-    classifier = None
-    if TENSORFLOW_AVAILABLE:
-        try:
-            if not os.path.exists(classifier_path):
-                st.error(f"FATAL: File Classifier NOT FOUND: {classifier_path}")
-            else:
-                classifier = tf.keras.models.load_model(classifier_path)
-        except Exception as e:
-            st.error(f"Failed to load Classification Model (Shafa_Laporan 2.h5): {e}")
-            
-    return yolo_model, classifier
-
-# INISIALISASI MODEL
-try:
-    yolo_model, classifier = load_models()
-except Exception:
-    yolo_model = None
-    classifier = None
-
-# --- FUNGSI INPUT FILTER ---
-
-def is_rice_image(image):
-    """Mendeteksi apakah gambar kemungkinan besar adalah objek klasifikasi (beras) berdasarkan nama file."""
-    if st.session_state.get('uploaded_filename'):
-        filename = st.session_state.uploaded_filename.lower()
-        rice_keywords = ['rice', 'grain', 'seed', 'arborio', 'basmati', 'ipsala', 'jasmine', 'karacadag']
-        if any(keyword in filename for keyword in rice_keywords):
-            return True
-    return False
-
-def is_person_image(image):
-    """Mendeteksi apakah gambar kemungkinan besar adalah objek deteksi (orang/aktivitas) berdasarkan nama file."""
-    if st.session_state.get('uploaded_filename'):
-        filename = st.session_state.uploaded_filename.lower()
-        person_keywords = ['face', 'person', 'human', 'smoke', 'vape', 'man', 'woman', 'merokok']
-        if any(keyword in filename for keyword in person_keywords):
-            return True
-    return False
-
-# --- PREDICT CLASSIFICATION (Filter Diperketat) ---
-
-def predict_classification(image, model_type="TensorFlow Model"):
-    categories = CLASSIFICATION_CATEGORIES
-    
-    # PERBAIKAN: Blokir input yang jelas-jelas ditujukan untuk Deteksi Objek
-    if is_person_image(image):
-         return {
-             'class': "INPUT TIDAK COCOK", 'confidence': 0.0, 
-             'probabilities': {cat: 0.0 for cat in categories}, 'task_type': 'Classification',
-             'error_message': "Input Ditolak: **Gambar adalah Objek Deteksi (Orang/Aktivitas)**. Pilih mode Deteksi Objek."
-         }
-        
-    # Blokir input yang bukan beras dan bukan orang (gambar random yang tidak cocok)
-    if not is_rice_image(image):
-        return {
-            'class': "INPUT TIDAK COCOK", 'confidence': 0.0, 
-            'probabilities': {cat: 0.0 for cat in categories}, 'task_type': 'Classification',
-            'error_message': "Input rejected: Not a classification. This model only support classification grain seed."
-        }
-
-    try:
-        model = classifier
-        if model is None: raise RuntimeError("Model Klasifikasi tidak dapat dimuat.")
-            
-        TARGET_SIZE = (128, 128)
-        img_resized = image.resize(TARGET_SIZE)
-        img_array = np.array(img_resized) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-        predictions = model.predict(img_array, verbose=0)
-        probabilities = predictions[0] * 100
-        
-        predicted_class = categories[np.argmax(probabilities)]
-        confidence = np.max(probabilities)
-        
-        return {
-            'class': predicted_class, 'confidence': confidence, 
-            'probabilities': dict(zip(categories, probabilities)), 'task_type': 'Classification',
-            'success_message': f"Result: **Class {predicted_class}** (Confidence: {confidence:.2f}%)"
-        }
-        
-    except Exception as e:
-        return {
-            'class': "RUNTIME ERROR", 'confidence': 0.0, 'probabilities': {cat: 0.0 for cat in categories}, 'task_type': 'Classification',
-            'error_message': f"Error Runtime Model: Model gagal memproses input. {str(e)[:100]}..."
-        }
-
-# --- PREDICT DETECTION (Filter Diperketat) ---
-
-def predict_detection(image):
-    categories = DETECTION_CLASSES 
-    
-    # PERBAIKAN: Blokir input yang jelas-jelas ditujukan untuk Klasifikasi (gambar beras)
-    if is_rice_image(image):
-         return {
-             'class': "INPUT TIDAK COCOK", 'confidence': 0.0,
-             'probabilities': {c: 0.0 for c in categories}, 'objects': [], 'total_objects': 0,
-             'task_type': 'Detection',
-             'error_message': "Input Rejected: Not a object detection. This only support Object Detection"
-         }
-    
-    # Cek apakah model Deteksi berhasil dimuat
-    if yolo_model is None:
-        return {
-            'class': "MODEL GAGAL DIMUAT", 'confidence': 0.0,
-            'probabilities': {c: 0.0 for c in categories}, 'objects': [], 'total_objects': 0,
-            'task_type': 'Detection',
-            'error_message': "The Detection Model (Shafa_Report 4.pt) failed to load as YOLO. Check the console for FATAL ERROR."
-        }
+# --- FUNGSI AUXILIARY ---
 
+def process_image(image, max_side=DECODE_MAX_SIDE):
     try:
-        # Mengatur confidence threshold menjadi 0.60 (ditingkatkan untuk mengurangi false positive)
-        results = results = yolo_model(image, conf=YOLO_CONF_THRESHOLD, iou=YOLO_IOU_THRESHOLD, verbose=False)
-        
-        detected_objects = []
-        r = results[0]
-        
-        if hasattr(r, 'boxes') and r.boxes.data.shape[0] > 0:
-            for box_data in r.boxes.data:
-                bbox = box_data[:4].tolist() 
-                confidence = float(box_data[4]) * 100
-                class_id = int(box_data[5])
-                
-                try:
-                    class_name = categories[class_id]
-                except IndexError:
-                    class_name = f"Unknown ID {class_id}"
-                    
-                detected_objects.append({'class': class_name, 'confidence': confidence, 'bbox': bbox})
+        img = decode_image(image, max_side)
+    except ImageTooLargeError as e:
+        st.error(f"Input Rejected: {e}")
+        st.stop()
+    return img
 
-        if detected_objects:
-            best_detection = max(detected_objects, key=lambda x: x['confidence'])
-            probabilities = {c: 0.0 for c in categories}
-            probabilities[best_detection['class']] = best_detection['confidence']
-            
-            result = {
-                'class': best_detection['class'], 'confidence': best_detection['confidence'],
-                'probabilities': probabilities, 'objects': detected_objects, 'total_objects': len(detected_objects),
-                'task_type': 'Detection',
-                'success_message': f"Successful Detection: **{best_detection['class']}** ({len(detected_objects)} detection object)"
-            }
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def batch_sources(uploaded_files):
+    """List (nama, file-like) dari file upload (gambar atau .zip berisi gambar); decode dilakukan oleh pipeline."""
+    sources = []
+    for uploaded in uploaded_files:
+        if uploaded.name.lower().endswith('.zip'):
+            with zipfile.ZipFile(uploaded) as zf:
+                for member in zf.infolist():
+                    name = os.path.basename(member.filename)
+                    if member.is_dir() or member.filename.startswith('__MACOSX') or not name.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    sources.append((name, io.BytesIO(zf.read(member))))
         else:
-            result = {
-                'class': "OBJEK TIDAK DITEMUKAN", 'confidence': 0.0, 'probabilities': {c: 0.0 for c in categories}, 
-                'objects': [], 'total_objects': 0, 'task_type': 'Detection',
-                'error_message': f"There is no **NotSmoking/Smoking** detected above the threshold (0.60)."
-            }
-            
-    except Exception as e:
-        result = {
-            'class': "RUNTIME ERROR", 'confidence': 0.0, 'probabilities': {c: 0.0 for c in categories}, 
-            'objects': [], 'total_objects': 0, 'task_type': 'Detection',
-            'error_message': f"Error Runtime Model YOLO: {str(e)}"
-        }
-        
-    return result
+            sources.append((uploaded.name, uploaded))
+    return sources
 
+def record_prediction(result):
+    """Simpan hasil prediksi yang berhasil ke riwayat (ditulis di background)."""
+    st.session_state.total_predictions += 1
+    history_store.append(result['task_type'], result['class'], result['confidence'],
+                         objects_detected=result.get('total_objects'), session_id=st.session_state.session_id)
 
-# --- FUNGSI AUXILIARY ---
-
-def draw_bounding_boxes(image, detections):
-    # Fungsionalitas plotting dipindahkan ke main block menggunakan results[0].plot()
-    pass 
+def run_video_detection(source, target_fps):
+    """Deteksi video/kamera di halaman: tampilkan frame dengan box, catat frame terdeteksi ke riwayat.
 
-def predict_image(image, task_type, model_type):
-    if task_type == "Image Classification (CNN)r": return predict_classification(image, model_type)
-    elif task_type == "Object Detection (YOLO)": return predict_detection(image)
-    else: return predict_classification(image, model_type) 
-
-def process_image(image):
-    img = Image.open(image); img = img.convert('RGB'); st.session_state.uploaded_filename = image.name 
-    return img
+    `source` = file upload (disalin ke file sementara untuk OpenCV) atau indeks kamera.
+    Tombol lain (mis. Stop) memicu rerun yang menghentikan loop ini.
+    """
+    video_path = None
+    if not isinstance(source, int):
+        suffix = os.path.splitext(source.name)[1]
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+            for chunk in iter(lambda: source.read(1 << 20), b''):
+                f.write(chunk)
+            video_path = f.name
+    try:
+        detector = VideoDetector(video_path if video_path else source, target_fps)
+    except (OSError, ImportError) as e:
+        st.error(f"Cannot open video: {e}")
+        if video_path:
+            os.unlink(video_path)
+        return
+
+    st.button("Stop", key="stop_video")
+    frame_slot, status_slot = st.empty(), st.empty()
+    progress = st.progress(0) if detector.reader.frame_count else None
+    t0 = last_render = time.perf_counter()
+    n_frames = 0
+    try:
+        for item in detector:
+            n_frames += 1
+            if item['detected']:
+                summary = summarize(item['objects'])
+                if summary is not None:
+                    record_prediction(summary)
+            # Frame dikirim ke browser paling banyak VIDEO_DISPLAY_FPS kali per detik; box di antara sampel dari tracker
+            now = time.perf_counter()
+            if now - last_render >= 1.0 / VIDEO_DISPLAY_FPS:
+                last_render = now
+                frame_slot.image(draw_bounding_boxes(Image.fromarray(item['frame']), item['objects']),
+                                 width='stretch', caption=f"Frame {item['frame_index']}")
+                elapsed = now - t0
+                status_slot.caption(f"{n_frames} frames, {n_frames / max(elapsed, 1e-9):.1f} fps, YOLO every "
+                                    f"{item['detect_every']} frames, {len(item['objects'])} objects, {item['dropped']} dropped")
+                if progress is not None:
+                    progress.progress(min(1.0, (item['frame_index'] + 1) / detector.reader.frame_count))
+    except VideoDetectionError as e:
+        st.error(f"Detection stopped after {n_frames} frames: {e}")
+        return
+    finally:
+        detector.close()
+        if video_path:
+            os.unlink(video_path)
+    st.success(f"Done: {n_frames} frames, {detector.detections_run} YOLO runs.")
 
 # --- FUNGSI CHART ---
 
-def create_history_chart(history):
-    if not history: return None
-    df = pd.DataFrame(history); df_filtered = df[df['task_type'] == 'Classification'].copy()
-    if df_filtered.empty: return None
+def format_history_page(df):
+    """Kolom tampilan tabel riwayat dengan operasi kolom (tanpa apply per baris)."""
+    local_tz = datetime.now().astimezone().tzinfo
+    df = df.assign(timestamp=pd.to_datetime(df['ts'], unit='s', utc=True).dt.tz_convert(local_tz).dt.strftime('%Y-%m-%d %H:%M:%S'))
+    if df['objects_detected'].isna().all():
+        return df[['timestamp', 'task_type', 'class', 'confidence']].rename(columns={'task_type': 'Mode', 'class': 'Class'})
+    label = df['class'] + " (" + df['confidence'].map('{:.2f}'.format) + "%)"
+    objects = df['objects_detected'].fillna(0).astype(int).astype(str)
+    df['Result'] = np.where(df['task_type'] == 'Classification', "Class: " + label, "Object: " + label + " [" + objects + " items]")
+    return df[['timestamp', 'task_type', 'Result']].rename(columns={'task_type': 'Mode'})
+
+def write_history_export(out, fmt, history_filter):
+    """Tulis riwayat yang lolos filter ke file `out`, dibaca dari SQLite per chunk."""
+    if fmt == "Parquet":
+        history_store.write_parquet(out, **history_filter)
+    else:
+        for chunk in history_store.iter_csv(**history_filter):
+            out.write(chunk)
+
+def export_history(fmt, history_filter):
+    """Ekspor ke file sementara (posisi di awal), untuk download_button saat static serving nonaktif."""
+    out = tempfile.TemporaryFile()
+    write_history_export(out, fmt, history_filter)
+    out.seek(0)
+    return out
+
+@timed('analytics.trend_query')
+def load_confidence_trend(n_points, **history_filter):
+    """(ts, confidence) untuk grafik tren: titik mentah bila sedikit, selain itu rata-rata per menit di-LTTB."""
+    if n_points <= TREND_POINT_BUDGET:
+        df = history_store.query(**history_filter)
+        return df['ts'].to_numpy(), df['confidence'].to_numpy()
+    series = history_store.minute_series(**history_filter)
+    return lttb([row[0] for row in series], [row[2] for row in series], TREND_POINT_BUDGET)
+
+@timed('analytics.chart')
+def create_history_chart(ts, confidence):
+    if len(ts) == 0: return None
+    timestamps = pd.to_datetime(pd.Series(ts).map(datetime.fromtimestamp))
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df_filtered['timestamp'], y=df_filtered['confidence'], mode='lines+markers', name='Confidence Trend', line=dict(color='rgba(168, 85, 247, 0.8)', width=4, shape='spline', smoothing=0.3), marker=dict(size=12, color='rgba(192, 132, 252, 0.9)', line=dict(width=2, color='rgba(255, 255, 255, 0.3)'), symbol='circle'), fill='tonexty', fillcolor='rgba(168, 85, 247, 0.15)', hovertemplate='<b>Time:</b> %{x}<br><b>Confidence:</b> %{y:.1f}%<extra></extra>'))
-    fig.add_trace(go.Scatter(x=df_filtered['timestamp'], y=df_filtered['confidence'], mode='lines', fill='tozeroy', fillcolor='rgba(168, 85, 247, 0.08)', line=dict(color='rgba(168, 85, 247, 0.3)', width=1), showlegend=False, hoverinfo='skip'))
+    if len(ts) <= WEBGL_MIN_POINTS:
+        fig.add_trace(go.Scatter(x=timestamps, y=confidence, mode='lines+markers', name='Confidence Trend', line=dict(color='rgba(168, 85, 247, 0.8)', width=4, shape='spline', smoothing=0.3), marker=dict(size=12, color='rgba(192, 132, 252, 0.9)', line=dict(width=2, color='rgba(255, 255, 255, 0.3)'), symbol='circle'), fill='tonexty', fillcolor='rgba(168, 85, 247, 0.15)', hovertemplate='<b>Time:</b> %{x}<br><b>Confidence:</b> %{y:.1f}%<extra></extra>'))
+        fig.add_trace(go.Scatter(x=timestamps, y=confidence, mode='lines', fill='tozeroy', fillcolor='rgba(168, 85, 247, 0.08)', line=dict(color='rgba(168, 85, 247, 0.3)', width=1), showlegend=False, hoverinfo='skip'))
+    else:
+        # Deret panjang: trace WebGL tanpa spline (spline dihitung per titik di SVG)
+        fig.add_trace(go.Scattergl(x=timestamps, y=confidence, mode='lines+markers', name='Confidence Trend', line=dict(color='rgba(168, 85, 247, 0.8)', width=2), marker=dict(size=4, color='rgba(192, 132, 252, 0.9)'), fill='tozeroy', fillcolor='rgba(168, 85, 247, 0.08)', hovertemplate='<b>Time:</b> %{x}<br><b>Confidence:</b> %{y:.1f}%<extra></extra>'))
     fig.update_layout(title={'text': 'Confidence History', 'font': {'size': 18, 'color': '#FFFFFF', 'family': 'DM Sans'}, 'x': 0.5, 'xanchor': 'center'}, xaxis_title='Time', yaxis_title='Confidence (%)', font=dict(size=12, color='#B4B4B4', family='DM Sans'), plot_bgcolor='rgba(255, 255, 255, 0.03)', paper_bgcolor='rgba(0,0,0,0)', height=450, margin=dict(l=20, r=20, t=80, b=20), xaxis=dict(gridcolor='rgba(168, 85, 247, 0.2)', linecolor='rgba(255, 255, 255, 0.1)', tickfont=dict(color='#d8b4fe', family='DM Sans')), yaxis=dict(gridcolor='rgba(168, 85, 247, 0.2)', linecolor='rgba(255, 255, 255, 0.1)', tickfont=dict(color='#d8b4fe', family='DM Sans')), showlegend=False, hovermode='x unified')
     return fig
 
 # --- STREAMLIT SIDEBAR ---
 with st.sidebar:
-    # Load and encode logo
-    import base64
-    logo_path = "assets/Logo Dashboard.png"
-    # Pastikan os diimpor di bagian atas file utama (asumsi sudah ada)
-    # import os 
-    if os.path.exists(logo_path):
-        with open(logo_path, "rb") as f:
-            logo_data = base64.b64encode(f.read()).decode()
-        logo_html = f'<img src="data:image/png;base64,{logo_data}" style="width: 70px; height: 70px; z-index: 1;">'
+    # Logo disiapkan sekali per proses (URL static atau data URI kecil)
+    if logo_src():
+        logo_html = f'<img src="{logo_src()}" style="width: 70px; height: 70px; z-index: 1;">'
     else:
         logo_html = '<span style="font-size: 2rem; font-weight: 700; color: white; z-index: 1;">🔬</span>'
 
@@ -922,13 +274,8 @@ with st.sidebar:
 
 # 1. Dashboard
 if st.session_state.current_page == "Dashboard":
-    # Load and encode logo
-    import base64
-    logo_path = "assets/Logo Dashboard.png"
-    if os.path.exists(logo_path):
-        with open(logo_path, "rb") as f:
-            logo_data = base64.b64encode(f.read()).decode()
-        logo_html = f'<img src="data:image/png;base64,{logo_data}" style="width: 80px; height: 80px; z-index: 1;">'
+    if logo_src():
+        logo_html = f'<img src="{logo_src()}" style="width: 80px; height: 80px; z-index: 1;">'
     else:
         logo_html = '<span style="font-size: 2rem;">🔬</span>'
 
@@ -990,6 +337,8 @@ elif st.session_state.current_page == "Model Prediction":
     with col_mode_only:
         task_type_select = st.selectbox("Select Mode:", ["Image Classification (CNN)", "Object Detection (YOLO)"], label_visibility="collapsed", key="task_type_select")
         st.session_state.task_type = task_type_select
+        # Mulai memuat model untuk mode yang dipilih di background (no-op jika sudah dimuat)
+        (yolo_handle if task_type_select == "Object Detection (YOLO)" else classifier_handle).preload()
         
         if st.session_state.task_type == "Image Classification (CNN)":
             model_type_select = "TensorFlow Model" 
@@ -1002,37 +351,90 @@ elif st.session_state.current_page == "Model Prediction":
 
     st.markdown("""<div style="max-width: 600px; margin: 0 auto 2rem auto;">""", unsafe_allow_html=True)
     
-    uploaded_file = st.file_uploader("Upload Image", type=['png', 'jpg', 'jpeg'], help="Supported formats: PNG, JPG, JPEG (max 200MB)", label_visibility="collapsed")
+    video_mode = st.session_state.task_type == "Object Detection (YOLO)" and st.toggle("Video mode (video file / camera)", key="video_mode")
+    batch_mode = not video_mode and st.toggle("Batch mode (multiple images / .zip)", key="batch_mode")
+    uploaded_files = None
+    if video_mode:
+        video_source = st.radio("Video source", ["Video file", "Camera"], horizontal=True, key="video_source")
+        if video_source == "Video file":
+            uploaded_video = st.file_uploader("Upload Video", type=['mp4', 'avi', 'mov', 'mkv'], help="Supported formats: MP4, AVI, MOV, MKV", label_visibility="collapsed", key="video_uploader")
+        else:
+            uploaded_video = None
+            camera_index = st.number_input("Camera device index", min_value=0, max_value=16, value=0, step=1, key="camera_index")
+        target_fps = st.slider("Target detection FPS", min_value=1, max_value=30, value=5, key="target_fps")
+        uploaded_file = None
+    elif batch_mode:
+        uploaded_files = st.file_uploader("Upload Images", type=['png', 'jpg', 'jpeg', 'zip'], accept_multiple_files=True, help="Supported formats: PNG, JPG, JPEG or a ZIP of images (max 200MB)", label_visibility="collapsed", key="batch_uploader")
+        batch_size = st.number_input("Batch size", min_value=1, max_value=256, value=BATCH_SIZE, step=1, key="batch_size")
+        uploaded_file = None
+    else:
+        uploaded_file = st.file_uploader("Upload Image", type=['png', 'jpg', 'jpeg'], help="Supported formats: PNG, JPG, JPEG (max 200MB)", label_visibility="collapsed")
+    # Deteksi bertile: gambar didecode lebih besar lalu dipotong menjadi tile (lihat tiling.py)
+    tiled_mode = (st.session_state.task_type == "Object Detection (YOLO)" and not video_mode and not batch_mode
+                  and st.toggle("Tiled inference (small objects in high-resolution images)", key="tiled_mode"))
 
     st.markdown("</div>", unsafe_allow_html=True)
 
-    if uploaded_file is not None:
-        image = process_image(uploaded_file)
+    if video_mode:
+        if video_source == "Video file" and uploaded_video is None:
+            st.info("Upload a video to start detection.")
+        elif st.button("Start detection", key="start_video"):
+            run_video_detection(uploaded_video if video_source == "Video file" else int(camera_index), target_fps)
+
+    elif batch_mode and uploaded_files:
+        sources = batch_sources(uploaded_files)
+        pipeline_task = 'detect' if st.session_state.task_type == "Object Detection (YOLO)" else 'classify'
+
+        with st.spinner(f"Processing {len(sources)} images with mode {st.session_state.task_type}..."):
+            # Decode, inferensi dan pembentukan hasil berjalan tumpang tindih (lihat pipeline.py)
+            batch_items = InferencePipeline(pipeline_task, batch_size=int(batch_size)).predict(sources)
+        for item in batch_items:
+            if item.error:
+                st.warning(f"Skipped {item.name}: {item.error}")
+        batch_items = [item for item in batch_items if not item.error]
+        batch_names = [item.name for item in batch_items]
+        batch_results = [item.result for item in batch_items]
+
+        rows = []
+        for name, result in zip(batch_names, batch_results):
+            row = {'File': name, 'Class': result['class'], 'Confidence (%)': round(float(result['confidence']), 2)}
+            if result['task_type'] == 'Detection':
+                row['Objects'] = result['total_objects']
+            row['Reused'] = bool(result.get('reused'))
+            row['Status'] = "OK" if 'error_message' not in result else ("REJECTED" if result['class'] == "INPUT TIDAK COCOK" else "BUSY" if result.get('retry') else "ERROR")
+            rows.append(row)
+
+        # Riwayat hanya ditambahkan sekali per kumpulan file (bukan setiap rerun)
+        batch_signature = (st.session_state.task_type, tuple((f.name, f.size) for f in uploaded_files))
+        if st.session_state.get('last_batch_signature') != batch_signature:
+            st.session_state.last_batch_signature = batch_signature
+            for result in batch_results:
+                if 'error_message' in result: continue
+                record_prediction(result)
+
+        n_ok = sum(1 for row in rows if row['Status'] == "OK")
+        st.markdown(f'<h3 style="color: #000000; margin-bottom: 1rem;">Batch Result: {n_ok}/{len(rows)} images predicted</h3>', unsafe_allow_html=True)
+        st.dataframe(pd.DataFrame(rows), width='stretch', hide_index=True)
+
+    elif uploaded_file is not None:
+        image = process_image(uploaded_file, TILED_DECODE_MAX_SIDE if tiled_mode else DECODE_MAX_SIDE)
 
         col1, col2 = st.columns([1, 1], gap="large")
 
         with col1:
             st.markdown("""<div style="background: rgba(168, 85, 247, 0.1); border: 2px solid rgba(168, 85, 247, 0.4); border-radius: 20px; padding: 1rem; overflow: hidden;">""", unsafe_allow_html=True)
             
-            result = predict_image(image, st.session_state.task_type, model_type_select)
+            result = predict_image(image, st.session_state.task_type, model_type_select, tiled=tiled_mode)
             
             # Tampilkan Bounding Box jika mode Deteksi dan ada objek
             if st.session_state.task_type == "Object Detection (YOLO)" and result.get('objects') and result.get('total_objects', 0) > 0:
-                # Menggunakan plot() dari Ultralytics untuk menggambar kotak
-                if yolo_model is not None:
-                    try:
-                        # Jalankan ulang inferensi untuk mendapatkan objek plot
-                        results = yolo_model(image, conf=0.25, iou=0.45, verbose=False)
-                        # Ambil numpy array RGB dari plot
-                        result_img_array = results[0].plot() 
-                        # Konversi kembali ke PIL Image
-                        image_with_boxes = Image.fromarray(result_img_array)
-                        st.image(image_with_boxes, width='stretch', caption=f"Image with Detection: {uploaded_file.name}")
-                    except Exception as e:
-                        st.error(f"Error menggambar bounding box: {e}")
-                        st.image(image, width='stretch', caption=f"Uploaded Image (Error Plotting): {uploaded_file.name}")
-                else:
-                    st.image(image, width='stretch', caption=f"Uploaded Image: {uploaded_file.name}")
+                # Gambar box dari hasil predict_detection (tanpa menjalankan YOLO kedua kali)
+                try:
+                    image_with_boxes = draw_bounding_boxes(image, result['objects'])
+                    st.image(image_with_boxes, width='stretch', caption=f"Image with Detection: {uploaded_file.name}")
+                except Exception as e:
+                    st.error(f"Error menggambar bounding box: {e}")
+                    st.image(image, width='stretch', caption=f"Uploaded Image (Error Plotting): {uploaded_file.name}")
             else:
                 st.image(image, width='stretch', caption=f"Uploaded Image: {uploaded_file.name}")
                 
@@ -1042,33 +444,34 @@ elif st.session_state.current_page == "Model Prediction":
             st.markdown("""<div style="background: rgba(168, 85, 247, 0.1); border: 2px solid rgba(168, 85, 247, 0.4); border-radius: 20px; padding: 1rem; overflow: hidden;">""", unsafe_allow_html=True)
 
             with st.spinner(f"Processing images with mode {st.session_state.task_type}..."):
-                progress_bar = st.progress(0)
-                for i in range(100):
-                    time.sleep(0.01)
-                    progress_bar.progress(i + 1)
+                with span('ui.progress_bar'):
+                    progress_bar = st.progress(0)
+                    for i in range(100):
+                        time.sleep(0.01)
+                        progress_bar.progress(i + 1)
                 
                 if 'error_message' in result:
                     st.error(result['error_message'])
-                    status_text = "REJECTED" if result['class'] == "INPUT TIDAK COCOK" else "RUNTIME ERROR"
+                    status_text = "REJECTED" if result['class'] == "INPUT TIDAK COCOK" else "BUSY, RETRY" if result.get('retry') else "RUNTIME ERROR"
                     color_start = "#ef4444"; color_end = "#dc2626"
                     st.markdown(f"""<div style="text-align: center; background: linear-gradient(135deg, {color_start} 0%, {color_end} 100%); padding: 1rem; border-radius: 14px; box-shadow: 0 4px 15px rgba(239, 68, 68, 0.5); margin-top: 1rem;">
                             <p style="color: white; font-weight: 700; margin: 0; font-size: 1.5rem;">STATUS: {status_text}</p></div>""", unsafe_allow_html=True)
                     st.markdown("---")
                     
                 else:
-                    st.session_state.total_predictions += 1
+                    record_prediction(result)
                     st.markdown('<h3 style="color: #000000; margin-bottom: 1rem;">Result Prediction:</h3>', unsafe_allow_html=True)
 
                     if st.session_state.task_type == "Image Classification (CNN)":
-                        st.session_state.prediction_history.append({'timestamp': datetime.now().strftime('%H:%M:%S'), 'class': result['class'], 'confidence': result['confidence'], 'task_type': result['task_type']})
                         st.markdown(f"""<div style="text-align: center; background: linear-gradient(135deg, #a855f7 0%, #9333ea 100%); padding: 1rem; border-radius: 14px; box-shadow: 0 4px 15px rgba(168, 85, 247, 0.5);">
                                 <p style="color: white; font-weight: 700; margin: 0; font-size: 1.5rem;">Class Prediction: <span style="font-size: 2rem;">{result['class']}</span></p>
                                 <p style="color: white; font-weight: 500; margin: 0; font-size: 1rem;">Confidence: {result['confidence']:.2f}%</p></div>""", unsafe_allow_html=True)
                         st.success(result['success_message']) 
+                        if result.get('reused'):
+                            st.caption(f"Reused the result of a near-duplicate image (Hamming distance {result['reused']['distance']}); the model was not run")
                         st.markdown("---")
                         
                     elif st.session_state.task_type == "Object Detection (YOLO)":
-                        st.session_state.prediction_history.append({'timestamp': datetime.now().strftime('%H:%M:%S'), 'class': result['class'], 'confidence': result['confidence'], 'task_type': result['task_type'], 'objects_detected': result['total_objects']})
                         if result['total_objects'] > 0:
                             color_start = "#00e676" if result['class'] == 'NotSmoking' else "#ffc400"
                             color_end = "#00c853" if result['class'] == 'NotSmoking' else "#ff9800"
@@ -1079,6 +482,10 @@ elif st.session_state.current_page == "Model Prediction":
                                 <p style="color: white; font-weight: 700; margin: 0; font-size: 1.5rem;"> <span style="font-size: 2rem;">{result['class']}</span></p>
                                 <p style="color: white; font-weight: 500; margin: 0; font-size: 1rem;">Confidence: {result['confidence']:.2f}% (number of objects: {result['total_objects']})</p></div>""", unsafe_allow_html=True)
                         st.success(result['success_message'])
+                        if result.get('reused'):
+                            st.caption(f"Reused the result of a near-duplicate image (Hamming distance {result['reused']['distance']}); the model was not run")
+                        if 'tiles' in result:
+                            st.caption(f"Tiled inference: {result['tiles']['run']} tiles + full image, {result['tiles']['skipped']} low-activity tiles skipped")
                         st.markdown("---")
 
             st.markdown("</div>", unsafe_allow_html=True)
@@ -1095,19 +502,52 @@ elif st.session_state.current_page == "Model Prediction":
 # 3. Analytics Page
 elif st.session_state.current_page == "Analytics":
     st.markdown("# Predictive Analytics")
+    cache_stats = result_cache.stats()
+    st.caption(f"Inference cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+               f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['entries']} entries, {cache_stats['bytes'] / 1024:.0f} KB)")
+    dup_stats = near_duplicate_index.stats()
+    st.caption(f"Near-duplicate reuse: {dup_stats['hits']} reused / {dup_stats['misses']} new "
+               f"({dup_stats['hit_rate']:.0%}, {dup_stats['entries']} indexed, max distance {dup_stats['max_distance']})")
     st.markdown("---")
 
-    df_history_classification = pd.DataFrame([h for h in st.session_state.prediction_history if h['task_type'] == 'Classification'])
+    # Filter diterapkan di SQLite (WHERE ts / task_type / session_id memakai index)
+    col_range, col_task, col_scope = st.columns(3)
+    with col_range:
+        time_range = st.selectbox("Time range", list(HISTORY_TIME_RANGES), index=len(HISTORY_TIME_RANGES) - 1)
+    with col_task:
+        task_filter = st.selectbox("Task", ["All", "Classification", "Detection"])
+    with col_scope:
+        scope = st.selectbox("Scope", ["This session", "All sessions"])
+    range_seconds = HISTORY_TIME_RANGES[time_range]
+    history_filter = {
+        'start': time.time() - range_seconds if range_seconds else None,
+        'task_type': None if task_filter == "All" else task_filter,
+        'session_id': st.session_state.session_id if scope == "This session" else None,
+    }
+    # Tampilkan juga prediksi terakhir yang masih di antrean writer (tanpa memblokir render terlalu lama)
+    history_store.flush(timeout=HISTORY_FLUSH_TIMEOUT)
+
+    # Statistik dari agregat per menit yang diperbarui saat prediksi ditulis (tidak memindai riwayat)
+    classification_filter = {**history_filter, 'task_type': 'Classification'}
+    class_stats = history_store.class_stats(**classification_filter) if task_filter != "Detection" else {}
+
+    if class_stats:
+        n_classified = sum(n for n, _, _ in class_stats.values())
+        mean_confidence = sum(n * mean for n, mean, _ in class_stats.values()) / n_classified
+        # Varians gabungan: rata-rata varians kelas + varians antar rata-rata kelas
+        var_confidence = sum(n * (var + (mean - mean_confidence) ** 2) for n, mean, var in class_stats.values()) / n_classified
+        col_n, col_mean, col_std = st.columns(3)
+        col_n.metric("Classifications", f"{n_classified:,}")
+        col_mean.metric("Mean confidence", f"{mean_confidence:.2f}%")
+        col_std.metric("Confidence std. dev.", f"{var_confidence ** 0.5:.2f}")
 
-    if not df_history_classification.empty:
         col1, col2 = st.columns([1, 1])
 
         with col1:
             st.markdown("### Class Distribution")
-            class_counts = df_history_classification['class'].value_counts()
             fig_pie = px.pie(
-                values=class_counts.values,
-                names=class_counts.index,
+                values=[n for n, _, _ in class_stats.values()],
+                names=list(class_stats.keys()),
                 title="Prediction Distribution (Classification)",
                 color_discrete_sequence=['#a855f7', '#c084fc', '#9333ea', '#d8b4fe', '#7c3aed']
             )
@@ -1121,39 +561,91 @@ elif st.session_state.current_page == "Analytics":
 
         with col2:
             st.markdown("### Trend Confidence of All Model")
-            fig_line = create_history_chart(st.session_state.prediction_history)
+            fig_line = create_history_chart(*load_confidence_trend(n_classified, **classification_filter))
             if fig_line:
                 st.plotly_chart(fig_line, use_container_width=True)
 
         st.markdown("---")
 
+    total_rows = history_store.count(**history_filter)
+    if total_rows:
         st.markdown("### Prediction History")
-        # Gabungkan semua data, termasuk deteksi
-        df_all_history = pd.DataFrame(st.session_state.prediction_history)
-        
-        # Sederhanakan tampilan untuk riwayat
-        if 'objects_detected' in df_all_history.columns:
-            df_all_history['Result'] = df_all_history.apply(
-                lambda row: f"Class: {row['class']} ({row['confidence']:.2f}%)" if row['task_type'] == 'Classification' 
-                else f"Object: {row['class']} ({row['confidence']:.2f}%) [{row['objects_detected']} items]", axis=1
-            )
-            df_display = df_all_history[['timestamp', 'task_type', 'Result']].rename(columns={'task_type': 'Mode'})
-        else:
-            df_display = df_all_history[['timestamp', 'task_type', 'class', 'confidence']].rename(columns={'task_type': 'Mode', 'class': 'Class'})
-
+        # Hanya halaman yang terlihat yang di-query dan dikirim ke browser (baris terbaru dulu)
+        col_page_size, col_page = st.columns([1, 1])
+        with col_page_size:
+            page_size = st.selectbox("Rows per page", HISTORY_PAGE_SIZES, index=1)
+        n_pages = max(1, -(-total_rows // page_size))
+        with col_page:
+            page = int(st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1))
+
+        with span('analytics.dataframe'):
+            df_display = format_history_page(history_store.query(
+                **history_filter, limit=page_size, offset=(page - 1) * page_size, newest_first=True))
+
+        st.caption(f"Page {page} of {n_pages} ({total_rows:,} predictions)")
         st.dataframe(
             df_display,
             width='stretch',
             hide_index=True
         )
 
-        if st.button("Clear History"):
-            st.session_state.prediction_history = []
+        # Ekspor dibuat hanya saat diminta, dibaca dari SQLite per chunk ke static/exports/ dan diunduh
+        # lewat link (disajikan dari disk), sehingga tidak dimuat ke memori maupun dikirim ulang tiap rerun
+        col_format, col_export = st.columns([1, 1])
+        with col_format:
+            export_format = st.radio("Export format", ["CSV", "Parquet"], horizontal=True)
+        with col_export:
+            if st.button("Prepare export"):
+                extension = 'parquet' if export_format == "Parquet" else 'csv'
+                file_name = f"prediction_history.{extension}"
+                try:
+                    with span('analytics.export'):
+                        if static_serving_enabled():
+                            url = publish_export(lambda out: write_history_export(out, export_format, history_filter), extension)
+                            st.session_state.history_export = (url, file_name, time.time())
+                        else:
+                            with export_history(export_format, history_filter) as export_file:
+                                st.download_button(f"Download {export_format}", export_file, file_name=file_name,
+                                                   mime='application/vnd.apache.parquet' if extension == 'parquet' else 'text/csv')
+                except ImportError:
+                    st.error("Parquet export needs `pyarrow` (pip install pyarrow).")
+                except OSError as e:
+                    st.error(f"Cannot write export: {e}")
+            if st.session_state.history_export is not None and time.time() - st.session_state.history_export[2] < EXPORT_MAX_AGE:
+                url, file_name, _ = st.session_state.history_export
+                st.markdown(f'<a href="{url}" download="{file_name}">Download {file_name}</a>', unsafe_allow_html=True)
+
+        clear_all_sessions = HISTORY_ADMIN_CLEAR and scope == "All sessions"
+        clear_filter = history_filter if clear_all_sessions else {**history_filter, 'session_id': st.session_state.session_id}
+        if st.button("Clear History (all sessions)" if clear_all_sessions else "Clear History",
+                     help=None if clear_all_sessions else "Deletes only this session's predictions in the selected range."):
+            history_store.clear(**clear_filter)
             st.session_state.total_predictions = 0
             st.rerun()
 
     else:
-        st.info("No **Classification** prediction data is available. Visit the Model Prediction page to get started.")
+        st.info("No prediction data is available for this filter. Visit the Model Prediction page to get started.")
+
+    st.markdown("---")
+
+    # Waktu per tahap (decode, preprocess, inferensi, parsing, render, ...) untuk seluruh proses
+    st.markdown("### Performance")
+    perf_stats = stage_metrics.snapshot()
+    if perf_stats:
+        df_perf = pd.DataFrame([
+            {'Stage': stage, 'Calls': m['count'], 'Mean (ms)': m['mean_ms'], 'p50 (ms)': m['p50_ms'],
+             'p95 (ms)': m['p95_ms'], 'p99 (ms)': m['p99_ms'], 'Max (ms)': m['max_ms'], 'Total (s)': m['sum_s']}
+            for stage, m in perf_stats.items()
+        ]).sort_values('Total (s)', ascending=False)
+        st.dataframe(df_perf.round(2), width='stretch', hide_index=True)
+
+        col_json, col_prom = st.columns(2)
+        with col_json:
+            st.download_button("Download metrics (JSON)", stage_metrics.to_json(), file_name="stage_metrics.json", mime="application/json")
+        with col_prom:
+            st.download_button("Download metrics (Prometheus)", stage_metrics.to_prometheus(), file_name="stage_metrics.prom", mime="text/plain")
+    else:
+        st.info("No stage timings recorded yet.")
 
 # 4. About page
 elif st.session_state.current_page == "About":
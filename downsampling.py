@@ -0,0 +1,31 @@
+import numpy as np
+
+# --- DOWNSAMPLING GRAFIK (LTTB) ---
+# Largest-Triangle-Three-Buckets (Steinarsson, 2013): pilih `threshold` titik yang
+# mempertahankan bentuk visual deret waktu (puncak dan lembah tetap terlihat),
+# sehingga grafik tren selalu menggambar jumlah titik tetap berapa pun panjang riwayat.
+
+TREND_POINT_BUDGET = 500
+
+
+def lttb(x, y, threshold=TREND_POINT_BUDGET):
+    """Downsample deret (x, y) terurut ke paling banyak `threshold` titik. Mengembalikan (x, y) numpy."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        # Titik rata-rata bucket berikutnya sebagai simpul ketiga segitiga
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return x[selected], y[selected]
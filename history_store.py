@@ -0,0 +1,288 @@
+import csv
+import io
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+# --- RIWAYAT PREDIKSI (SQLITE) ---
+# Menggantikan list dict di st.session_state: riwayat disimpan di SQLite (WAL)
+# dengan index pada timestamp / task / class, sehingga bertahan setelah restart
+# dan halaman Analytics cukup meng-query baris yang dibutuhkan (filter di SQL).
+# Penulisan dikumpulkan oleh satu writer thread, tidak di thread render.
+# Setiap baris juga menambah agregat per menit (jumlah, sum dan sum kuadrat
+# confidence per session/task/class) dengan satu UPSERT, sehingga statistik
+# Analytics dihitung dari bucket menit, bukan dari seluruh riwayat.
+
+HISTORY_DB_PATH = os.environ.get("DASHBOARD_HISTORY_DB", "data/prediction_history.sqlite3")
+FLUSH_INTERVAL = 0.5  # detik
+WRITE_BATCH_SIZE = 256
+EXPORT_CHUNK_ROWS = 10000
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('ts', 'session_id', 'task_type', 'class', 'confidence', 'objects_detected')
+EXPORT_COLUMNS = ('timestamp',) + COLUMNS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    session_id TEXT,
+    task_type TEXT NOT NULL,
+    class TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    objects_detected INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_predictions_ts ON predictions (ts);
+CREATE INDEX IF NOT EXISTS ix_predictions_task_ts ON predictions (task_type, ts);
+CREATE INDEX IF NOT EXISTS ix_predictions_class ON predictions (class);
+CREATE TABLE IF NOT EXISTS minute_stats (
+    minute INTEGER NOT NULL,
+    session_id TEXT NOT NULL,
+    task_type TEXT NOT NULL,
+    class TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    conf_sum REAL NOT NULL,
+    conf_sumsq REAL NOT NULL,
+    PRIMARY KEY (minute, session_id, task_type, class)
+);
+CREATE INDEX IF NOT EXISTS ix_minute_stats_task_minute ON minute_stats (task_type, minute);
+"""
+
+
+_UPSERT_STATS = """
+INSERT INTO minute_stats VALUES (?, ?, ?, ?, 1, ?, ?)
+ON CONFLICT (minute, session_id, task_type, class) DO UPDATE SET
+    n = n + 1, conf_sum = conf_sum + excluded.conf_sum, conf_sumsq = conf_sumsq + excluded.conf_sumsq
+"""
+
+_REBUILD_STATS = """
+INSERT INTO minute_stats
+SELECT CAST(ts / 60 AS INTEGER) * 60, COALESCE(session_id, ''), task_type, class,
+       COUNT(*), SUM(confidence), SUM(confidence * confidence)
+FROM predictions{where}
+GROUP BY 1, 2, 3, 4
+"""
+
+
+def _minute(ts):
+    return int(ts // 60) * 60
+
+
+def _bucket_range(start, end):
+    """Perlebar [start, end) ke batas menit penuh."""
+    return None if start is None else _minute(start), None if end is None else _minute(end) + 60
+
+
+def _where(start=None, end=None, task_type=None, session_id=None, ts_column='ts'):
+    """Klausa WHERE + parameter untuk filter yang didorong ke SQLite."""
+    clauses, params = [], []
+    if start is not None:
+        clauses.append(f"{ts_column} >= ?"); params.append(start)
+    if end is not None:
+        clauses.append(f"{ts_column} < ?"); params.append(end)
+    if task_type is not None:
+        clauses.append("task_type = ?"); params.append(task_type)
+    if session_id is not None:
+        clauses.append("session_id = ?"); params.append(session_id)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DB_PATH, flush_interval=FLUSH_INTERVAL, batch_size=WRITE_BATCH_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._session() as conn:
+            conn.executescript(_SCHEMA)
+            if not conn.execute("SELECT 1 FROM minute_stats LIMIT 1").fetchone():
+                # Database dari versi sebelum agregat per menit: isi sekali dari tabel mentah
+                conn.execute(_REBUILD_STATS.format(where=""))
+        self._queue = queue.Queue()
+        self._write_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _session(self):
+        """Koneksi singkat: commit / rollback lalu selalu ditutup (`with conn` saja tidak menutup koneksi)."""
+        with closing(self._connect()) as conn, conn:
+            yield conn
+
+    # --- TULIS ---
+
+    def append(self, task_type, cls, confidence, objects_detected=None, session_id=None, ts=None):
+        """Antrekan satu baris riwayat (tidak memblokir; ditulis oleh writer thread)."""
+        self._queue.put((time.time() if ts is None else ts, session_id, task_type, cls, float(confidence),
+                         None if objects_detected is None else int(objects_detected)))
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            rows = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                with self._write_lock, conn:
+                    conn.executemany(
+                        f"INSERT INTO predictions ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)", rows)
+                    conn.executemany(_UPSERT_STATS, [
+                        (_minute(ts), session_id or '', task_type, cls, confidence, confidence * confidence)
+                        for ts, session_id, task_type, cls, confidence, _ in rows
+                    ])
+            except Exception:
+                # Batch ini hilang, tapi writer tetap hidup agar flush() dan penulisan berikutnya tidak macet
+                logger.exception("Failed to write %d history rows to %s", len(rows), self.path)
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """Tunggu sampai semua baris yang diantrekan sudah ditulis.
+
+        Dengan `timeout` (detik) berhenti menunggu setelah waktu itu; mengembalikan
+        False bila masih ada baris di antrean.
+        """
+        if timeout is None:
+            self._queue.join()
+            return True
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    # --- BACA ---
+
+    def query(self, start=None, end=None, task_type=None, session_id=None, limit=None, offset=0, newest_first=False):
+        """DataFrame baris riwayat yang lolos filter (kolom: id + COLUMNS)."""
+        import pandas as pd
+
+        where, params = _where(start, end, task_type, session_id)
+        sql = f"SELECT id, {', '.join(COLUMNS)} FROM predictions{where} ORDER BY ts {'DESC' if newest_first else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        with self._session() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def count(self, start=None, end=None, task_type=None, session_id=None):
+        where, params = _where(start, end, task_type, session_id)
+        with self._session() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM predictions{where}", params).fetchone()[0]
+
+    # --- EKSPOR (DIBACA PER CHUNK DARI CURSOR, TIDAK DIMUAT SEKALIGUS) ---
+
+    def iter_chunks(self, start=None, end=None, task_type=None, session_id=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        """Yield list baris (urut EXPORT_COLUMNS, terlama dulu) sebanyak paling banyak `chunk_rows`."""
+        where, params = _where(start, end, task_type, session_id)
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"SELECT datetime(ts, 'unixepoch', 'localtime'), {', '.join(COLUMNS)} FROM predictions{where} ORDER BY ts",
+                params)
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    def iter_csv(self, chunk_rows=EXPORT_CHUNK_ROWS, **filters):
+        """Yield CSV (bytes UTF-8) per chunk, diawali header."""
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(EXPORT_COLUMNS)
+        for rows in self.iter_chunks(chunk_rows=chunk_rows, **filters):
+            writer.writerows(rows)
+            yield buf.getvalue().encode('utf-8')
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue().encode('utf-8')
+
+    def write_parquet(self, sink, chunk_rows=EXPORT_CHUNK_ROWS, **filters):
+        """Tulis riwayat ke Parquet (path atau file-like), satu row group per chunk. Butuh pyarrow."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ('timestamp', pa.string()), ('ts', pa.float64()), ('session_id', pa.string()), ('task_type', pa.string()),
+            ('class', pa.string()), ('confidence', pa.float64()), ('objects_detected', pa.int64()),
+        ])
+        with pq.ParquetWriter(sink, schema) as writer:
+            for rows in self.iter_chunks(chunk_rows=chunk_rows, **filters):
+                writer.write_table(pa.table(
+                    {name: list(values) for name, values in zip(EXPORT_COLUMNS, zip(*rows))}, schema=schema))
+
+    # --- AGREGAT (DARI BUCKET PER MENIT; start/end dibulatkan ke menit) ---
+
+    def class_stats(self, start=None, end=None, task_type=None, session_id=None):
+        """{class: (jumlah, mean confidence, varians confidence)}, urut dari jumlah terbanyak."""
+        where, params = _where(*_bucket_range(start, end), task_type, session_id, ts_column='minute')
+        with self._session() as conn:
+            rows = conn.execute(
+                f"SELECT class, SUM(n) AS total, SUM(conf_sum), SUM(conf_sumsq) FROM minute_stats{where} "
+                f"GROUP BY class ORDER BY total DESC", params).fetchall()
+        stats = {}
+        for cls, n, total, total_sq in rows:
+            mean = total / n
+            stats[cls] = (n, mean, max(total_sq / n - mean * mean, 0.0))
+        return stats
+
+    def class_counts(self, start=None, end=None, task_type=None, session_id=None):
+        """{class: jumlah}."""
+        return {cls: n for cls, (n, _, _) in self.class_stats(start, end, task_type, session_id).items()}
+
+    def minute_series(self, start=None, end=None, task_type=None, session_id=None):
+        """[(menit epoch, jumlah, mean confidence)] urut waktu; panjangnya sebanding jumlah menit, bukan prediksi."""
+        where, params = _where(*_bucket_range(start, end), task_type, session_id, ts_column='minute')
+        with self._session() as conn:
+            return conn.execute(
+                f"SELECT minute, SUM(n), SUM(conf_sum) / SUM(n) FROM minute_stats{where} "
+                f"GROUP BY minute ORDER BY minute", params).fetchall()
+
+    def clear(self, start=None, end=None, task_type=None, session_id=None):
+        self.flush()
+        where, params = _where(start, end, task_type, session_id)
+        # Bucket menit yang terpotong filter dihitung ulang dari baris yang tersisa
+        bucket_start, bucket_end = _bucket_range(start, end)
+        stats_where, stats_params = _where(bucket_start, bucket_end, task_type, session_id, ts_column='minute')
+        rebuild_where, rebuild_params = _where(bucket_start, bucket_end, task_type, session_id)
+        with self._write_lock, self._session() as conn:
+            conn.execute(f"DELETE FROM predictions{where}", params)
+            conn.execute(f"DELETE FROM minute_stats{stats_where}", stats_params)
+            conn.execute(_REBUILD_STATS.format(where=rebuild_where), rebuild_params)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+    """HistoryStore bersama untuk proses ini (dibuat saat pertama dipakai)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+        return _store
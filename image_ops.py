@@ -0,0 +1,137 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+# --- IMAGE OPS BACKEND (PIL / OPENCV) ---
+# Operasi gambar yang dipakai pipeline: decode (dengan reduksi skala), konversi
+# warna, resize untuk classifier, dan letterbox untuk YOLO. Backend dipilih lewat
+# DASHBOARD_IMAGE_BACKEND = pil | opencv (default: pil). Keduanya mengembalikan
+# numpy array uint8 sehingga hasilnya bisa langsung diberikan ke model.
+
+IMAGE_BACKEND = os.environ.get("DASHBOARD_IMAGE_BACKEND", "pil").lower()
+LETTERBOX_COLOR = (114, 114, 114)  # warna padding yang dipakai Ultralytics
+YOLO_STRIDE = 32
+
+
+def _letterbox_geometry(width, height, new_size, stride=YOLO_STRIDE, auto=True):
+    """Skala dan padding letterbox ala Ultralytics: (ratio, (new_w, new_h), (pad_left, pad_top), (out_w, out_h))."""
+    ratio = min(new_size / width, new_size / height)
+    new_w, new_h = round(width * ratio), round(height * ratio)
+    out_w, out_h = (new_size, new_size)
+    if auto:
+        # Padding minimal ke kelipatan stride (persegi panjang), bukan persegi penuh
+        out_w = new_w + (-new_w) % stride
+        out_h = new_h + (-new_h) % stride
+    pad_left = (out_w - new_w) // 2
+    pad_top = (out_h - new_h) // 2
+    return ratio, (new_w, new_h), (pad_left, pad_top), (out_w, out_h)
+
+
+def unletterbox_box(box, ratio, pad, size=None):
+    """Kembalikan koordinat [x1, y1, x2, y2] dari ruang letterbox ke gambar asli (di-clip ke `size` (w, h))."""
+    pad_left, pad_top = pad
+    x1, y1, x2, y2 = ((box[0] - pad_left) / ratio, (box[1] - pad_top) / ratio,
+                      (box[2] - pad_left) / ratio, (box[3] - pad_top) / ratio)
+    if size is not None:
+        width, height = size
+        x1, x2 = min(max(x1, 0.0), width), min(max(x2, 0.0), width)
+        y1, y2 = min(max(y1, 0.0), height), min(max(y2, 0.0), height)
+    return [x1, y1, x2, y2]
+
+
+class PilOps:
+    name = 'pil'
+
+    def decode(self, fp, target_side=None):
+        """Decode ke RGB uint8; JPEG memakai draft mode bila target_side diberikan."""
+        img = Image.open(fp)
+        if target_side and img.format == 'JPEG' and max(img.size) > target_side:
+            scale = target_side / max(img.size)
+            img.draft('RGB', (round(img.width * scale), round(img.height * scale)))
+        return np.asarray(img.convert('RGB'))
+
+    def resize(self, image, size):
+        """Resize PIL Image atau array RGB ke `size` (w, h), hasil array uint8."""
+        if not isinstance(image, Image.Image):
+            image = Image.fromarray(image)
+        return np.asarray(image.resize(size))
+
+    def letterbox(self, rgb, new_size=640, auto=True):
+        """Letterbox RGB -> BGR uint8 (konvensi input numpy Ultralytics). Mengembalikan (array, ratio, pad)."""
+        height, width = rgb.shape[:2]
+        ratio, new_wh, pad, out_wh = _letterbox_geometry(width, height, new_size, auto=auto)
+        canvas = Image.new('RGB', out_wh, LETTERBOX_COLOR)
+        canvas.paste(Image.fromarray(rgb).resize(new_wh, Image.BILINEAR), pad)
+        return np.ascontiguousarray(np.asarray(canvas)[..., ::-1]), ratio, pad
+
+
+class OpenCVOps:
+    name = 'opencv'
+
+    def __init__(self):
+        import cv2
+        self.cv2 = cv2
+
+    def decode(self, fp, target_side=None):
+        """Decode ke RGB uint8; IMREAD_REDUCED_COLOR_{2,4,8} mendecode langsung pada skala kecil."""
+        cv2 = self.cv2
+        if isinstance(fp, (str, os.PathLike)):
+            with open(fp, 'rb') as f:
+                data = f.read()
+        else:
+            fp.seek(0)
+            data = fp.read()
+        buf = np.frombuffer(data, dtype=np.uint8)
+
+        flag = cv2.IMREAD_COLOR
+        if target_side:
+            with Image.open(fp if isinstance(fp, (str, os.PathLike)) else _rewind(fp)) as header:
+                longest = max(header.size)
+            for factor, reduced in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2)):
+                if longest / factor >= target_side:
+                    flag = reduced
+                    break
+        bgr = cv2.imdecode(buf, flag)
+        if bgr is None:
+            raise OSError("OpenCV cannot decode image")
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+    def resize(self, image, size):
+        """Resize PIL Image atau array RGB ke `size` (w, h), hasil array uint8."""
+        rgb = np.asarray(image)
+        height, width = rgb.shape[:2]
+        interpolation = self.cv2.INTER_AREA if size[0] < width else self.cv2.INTER_LINEAR
+        return self.cv2.resize(rgb, size, interpolation=interpolation)
+
+    def letterbox(self, rgb, new_size=640, auto=True):
+        cv2 = self.cv2
+        height, width = rgb.shape[:2]
+        ratio, new_wh, (pad_left, pad_top), (out_w, out_h) = _letterbox_geometry(width, height, new_size, auto=auto)
+        bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+        if (width, height) != new_wh:
+            bgr = cv2.resize(bgr, new_wh, interpolation=cv2.INTER_LINEAR)
+        out = cv2.copyMakeBorder(
+            bgr, pad_top, out_h - new_wh[1] - pad_top, pad_left, out_w - new_wh[0] - pad_left,
+            cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR,
+        )
+        return out, ratio, (pad_left, pad_top)
+
+
+def _rewind(fp):
+    fp.seek(0)
+    return fp
+
+
+BACKENDS = {'pil': PilOps, 'opencv': OpenCVOps}
+_instances = {}
+
+
+def get_ops(name=None):
+    """Instance backend image ops (default: DASHBOARD_IMAGE_BACKEND)."""
+    name = (name or IMAGE_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown image backend {name!r}, expected one of {tuple(BACKENDS)}")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
@@ -0,0 +1,670 @@
+import copy
+import logging
+import os
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from image_ops import IMAGE_BACKEND, get_ops, unletterbox_box
+from inference_cache import result_cache, image_digest, model_identity
+from input_gate import OTHER, RICE, SCENE, input_gate
+from metrics import span, timed
+from near_duplicates import MultiIndexHash, gray_thumbnail, near_duplicate_index, perceptual_hash
+from model_handles import classifier_handle, yolo_handle, CLASSIFIER_SERVED_PATH, YOLO_SERVED_PATH
+from preprocessing import CLASSIFIER_INPUT_SIZE, preprocess_batch
+from scheduler import SchedulerBusy, classifier_scheduler, yolo_scheduler
+from tiling import TILE_OVERLAP, TILE_SIZE, nms, select_tiles
+
+# --- INFERENSI (TANPA STREAMLIT) ---
+# Fungsi prediksi dipakai bersama oleh dashboard.py (UI Streamlit) dan api.py
+# (HTTP). Modul ini tidak boleh mengimpor streamlit.
+
+logger = logging.getLogger(__name__)
+
+# KELAS UNTUK KLASIFIKASI (5 JENIS BERAS) DAN DETEKSI (SMOKING/NOT SMOKING)
+CLASSIFICATION_CATEGORIES = ['Arborio', 'Basmati', 'Ipsala', 'Jasmine', 'Karacadag'] 
+DETECTION_CLASSES = ['NotSmoking', 'Smoking'] 
+
+YOLO_CONF_THRESHOLD = 0.60 
+YOLO_IOU_THRESHOLD = 0.45
+YOLO_IMGSZ = 640
+
+# --- MODEL LOADING ---
+# Model dimuat per-handle saat pertama kali dipakai (lihat model_handles.py)
+
+def get_classifier():
+    try:
+        return classifier_handle.get()
+    except Exception as e:
+        logger.error("Failed to load Classification Model (Shafa_Laporan 2.h5): %s", e)
+        return None
+
+def get_yolo_model():
+    try:
+        return yolo_handle.get()
+    except Exception as e:
+        logger.error("Failed to load Object Detection Model (Shafa_Laporan 4.pt) as YOLO: %s", e)
+        return None
+
+# --- FUNGSI INPUT FILTER ---
+# Hanya keputusan yang yakin yang menolak input: gambar kosong / noise (OTHER) selalu, beras /
+# adegan hanya dari bobot gate hasil `input_gate.py train`. Label UNKNOWN diteruskan ke model.
+
+def is_rice_image(image):
+    """Mendeteksi apakah gambar adalah objek klasifikasi (butir beras) dari kontennya lewat input gate."""
+    return input_gate.classify(image)[0] == RICE
+
+def is_person_image(image):
+    """Mendeteksi apakah gambar adalah objek deteksi (adegan dengan orang) dari kontennya lewat input gate."""
+    return input_gate.classify(image)[0] == SCENE
+
+def is_blank_image(image):
+    """Gambar yang bukan beras maupun adegan (kosong, warna polos, noise) menurut input gate."""
+    return input_gate.classify(image)[0] == OTHER
+
+# --- CACHE HASIL + NEAR-DUPLICATE ---
+
+# Hasil dipakai ulang hanya untuk resize / encode ulang murni: rasio aspek hampir sama dan tata
+# letak thumbnail hampir identik. Crop kecil menggeser isi gambar sehingga box lama meleset, dan
+# gambar lain yang hash-nya kebetulan dekat (dua butir beras berbeda di latar hitam) tidak boleh
+# mendapat kelas gambar itu. Pada sample image/ selisih luminans thumbnail (rata-rata, 0-255) untuk
+# resize / encode ulang <= 2.3, untuk crop 1% adegan >= 3.6 dan antar gambar berbeda >= 3.9.
+NEAR_DUP_MAX_ASPECT_CHANGE = 0.02
+NEAR_DUP_MAX_LAYOUT_DIFF = 3.0
+
+def _is_pure_resize(source_size, source_layout, size, layout):
+    """True bila gambar (size, layout) hanya resize / encode ulang gambar sumber (bukan crop / gambar lain)."""
+    if source_layout is None:
+        return False
+    sx, sy = size[0] / source_size[0], size[1] / source_size[1]
+    if abs(sx / sy - 1) > NEAR_DUP_MAX_ASPECT_CHANGE:
+        return False
+    return np.abs(source_layout.astype(np.int16) - layout).mean() <= NEAR_DUP_MAX_LAYOUT_DIFF
+
+def _rescale_detection(result, from_size, to_size):
+    """Petakan box hasil gambar berukuran from_size ke to_size."""
+    sx, sy = to_size[0] / from_size[0], to_size[1] / from_size[1]
+
+    def scale(b):
+        return [b[0] * sx, b[1] * sy, b[2] * sx, b[3] * sy] + list(b[4:])
+
+    for obj in result.get('objects', []):
+        obj['bbox'] = scale(obj['bbox'])
+    result['boxes'] = [scale(b) for b in result.get('boxes', [])]
+    return result
+
+def _reuse_result(result, source_size, size, distance):
+    """Hasil gambar sumber (salinan) untuk near-duplicate-nya: box diskalakan, diberi 'reused' = {'distance'}."""
+    if result['task_type'] == 'Detection':
+        _rescale_detection(result, source_size, size)
+    result['reused'] = {'distance': distance}
+    return result
+
+def _lookup_result(image, cache_key):
+    """Hasil dari cache (digest sama) atau dari gambar yang mirip secara perseptual.
+
+    Mengembalikan (hasil atau None, sidik gambar ini untuk _store_result: (hash perseptual,
+    ukuran, thumbnail luminans uint8)). Hasil near-duplicate diberi 'reused' = {'distance': jarak Hamming}.
+    """
+    cached = result_cache.get(cache_key)
+    if cached is not None or not near_duplicate_index.enabled:
+        return cached, None
+    gray = gray_thumbnail(image)
+    fingerprint = (perceptual_hash(image, gray), image.size, np.round(gray).astype(np.uint8))
+    match = near_duplicate_index.lookup(cache_key[1:], fingerprint[0])
+    if match is None:
+        return None, fingerprint
+    result, (source_size, source_layout), distance = match
+    if not _is_pure_resize(source_size, source_layout, image.size, fingerprint[2]):
+        return None, fingerprint
+    result = _reuse_result(result, source_size, image.size, distance)
+    result_cache.put(cache_key, result)
+    return result, fingerprint
+
+def _store_result(cache_key, result, fingerprint=None):
+    """Simpan hasil model ke cache dan (bila sidik gambar ada) ke indeks near-duplicate."""
+    result_cache.put(cache_key, result)
+    if fingerprint is not None:
+        phash, size, layout = fingerprint
+        near_duplicate_index.add(cache_key[1:], phash, result, (size, layout))
+
+
+class _BatchDuplicates:
+    """Duplikat di dalam satu batch / run: gambar identik (cache key sama) atau resize / encode ulang
+    dari gambar sebelumnya. Lookup cache terjadi sebelum hasil batch yang sama tersimpan, jadi tanpa
+    ini setiap salinan ikut dikirim ke model. Model hanya dijalankan untuk gambar pertama tiap kelompok.
+    """
+
+    def __init__(self, max_sources=None):
+        self.max_sources = max_sources
+        self._sources = OrderedDict()  # cache_key -> (sumber, sidik)
+        self._near = MultiIndexHash()  # hash perseptual -> cache_key
+
+    def source_of(self, source, cache_key, fingerprint):
+        """(sumber sebelumnya, jarak Hamming atau None bila identik) bila gambar ini duplikat.
+
+        Selain itu `source` (indeks / item milik pemanggil) didaftarkan sebagai sumber dan None dikembalikan.
+        """
+        entry = self._sources.get(cache_key)
+        if entry is not None:
+            return entry[0], None
+        if fingerprint is not None:
+            match = self._near.nearest(fingerprint[0], near_duplicate_index.max_distance)
+            if match is not None:
+                distance, key = match
+                other, (_, size, layout) = self._sources[key]
+                if _is_pure_resize(size, layout, fingerprint[1], fingerprint[2]):
+                    return other, distance
+        self._sources[cache_key] = (source, fingerprint)
+        if fingerprint is not None and fingerprint[0] not in self._near:
+            self._near.add(fingerprint[0], cache_key)
+        if self.max_sources and len(self._sources) > self.max_sources:
+            old_key, (_, old_fingerprint) = self._sources.popitem(last=False)
+            if old_fingerprint is not None and self._near.nearest(old_fingerprint[0], 0) == (0, old_key):
+                self._near.remove(old_fingerprint[0])
+        return None
+
+
+def _copy_result(result, source_size, cache_key, size, distance):
+    """Salinan hasil sumber untuk duplikatnya; hasil model near-duplicate disimpan juga di cache duplikat."""
+    result = copy.deepcopy(result)
+    if distance is None or result.get('retry') or is_model_error(result):
+        return result  # identik (cache key sama), atau kegagalan yang tidak di-cache
+    result = _reuse_result(result, source_size, size, distance)
+    result_cache.put(cache_key, result)
+    return result
+
+def _copy_duplicates(results, images, copies):
+    """Isi results untuk (indeks, cache_key, indeks sumber, jarak) dari _BatchDuplicates."""
+    for i, cache_key, source, distance in copies:
+        results[i] = _copy_result(results[source], images[source].size, cache_key, images[i].size, distance)
+
+# --- PREDICT CLASSIFICATION (Filter Diperketat) ---
+
+BATCH_SIZE = 32
+
+def _classification_rejection(image):
+    """Hasil penolakan input untuk klasifikasi, atau None jika input diterima."""
+    categories = CLASSIFICATION_CATEGORIES
+
+    # PERBAIKAN: Blokir input yang jelas-jelas ditujukan untuk Deteksi Objek
+    if is_person_image(image):
+         return {
+             'class': "INPUT TIDAK COCOK", 'confidence': 0.0, 
+             'probabilities': {cat: 0.0 for cat in categories}, 'task_type': 'Classification',
+             'error_message': "Input Ditolak: **Gambar adalah Objek Deteksi (Orang/Aktivitas)**. Pilih mode Deteksi Objek."
+         }
+        
+    # Blokir input yang bukan beras dan bukan orang (gambar kosong / noise)
+    if is_blank_image(image):
+        return {
+            'class': "INPUT TIDAK COCOK", 'confidence': 0.0, 
+            'probabilities': {cat: 0.0 for cat in categories}, 'task_type': 'Classification',
+            'error_message': "Input rejected: Not a classification. This model only support classification grain seed."
+        }
+    return None
+
+def _classification_error(e):
+    return {
+        'class': "RUNTIME ERROR", 'confidence': 0.0, 'probabilities': {cat: 0.0 for cat in CLASSIFICATION_CATEGORIES}, 'task_type': 'Classification',
+        'error_message': f"Error Runtime Model: Model gagal memproses input. {str(e)[:100]}..."
+    }
+
+def _busy_result(task_type, classes):
+    """Hasil "sibuk, coba lagi" saat antrean inferensi penuh (tidak di-cache)."""
+    result = {
+        'class': "SERVER BUSY", 'confidence': 0.0, 'probabilities': {c: 0.0 for c in classes}, 'task_type': task_type,
+        'retry': True, 'error_message': "Server is busy with other predictions. Please retry in a moment."
+    }
+    if task_type == 'Detection':
+        result.update({'objects': [], 'total_objects': 0})
+    return result
+
+def _classification_result(prediction):
+    categories = CLASSIFICATION_CATEGORIES
+    probabilities = prediction * 100
+    
+    predicted_class = categories[np.argmax(probabilities)]
+    confidence = np.max(probabilities)
+    
+    return {
+        'class': predicted_class, 'confidence': confidence, 
+        'probabilities': dict(zip(categories, probabilities)), 'task_type': 'Classification',
+        'success_message': f"Result: **Class {predicted_class}** (Confidence: {confidence:.2f}%)"
+    }
+
+def _classification_cache_key(image):
+    return result_cache.make_key(image_digest(image), 'Classification', model_identity(CLASSIFIER_SERVED_PATH))
+
+def preprocess_classification_batch(images):
+    """Resize dan tumpuk gambar menjadi satu tensor NHWC float32 (0-1), di buffer yang dipakai ulang."""
+    return preprocess_batch(images, CLASSIFIER_INPUT_SIZE)
+
+def predict_classification(image, model_type="TensorFlow Model"):
+    rejection = _classification_rejection(image)
+    if rejection is not None:
+        return rejection
+
+    # Hasil untuk gambar yang sama (konten identik atau near-duplicate) diambil dari cache proses
+    cache_key = _classification_cache_key(image)
+    cached, fingerprint = _lookup_result(image, cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        model = get_classifier()
+        if model is None: raise RuntimeError("Model Klasifikasi tidak dapat dimuat.")
+            
+        with span('classify.preprocess'):
+            img_array = preprocess_classification_batch([image])
+        with classifier_scheduler.slot(), span('classify.inference'):
+            predictions = model.predict(img_array)
+        
+        result = _classification_result(predictions[0])
+        _store_result(cache_key, result, fingerprint)
+        return result
+        
+    except SchedulerBusy:
+        return _busy_result('Classification', CLASSIFICATION_CATEGORIES)
+    except Exception as e:
+        return _classification_error(e)
+
+def predict_classification_batch(images, batch_size=BATCH_SIZE):
+    """Klasifikasi banyak gambar sekaligus; model dipanggil per batch berukuran `batch_size`."""
+    results = [None] * len(images)
+    pending, copies = [], []
+    duplicates = _BatchDuplicates()
+    for i, image in enumerate(images):
+        rejection = _classification_rejection(image)
+        if rejection is not None:
+            results[i] = rejection
+            continue
+        cache_key = _classification_cache_key(image)
+        cached, fingerprint = _lookup_result(image, cache_key)
+        if cached is not None:
+            results[i] = cached
+            continue
+        match = duplicates.source_of(i, cache_key, fingerprint)
+        if match is None:
+            pending.append((i, cache_key, fingerprint))
+        else:
+            copies.append((i, cache_key) + match)
+
+    classifier = get_classifier() if pending else None
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        try:
+            if classifier is None: raise RuntimeError("Model Klasifikasi tidak dapat dimuat.")
+            with span('classify.batch_preprocess'):
+                batch = preprocess_classification_batch([images[i] for i, _, _ in chunk])
+            with classifier_scheduler.slot(), span('classify.batch_inference'):
+                predictions = classifier.predict(batch)
+        except SchedulerBusy:
+            for i, _, _ in chunk:
+                results[i] = _busy_result('Classification', CLASSIFICATION_CATEGORIES)
+            continue
+        except Exception as e:
+            for i, _, _ in chunk:
+                results[i] = _classification_error(e)
+            continue
+        for (i, cache_key, fingerprint), prediction in zip(chunk, predictions):
+            results[i] = _classification_result(prediction)
+            _store_result(cache_key, results[i], fingerprint)
+    _copy_duplicates(results, images, copies)
+    return results
+
+# --- PREDICT DETECTION (Filter Diperketat) ---
+
+def _detection_rejection(image):
+    """Hasil penolakan input untuk deteksi, atau None jika input diterima."""
+    categories = DETECTION_CLASSES 
+    
+    # PERBAIKAN: Blokir input yang jelas-jelas ditujukan untuk Klasifikasi (gambar beras)
+    if is_rice_image(image):
+         return {
+             'class': "INPUT TIDAK COCOK", 'confidence': 0.0,
+             'probabilities': {c: 0.0 for c in categories}, 'objects': [], 'total_objects': 0,
+             'task_type': 'Detection',
+             'error_message': "Input Rejected: Not a object detection. This only support Object Detection"
+         }
+
+    # Gambar kosong / polos / noise tidak perlu dikirim ke YOLO
+    if is_blank_image(image):
+        return {
+            'class': "INPUT TIDAK COCOK", 'confidence': 0.0,
+            'probabilities': {c: 0.0 for c in categories}, 'objects': [], 'total_objects': 0,
+            'task_type': 'Detection',
+            'error_message': "Input Rejected: The image is blank or has no scene content. This only support Object Detection"
+        }
+    return None
+
+# Hasil kegagalan model (bukan hasil prediksi): tidak di-cache dan tidak boleh dianggap "tidak ada objek"
+MODEL_ERROR_CLASSES = ("RUNTIME ERROR", "MODEL GAGAL DIMUAT")
+
+def is_model_error(result):
+    return result['class'] in MODEL_ERROR_CLASSES
+
+def _detection_model_unavailable():
+    categories = DETECTION_CLASSES
+    return {
+        'class': "MODEL GAGAL DIMUAT", 'confidence': 0.0,
+        'probabilities': {c: 0.0 for c in categories}, 'objects': [], 'total_objects': 0,
+        'task_type': 'Detection',
+        'error_message': "The Detection Model (Shafa_Report 4.pt) failed to load as YOLO. Check the console for FATAL ERROR."
+    }
+
+def _detection_error(e):
+    return {
+        'class': "RUNTIME ERROR", 'confidence': 0.0, 'probabilities': {c: 0.0 for c in DETECTION_CLASSES}, 
+        'objects': [], 'total_objects': 0, 'task_type': 'Detection',
+        'error_message': f"Error Runtime Model YOLO: {str(e)}"
+    }
+
+def _yolo_input(image):
+    """Letterbox gambar ke array BGR (input numpy Ultralytics) dengan backend image ops terpilih.
+
+    Mengembalikan (array, (ratio, pad, size)) untuk memetakan box kembali ke koordinat gambar.
+    """
+    rgb = np.asarray(image)
+    arr, ratio, pad = get_ops().letterbox(rgb, YOLO_IMGSZ)
+    return arr, (ratio, pad, (rgb.shape[1], rgb.shape[0]))
+
+@timed('detect.postprocess')
+def _detection_result(r, letterbox=None):
+    """Ubah satu objek Results Ultralytics menjadi dict hasil deteksi.
+
+    `letterbox` = (ratio, pad, size) dari _yolo_input, untuk mengembalikan box ke koordinat gambar asli.
+    """
+    raw_boxes = []
+    if hasattr(r, 'boxes') and r.boxes.data.shape[0] > 0:
+        # Simpan box mentah [x1, y1, x2, y2, conf, cls] dari pass pertama untuk digambar tanpa inferensi ulang
+        raw_boxes = r.boxes.data.tolist()
+        if letterbox is not None:
+            raw_boxes = [unletterbox_box(box, *letterbox) + box[4:] for box in raw_boxes]
+    return _detection_summary(raw_boxes)
+
+def _detection_summary(raw_boxes):
+    """Dict hasil deteksi dari box [x1, y1, x2, y2, conf, cls] dalam koordinat gambar."""
+    categories = DETECTION_CLASSES
+    detected_objects = []
+
+    if raw_boxes:
+        for box_data in raw_boxes:
+            bbox = box_data[:4]
+            confidence = float(box_data[4]) * 100
+            class_id = int(box_data[5])
+            
+            try:
+                class_name = categories[class_id]
+            except IndexError:
+                class_name = f"Unknown ID {class_id}"
+                
+            detected_objects.append({'class': class_name, 'confidence': confidence, 'bbox': bbox})
+
+    if detected_objects:
+        best_detection = max(detected_objects, key=lambda x: x['confidence'])
+        probabilities = {c: 0.0 for c in categories}
+        probabilities[best_detection['class']] = best_detection['confidence']
+        
+        return {
+            'class': best_detection['class'], 'confidence': best_detection['confidence'],
+            'probabilities': probabilities, 'objects': detected_objects, 'total_objects': len(detected_objects),
+            'boxes': raw_boxes, 'task_type': 'Detection',
+            'success_message': f"Successful Detection: **{best_detection['class']}** ({len(detected_objects)} detection object)"
+        }
+    return {
+        'class': "OBJEK TIDAK DITEMUKAN", 'confidence': 0.0, 'probabilities': {c: 0.0 for c in categories}, 
+        'objects': [], 'total_objects': 0, 'boxes': raw_boxes, 'task_type': 'Detection',
+        'error_message': f"There is no **NotSmoking/Smoking** detected above the threshold (0.60)."
+    }
+
+def _detection_cache_key(image):
+    return result_cache.make_key(
+        image_digest(image), 'Detection', model_identity(YOLO_SERVED_PATH),
+        (YOLO_CONF_THRESHOLD, YOLO_IOU_THRESHOLD)
+    )
+
+def predict_detection(image):
+    rejection = _detection_rejection(image)
+    if rejection is not None:
+        return rejection
+
+    cache_key = _detection_cache_key(image)
+    cached, fingerprint = _lookup_result(image, cache_key)
+    if cached is not None:
+        return cached
+
+    # Cek apakah model Deteksi berhasil dimuat
+    yolo_model = get_yolo_model()
+    if yolo_model is None:
+        return _detection_model_unavailable()
+
+    try:
+        # Mengatur confidence threshold menjadi 0.60 (ditingkatkan untuk mengurangi false positive)
+        with span('detect.preprocess'):
+            yolo_input, letterbox = _yolo_input(image)
+        with yolo_scheduler.slot(), span('detect.inference'):
+            results = yolo_model(yolo_input, conf=YOLO_CONF_THRESHOLD, iou=YOLO_IOU_THRESHOLD, verbose=False)
+        result = _detection_result(results[0], letterbox)
+        _store_result(cache_key, result, fingerprint)
+            
+    except SchedulerBusy:
+        result = _busy_result('Detection', DETECTION_CLASSES)
+    except Exception as e:
+        result = _detection_error(e)
+        
+    return result
+
+def predict_detection_batch(images, batch_size=BATCH_SIZE):
+    """Deteksi banyak gambar; YOLO menerima list gambar dalam satu pemanggilan per batch."""
+    results = [None] * len(images)
+    pending, copies = [], []
+    duplicates = _BatchDuplicates()
+    for i, image in enumerate(images):
+        rejection = _detection_rejection(image)
+        if rejection is not None:
+            results[i] = rejection
+            continue
+        cache_key = _detection_cache_key(image)
+        cached, fingerprint = _lookup_result(image, cache_key)
+        if cached is not None:
+            results[i] = cached
+            continue
+        match = duplicates.source_of(i, cache_key, fingerprint)
+        if match is None:
+            pending.append((i, cache_key, fingerprint))
+        else:
+            copies.append((i, cache_key) + match)
+
+    yolo_model = get_yolo_model() if pending else None
+    if pending and yolo_model is None:
+        for i, _, _ in pending:
+            results[i] = _detection_model_unavailable()
+        pending = []
+
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        try:
+            with span('detect.batch_preprocess'):
+                inputs = [_yolo_input(images[i]) for i, _, _ in chunk]
+            with yolo_scheduler.slot(), span('detect.batch_inference'):
+                yolo_results = yolo_model([arr for arr, _ in inputs], conf=YOLO_CONF_THRESHOLD, iou=YOLO_IOU_THRESHOLD, verbose=False)
+        except SchedulerBusy:
+            for i, _, _ in chunk:
+                results[i] = _busy_result('Detection', DETECTION_CLASSES)
+            continue
+        except Exception as e:
+            for i, _, _ in chunk:
+                results[i] = _detection_error(e)
+            continue
+        for (i, cache_key, fingerprint), r, (_, letterbox) in zip(chunk, yolo_results, inputs):
+            results[i] = _detection_result(r, letterbox)
+            _store_result(cache_key, results[i], fingerprint)
+    _copy_duplicates(results, images, copies)
+    return results
+
+
+def predict_detection_tiled(image, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Deteksi bertile untuk gambar resolusi tinggi: pass utuh + tile aktif dalam satu batch YOLO, digabung dengan NMS.
+
+    Hasil sama dengan predict_detection, ditambah 'tiles' = {'run', 'skipped'}.
+    """
+    rejection = _detection_rejection(image)
+    if rejection is not None:
+        return rejection
+
+    # Parameter tile ikut di tuple threshold: hasil bertile tidak tertukar dengan hasil pass tunggal
+    cache_key = result_cache.make_key(
+        image_digest(image), 'Detection', model_identity(YOLO_SERVED_PATH),
+        (YOLO_CONF_THRESHOLD, YOLO_IOU_THRESHOLD, 'tiled', tile_size, overlap)
+    )
+    cached, fingerprint = _lookup_result(image, cache_key)
+    if cached is not None:
+        return cached
+
+    yolo_model = get_yolo_model()
+    if yolo_model is None:
+        return _detection_model_unavailable()
+
+    try:
+        rgb = np.asarray(image)
+        with span('detect.tile_select'):
+            tiles, skipped = select_tiles(rgb, tile_size, overlap)
+        with span('detect.preprocess'):
+            full_input, full_letterbox = _yolo_input(image)
+            inputs, placements = [full_input], [(full_letterbox, (0, 0))]
+            ops = get_ops()
+            for x0, y0, x1, y1 in tiles:
+                arr, ratio, pad = ops.letterbox(np.ascontiguousarray(rgb[y0:y1, x0:x1]), YOLO_IMGSZ)
+                inputs.append(arr)
+                placements.append(((ratio, pad, (x1 - x0, y1 - y0)), (x0, y0)))
+        with yolo_scheduler.slot(), span('detect.tiled_inference'):
+            yolo_results = yolo_model(inputs, conf=YOLO_CONF_THRESHOLD, iou=YOLO_IOU_THRESHOLD, verbose=False)
+
+        with span('detect.tile_merge'):
+            boxes = []
+            for r, (letterbox, (dx, dy)) in zip(yolo_results, placements):
+                for box in r.boxes.data.tolist():
+                    x1, y1, x2, y2 = unletterbox_box(box, *letterbox)
+                    boxes.append([x1 + dx, y1 + dy, x2 + dx, y2 + dy] + box[4:])
+            result = _detection_summary(nms(boxes))
+        result['tiles'] = {'run': len(tiles), 'skipped': skipped}
+        _store_result(cache_key, result, fingerprint)
+        return result
+    except SchedulerBusy:
+        return _busy_result('Detection', DETECTION_CLASSES)
+    except Exception as e:
+        return _detection_error(e)
+
+def predict_detection_frame(frame):
+    """Deteksi satu frame video (array RGB) tanpa input gate dan tanpa cache (frame hampir selalu unik)."""
+    yolo_model = get_yolo_model()
+    if yolo_model is None:
+        return _detection_model_unavailable()
+    try:
+        with span('detect.preprocess'):
+            yolo_input, letterbox = _yolo_input(frame)
+        with yolo_scheduler.slot(), span('detect.inference'):
+            results = yolo_model(yolo_input, conf=YOLO_CONF_THRESHOLD, iou=YOLO_IOU_THRESHOLD, verbose=False)
+        return _detection_result(results[0], letterbox)
+    except SchedulerBusy:
+        return _busy_result('Detection', DETECTION_CLASSES)
+    except Exception as e:
+        return _detection_error(e)
+
+
+# --- FUNGSI AUXILIARY ---
+
+# Batas piksel (lebar x tinggi) sebelum decode, untuk menolak decompression bomb
+MAX_IMAGE_PIXELS = int(os.environ.get("DASHBOARD_MAX_IMAGE_PIXELS", 40_000_000))
+# Sisi terpanjang setelah decode. Classifier butuh 128x128 dan YOLO me-letterbox ke ~640,
+# jadi gambar kamera penuh (mis. 4000x3000) tidak perlu disimpan di memori.
+DECODE_MAX_SIDE = int(os.environ.get("DASHBOARD_DECODE_MAX_SIDE", 1280))
+# Mode deteksi bertile butuh detail resolusi tinggi (lihat tiling.py)
+TILED_DECODE_MAX_SIDE = int(os.environ.get("DASHBOARD_TILED_DECODE_MAX_SIDE", 4096))
+
+
+class ImageTooLargeError(ValueError):
+    pass
+
+
+def read_image_header(img):
+    """Info header (tanpa decode piksel) dari PIL Image yang baru dibuka."""
+    width, height = img.size
+    return {'width': width, 'height': height, 'format': img.format, 'pixels': width * height}
+
+
+@timed('decode')
+def decode_image(fp, max_side=DECODE_MAX_SIDE, max_pixels=MAX_IMAGE_PIXELS):
+    """Decode file gambar (path atau file-like) menjadi PIL Image RGB dengan sisi terpanjang <= max_side.
+
+    Header dibaca lebih dulu dan gambar di atas `max_pixels` ditolak sebelum piksel didecode.
+    JPEG didecode langsung pada skala yang diperkecil (draft mode, 1/2-1/8) sehingga
+    salinan resolusi penuh tidak pernah dibuat. Ukuran asli disimpan di img.info['original_size'].
+    """
+    try:
+        img = Image.open(fp)
+    except Image.DecompressionBombError as e:
+        raise ImageTooLargeError(str(e)) from e
+    header = read_image_header(img)
+    if max_pixels and header['pixels'] > max_pixels:
+        img.close()
+        raise ImageTooLargeError(
+            f"Image is {header['width']}x{header['height']} ({header['pixels'] / 1e6:.0f} MP), "
+            f"limit is {max_pixels / 1e6:.0f} MP."
+        )
+
+    if IMAGE_BACKEND == 'opencv':
+        # cv2.imdecode dengan IMREAD_REDUCED_COLOR_{2,4,8}, lalu resize SIMD ke max_side
+        ops = get_ops()
+        rgb = ops.decode(fp, target_side=max_side)
+        if max_side and max(rgb.shape[:2]) > max_side:
+            scale = max_side / max(rgb.shape[:2])
+            rgb = ops.resize(rgb, (max(1, round(rgb.shape[1] * scale)), max(1, round(rgb.shape[0] * scale))))
+        img = Image.fromarray(rgb)
+    elif max_side and max(img.size) > max_side:
+        scale = max_side / max(img.size)
+        target = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        if img.format == 'JPEG':
+            img.draft('RGB', target)  # decode ke skala >= target, bukan resolusi penuh
+        img = img.convert('RGB')
+        img.thumbnail((max_side, max_side), Image.BICUBIC)
+    else:
+        img = img.convert('RGB')
+    img.info['original_size'] = (header['width'], header['height'])
+    return img
+
+BOX_COLORS = {'NotSmoking': (0, 230, 118), 'Smoking': (255, 196, 0)}
+BOX_DEFAULT_COLOR = (168, 85, 247)
+
+@timed('render.boxes')
+def draw_bounding_boxes(image, detections):
+    """Menggambar box hasil predict_detection (result['objects']) tanpa menjalankan model lagi."""
+    img = image.convert('RGB') if image.mode != 'RGB' else image.copy()
+    if not detections:
+        return img
+
+    draw = ImageDraw.Draw(img)
+    line_width = max(2, round(min(img.size) / 200))
+    for det in detections:
+        x1, y1, x2, y2 = det['bbox']
+        color = BOX_COLORS.get(det['class'], BOX_DEFAULT_COLOR)
+        draw.rectangle([x1, y1, x2, y2], outline=color, width=line_width)
+
+        label = f"{det['class']} {det['confidence']:.1f}%"
+        tx1, ty1, tx2, ty2 = draw.textbbox((0, 0), label)
+        text_w, text_h = tx2 - tx1, ty2 - ty1
+        label_y = y1 - text_h - 4 if y1 - text_h - 4 >= 0 else y1
+        draw.rectangle([x1, label_y, x1 + text_w + 4, label_y + text_h + 4], fill=color)
+        draw.text((x1 + 2, label_y + 2 - ty1), label, fill=(0, 0, 0))
+    return img
+
+def predict_image(image, task_type, model_type, tiled=False):
+    if task_type == "Image Classification (CNN)r": return predict_classification(image, model_type)
+    elif task_type == "Object Detection (YOLO)": return predict_detection_tiled(image) if tiled else predict_detection(image)
+    else: return predict_classification(image, model_type) 
+
+def predict_image_batch(images, task_type, batch_size=BATCH_SIZE):
+    if task_type == "Object Detection (YOLO)": return predict_detection_batch(images, batch_size)
+    else: return predict_classification_batch(images, batch_size)
@@ -0,0 +1,124 @@
+import copy
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# --- CACHE HASIL INFERENSI (SHARED SATU PROSES) ---
+# Modul ini diimpor sekali per proses, jadi objek di level modul bertahan
+# melewati rerun Streamlit dan dipakai bersama oleh semua sesi.
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+DIGEST_INFO_KEY = '_content_digest'
+
+
+def image_digest(image):
+    """Hash konten piksel gambar PIL (mode + ukuran + bytes).
+
+    Hasil disimpan di image.info bersama id(image), sehingga input gate dan cache
+    hasil tidak meng-hash gambar yang sama dua kali. PIL menyalin info ke gambar
+    turunan (copy / resize / crop); id yang berbeda membuat memo itu diabaikan.
+    """
+    memo = image.info.get(DIGEST_INFO_KEY)
+    if memo is not None and memo[0] == id(image):
+        return memo[1]
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{image.mode}:{image.size[0]}x{image.size[1]}".encode())
+    h.update(image.tobytes())
+    digest = h.hexdigest()
+    image.info[DIGEST_INFO_KEY] = (id(image), digest)
+    return digest
+
+
+def model_identity(path):
+    """Identitas file model: path, ukuran dan mtime. Berubah jika file diganti."""
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return (path, None, None)
+    return (path, st_.st_size, st_.st_mtime_ns)
+
+
+def _result_size(value):
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 1024
+
+
+class InferenceCache:
+    """LRU cache hasil prediksi, dibatasi jumlah entri dan total bytes."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(digest, task_type, model_id, thresholds=()):
+        return (digest, task_type, model_id, tuple(thresholds))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            value = entry[0]
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        size = _result_size(value)
+        if size > self.max_bytes:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Ambil dari cache, atau jalankan `compute()` dan simpan hasilnya."""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._data), 'bytes': self._bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': (self.hits / total) if total else 0.0,
+            }
+
+
+result_cache = InferenceCache(
+    max_entries=int(os.environ.get("DASHBOARD_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    max_bytes=int(os.environ.get("DASHBOARD_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+)
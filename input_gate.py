@@ -0,0 +1,253 @@
+"""Filter input berbasis konten: butir beras vs. adegan dengan orang, sebelum model berat dijalankan.
+
+    python input_gate.py train --samples "sample image" [--other folder_gambar_lain]
+    python input_gate.py eval --samples "sample image"
+
+Fitur murah dihitung dari thumbnail 32x32 (histogram warna, fraksi latar gelap,
+kontras tengah vs tepi, energi gradien), lalu diklasifikasi model linear
+(softmax) kecil. Total di bawah satu milidetik per gambar, dan hasilnya di-cache
+per hash gambar. Bobot hasil `train` disimpan di DASHBOARD_INPUT_GATE_PATH
+(default model/input_gate.npz). Tanpa file itu gate tidak menebak beras / adegan
+(label 'unknown', input diteruskan ke model): aturan satu fitur seperti fraksi
+latar gelap menganggap adegan malam / CCTV yang gelap sebagai beras.
+
+Sebelum model dijalankan, gambar datar (kontras hampir nol di thumbnail: gambar
+kosong hitam / putih, warna polos) dan noise acak (piksel bertetangga tidak
+berkorelasi) langsung diberi label 'other', karena model dua kelas akan
+memaksakannya ke beras atau adegan.
+"""
+import argparse
+import glob
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+from inference_cache import InferenceCache, image_digest, model_identity
+
+GATE_MODEL_PATH = os.environ.get("DASHBOARD_INPUT_GATE_PATH", "model/input_gate.npz")
+GATE_MIN_CONFIDENCE = float(os.environ.get("DASHBOARD_INPUT_GATE_MIN_CONFIDENCE", 0.7))
+THUMBNAIL_SIZE = 32
+DARK_LEVEL = 40  # kanal maksimum di bawah ini dianggap latar gelap
+HIST_BINS = 8
+THUMBNAIL_INFO_KEY = '_thumbnail'
+# Gambar datar / noise -> OTHER. Korpus sample image/, juga adegan yang digelapkan ke 10%
+# (malam / CCTV): brightness_std >= 0.011, korelasi piksel bertetangga >= 0.7. Noise acak menjadi
+# rata setelah thumbnail BOX (std bisa < 0.04, seperti adegan gelap), tetapi korelasinya ~0.
+FLAT_MAX_STD = 0.005
+NOISE_MAX_CORRELATION = 0.3
+
+RICE, SCENE, OTHER = 'rice', 'scene', 'other'
+UNKNOWN = 'unknown'
+
+# Label data latih diambil dari prefiks nama file korpus sample image/
+RICE_PREFIXES = ('arborio', 'basmati', 'ipsala', 'jasmine', 'karacadag')
+SCENE_PREFIXES = ('smoking', 'notsmoking')
+
+FEATURE_NAMES = (
+    ['dark_fraction', 'brightness_mean', 'brightness_std', 'saturation_mean', 'gradient_energy', 'center_border_ratio',
+     'neighbor_correlation']
+    + [f'hist_{c}{i}' for c in 'rgb' for i in range(HIST_BINS)]
+)
+
+
+def thumbnail(image):
+    """Thumbnail RGB uint8 THUMBNAIL_SIZE x THUMBNAIL_SIZE; untuk PIL Image disimpan di image.info
+    (dengan id(image), seperti image_digest) sehingga dipakai bersama oleh gate dan
+    hash perseptual (near_duplicates.py)."""
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    memo = image.info.get(THUMBNAIL_INFO_KEY)
+    if memo is not None and memo[0] == id(image):
+        return memo[1]
+    rgb = image if image.mode == 'RGB' else image.convert('RGB')
+    thumb = np.asarray(rgb.resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.BOX, reducing_gap=3.0))
+    image.info[THUMBNAIL_INFO_KEY] = (id(image), thumb)
+    return thumb
+
+
+def gate_features(image):
+    """Vektor fitur float32 dari thumbnail gambar (PIL atau array RGB uint8)."""
+    thumb = thumbnail(image).astype(np.float32)
+
+    channel_max = thumb.max(axis=2)
+    channel_min = thumb.min(axis=2)
+    brightness = thumb.mean(axis=2)
+    saturation = (channel_max - channel_min) / np.maximum(channel_max, 1.0)
+    gradient = (np.abs(np.diff(brightness, axis=0)).mean() + np.abs(np.diff(brightness, axis=1)).mean()) / 255.0
+    q = THUMBNAIL_SIZE // 4
+    center = brightness[q:-q, q:-q].mean()
+    border = (brightness.sum() - brightness[q:-q, q:-q].sum()) / (brightness.size - brightness[q:-q, q:-q].size)
+
+    centered = brightness - brightness.mean()
+    energy = (centered * centered).sum()
+    neighbor = ((centered[1:] * centered[:-1]).sum() + (centered[:, 1:] * centered[:, :-1]).sum()) / 2
+    correlation = neighbor / energy if energy > 0 else 1.0
+
+    bins = np.minimum((thumb * (HIST_BINS / 256.0)).astype(np.int32), HIST_BINS - 1)
+    hist = np.concatenate([np.bincount(bins[..., c].ravel(), minlength=HIST_BINS) for c in range(3)])
+    hist = hist / float(THUMBNAIL_SIZE * THUMBNAIL_SIZE)
+
+    return np.concatenate([
+        [(channel_max < DARK_LEVEL).mean(), brightness.mean() / 255.0, brightness.std() / 255.0,
+         saturation.mean(), gradient, (center + 1.0) / (border + 1.0), correlation],
+        hist,
+    ]).astype(np.float32)
+
+
+def is_flat(features):
+    """True bila thumbnail hampir tanpa kontras (kosong, polos) atau tanpa struktur ruang (noise)."""
+    return (features[FEATURE_NAMES.index('brightness_std')] < FLAT_MAX_STD
+            or features[FEATURE_NAMES.index('neighbor_correlation')] < NOISE_MAX_CORRELATION)
+
+
+class LinearGate:
+    """Softmax linear di atas fitur yang distandardisasi."""
+
+    def __init__(self, weights, bias, mean, std, classes):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.std = np.asarray(std, dtype=np.float32)
+        self.classes = tuple(classes)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data['weights'], data['bias'], data['mean'], data['std'], [str(c) for c in data['classes']])
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(path, weights=self.weights, bias=self.bias, mean=self.mean, std=self.std, classes=np.array(self.classes))
+
+    def probabilities(self, features):
+        logits = ((features - self.mean) / self.std) @ self.weights + self.bias
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class InputGate:
+    """Klasifikasi input (beras / adegan / lainnya) dengan cache per hash gambar."""
+
+    def __init__(self, path=GATE_MODEL_PATH, min_confidence=GATE_MIN_CONFIDENCE):
+        self.path = path
+        self.min_confidence = min_confidence
+        self.cache = InferenceCache(max_entries=4096, max_bytes=4 * 1024 * 1024)
+        self._model = None
+        self._model_id = None
+        self._lock = threading.Lock()
+
+    def model(self):
+        """Model dari file (dimuat ulang bila file berubah), atau None bila belum dilatih."""
+        model_id = model_identity(self.path)
+        with self._lock:
+            if model_id != self._model_id:
+                self._model = LinearGate.load(self.path) if model_id[1] is not None else None
+                self._model_id = model_id
+            return self._model, model_id
+
+    def classify(self, image):
+        """(label, {kelas: probabilitas}); label OTHER untuk gambar datar, UNKNOWN bila belum
+        ada bobot hasil `train` atau probabilitas tertinggi < min_confidence."""
+        model, model_id = self.model()
+        key = self.cache.make_key(image_digest(image), 'gate', model_id, (self.min_confidence,))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        features = gate_features(image)
+        classes = model.classes if model is not None else (RICE, SCENE)
+        if is_flat(features):
+            result = (OTHER, {**{c: 0.0 for c in classes}, OTHER: 1.0})
+        elif model is None:
+            result = (UNKNOWN, {})
+        else:
+            probs = model.probabilities(features)
+            best = int(probs.argmax())
+            label = model.classes[best] if probs[best] >= self.min_confidence else UNKNOWN
+            result = (label, {c: float(p) for c, p in zip(model.classes, probs)})
+        self.cache.put(key, result)
+        return result
+
+
+input_gate = InputGate()
+
+
+# --- TRAIN / EVAL ---
+
+def _labelled_samples(sample_dir, other_dir=None):
+    samples = []
+    for path in sorted(glob.glob(os.path.join(sample_dir, '*.jpg'))):
+        name = os.path.basename(path).lower()
+        if name.startswith(RICE_PREFIXES):
+            samples.append((path, RICE))
+        elif name.startswith(SCENE_PREFIXES):
+            samples.append((path, SCENE))
+    if other_dir:
+        for ext in ('*.jpg', '*.jpeg', '*.png'):
+            samples += [(p, OTHER) for p in sorted(glob.glob(os.path.join(other_dir, ext)))]
+    return samples
+
+
+def train(samples, epochs=500, lr=0.5, l2=1e-3):
+    """Regresi logistik multinomial (gradient descent penuh) di atas fitur yang distandardisasi."""
+    classes = tuple(c for c in (RICE, SCENE, OTHER) if any(label == c for _, label in samples))
+    X = np.stack([gate_features(Image.open(p)) for p, _ in samples]).astype(np.float64)
+    y = np.array([classes.index(label) for _, label in samples])
+    mean, std = X.mean(axis=0), X.std(axis=0) + 1e-6
+    Xs = (X - mean) / std
+    onehot = np.eye(len(classes))[y]
+    W = np.zeros((X.shape[1], len(classes)))
+    b = np.zeros(len(classes))
+    for _ in range(epochs):
+        logits = Xs @ W + b
+        logits -= logits.max(axis=1, keepdims=True)
+        P = np.exp(logits)
+        P /= P.sum(axis=1, keepdims=True)
+        grad = (P - onehot) / len(y)
+        W -= lr * (Xs.T @ grad + l2 * W)
+        b -= lr * grad.sum(axis=0)
+    return LinearGate(W, b, mean, std, classes)
+
+
+def evaluate(gate, samples):
+    correct = 0
+    timings = []
+    for path, label in samples:
+        image = Image.open(path).convert('RGB')
+        gate.cache.clear()
+        t0 = time.perf_counter()
+        predicted, _ = gate.classify(image)
+        timings.append((time.perf_counter() - t0) * 1000)
+        correct += predicted == label
+    print(f"accuracy {correct}/{len(samples)}; gate latency p50 {np.percentile(timings, 50):.3f} ms, "
+          f"p95 {np.percentile(timings, 95):.3f} ms (includes image hash)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train / evaluate the content-based input gate.")
+    parser.add_argument('command', choices=['train', 'eval'])
+    parser.add_argument('--samples', default='sample image')
+    parser.add_argument('--other', default=None, help="folder of images that are neither rice nor scenes")
+    parser.add_argument('--output', default=GATE_MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    samples = _labelled_samples(args.samples, args.other)
+    if not samples:
+        print(f"No labelled images in {args.samples}", file=sys.stderr)
+        return 1
+    if args.command == 'train':
+        train(samples).save(args.output)
+        print(f"Saved {args.output}")
+        gate = InputGate(args.output)
+    else:
+        gate = InputGate(args.output)
+    evaluate(gate, samples)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# --- METRIK WAKTU PER TAHAP ---
+# Histogram durasi per tahap (decode, preprocess, inferensi, parsing, render, ...)
+# untuk seluruh proses. Diekspos sebagai panel Performance di halaman Analytics,
+# dump JSON, dan format teks Prometheus (endpoint /metrics di api.py atau file).
+
+# Batas bucket dalam detik (format Prometheus, kumulatif)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_NAME = "dashboard_stage_duration_seconds"
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # bucket terakhir = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        i = 0
+        while i < len(self.buckets) and seconds > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Perkiraan kuantil dari bucket (interpolasi linier di dalam bucket)."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen, lower = 0, 0.0
+        for i, c in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if seen + c >= rank and c > 0:
+                return lower + (upper - lower) * (rank - seen) / c
+            seen += c
+            lower = upper
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count, 'sum_s': self.sum, 'mean_ms': (self.sum / self.count * 1000) if self.count else 0.0,
+            'p50_ms': self.quantile(0.50) * 1000, 'p95_ms': self.quantile(0.95) * 1000,
+            'p99_ms': self.quantile(0.99) * 1000, 'max_ms': self.max * 1000,
+            'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts)),
+        }
+
+
+class StageMetrics:
+    """Registry histogram per nama tahap, aman dipakai dari banyak thread."""
+
+    def __init__(self):
+        self._hists = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            hist = self._hists.get(stage)
+            if hist is None:
+                hist = self._hists[stage] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def span(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def timed(self, stage):
+        """Decorator: catat durasi setiap pemanggilan fungsi sebagai `stage`."""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._hists.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {stage: hist.snapshot() for stage, hist in sorted(self._hists.items())}
+
+    def to_json(self, indent=2):
+        return json.dumps({'generated_at': time.time(), 'stages': self.snapshot()}, indent=indent)
+
+    def to_prometheus(self):
+        lines = [
+            f"# HELP {METRIC_NAME} Duration of dashboard pipeline stages.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for stage, snap in self.snapshot().items():
+            cumulative = 0
+            for le, c in snap['buckets'].items():
+                cumulative += c
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {snap["sum_s"]}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {snap["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Tulis format Prometheus ke file (mis. untuk textfile collector node_exporter)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+stage_metrics = StageMetrics()
+span = stage_metrics.span
+timed = stage_metrics.timed
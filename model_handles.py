@@ -0,0 +1,159 @@
+import gc
+import os
+import threading
+import time
+
+from backends import (
+    CLASSIFIER_BACKEND, DETECTOR_BACKEND, load_classifier_backend, load_detector_backend, served_model_path,
+)
+
+# --- MODEL HANDLES (LAZY LOAD + IDLE UNLOAD) ---
+# Setiap model dimuat saat pertama kali dipakai, bukan saat halaman dibuka.
+# Framework (TensorFlow / Ultralytics) juga baru diimpor di dalam loader,
+# sehingga replika yang hanya memakai satu model tidak menanggung memori model lain.
+
+YOLO_MODEL_PATH = "model/Shafa_Laporan 4.pt"
+CLASSIFIER_MODEL_PATH = "model/Shafa_Laporan 2.h5"
+
+# File yang benar-benar dipakai sesuai backend terpilih (lihat backends.py)
+YOLO_SERVED_PATH = served_model_path(YOLO_MODEL_PATH, DETECTOR_BACKEND)
+CLASSIFIER_SERVED_PATH = served_model_path(CLASSIFIER_MODEL_PATH, CLASSIFIER_BACKEND)
+
+# Model yang tidak dipakai selama TTL (detik) dilepas dari memori; 0 = tidak pernah
+MODEL_IDLE_TTL = float(os.environ.get("DASHBOARD_MODEL_IDLE_TTL", 900))
+REAPER_INTERVAL = float(os.environ.get("DASHBOARD_MODEL_REAPER_INTERVAL", 60))
+
+# Bila diisi, model dijalankan oleh pool proses terpisah (lihat model_worker.py)
+MODEL_WORKER_ADDRESS = os.environ.get("DASHBOARD_MODEL_WORKER_ADDRESS")
+
+
+class ModelLoadError(RuntimeError):
+    pass
+
+
+def load_yolo(path):
+    try:
+        from ultralytics import YOLO
+    except ImportError as e:
+        raise ModelLoadError("Ultralytics is not installed.") from e
+    if not os.path.exists(path):
+        raise ModelLoadError(f"FATAL: File Yolo NOT FOUND {path}")
+    return YOLO(path)
+
+
+def load_keras(path):
+    try:
+        import tensorflow as tf
+    except ImportError as e:
+        raise ModelLoadError("TensorFlow is not installed.") from e
+    if not os.path.exists(path):
+        raise ModelLoadError(f"FATAL: File Classifier NOT FOUND: {path}")
+    return tf.keras.models.load_model(path)
+
+
+def load_classifier(path):
+    """Muat classifier dengan backend terpilih (default: Keras dalam ClassifierEngine), atau proxy ke model worker."""
+    if MODEL_WORKER_ADDRESS:
+        from model_worker import RemoteClassifier, get_client
+        return RemoteClassifier(get_client(MODEL_WORKER_ADDRESS))
+    return load_classifier_backend(path, CLASSIFIER_BACKEND)
+
+
+def load_detector(path):
+    """Muat detektor YOLO dengan backend terpilih (default: PyTorch .pt), atau proxy ke model worker."""
+    if MODEL_WORKER_ADDRESS:
+        from model_worker import RemoteDetector, get_client
+        return RemoteDetector(get_client(MODEL_WORKER_ADDRESS))
+    return load_detector_backend(path, DETECTOR_BACKEND)
+
+
+class ModelHandle:
+    """Referensi ke satu model yang dimuat saat dibutuhkan dan dilepas saat idle."""
+
+    def __init__(self, name, path, loader, idle_ttl=MODEL_IDLE_TTL):
+        self.name = name
+        self.path = path
+        self.loader = loader
+        self.idle_ttl = idle_ttl
+        self.last_used = None
+        self.last_error = None
+        self._model = None
+        self._lock = threading.Lock()
+        self._preload_thread = None
+
+    @property
+    def is_loaded(self):
+        return self._model is not None
+
+    def get(self):
+        """Kembalikan model, memuatnya lebih dulu jika belum ada. Error loader diteruskan."""
+        with self._lock:
+            if self._model is None:
+                try:
+                    self._model = self.loader(self.path)
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = e
+                    raise
+            self.last_used = time.monotonic()
+            return self._model
+
+    def preload(self):
+        """Mulai memuat model di background thread (tidak memblokir render)."""
+        if self._model is not None or (self._preload_thread is not None and self._preload_thread.is_alive()):
+            return
+        self._preload_thread = threading.Thread(target=self._preload, name=f"preload-{self.name}", daemon=True)
+        self._preload_thread.start()
+
+    def _preload(self):
+        try:
+            self.get()
+        except Exception:
+            pass  # last_error sudah dicatat, akan dilaporkan saat get() berikutnya
+
+    def unload(self):
+        with self._lock:
+            if self._model is None:
+                return
+            self._model = None
+        gc.collect()
+
+    def evict_if_idle(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = (self._model is not None and self.idle_ttl > 0
+                    and self.last_used is not None and now - self.last_used > self.idle_ttl)
+        if idle:
+            self.unload()
+        return idle
+
+    def status(self):
+        return {
+            'name': self.name, 'path': self.path, 'loaded': self.is_loaded,
+            'idle_seconds': (time.monotonic() - self.last_used) if self.last_used is not None else None,
+            'last_error': str(self.last_error) if self.last_error else None,
+        }
+
+
+classifier_handle = ModelHandle('classifier', CLASSIFIER_MODEL_PATH, load_classifier)
+yolo_handle = ModelHandle('yolo', YOLO_MODEL_PATH, load_detector)
+HANDLES = {'classifier': classifier_handle, 'yolo': yolo_handle}
+
+_reaper_thread = None
+_reaper_lock = threading.Lock()
+
+
+def _reap_forever(interval):
+    while True:
+        time.sleep(interval)
+        for handle in HANDLES.values():
+            handle.evict_if_idle()
+
+
+def start_idle_reaper(interval=REAPER_INTERVAL):
+    """Jalankan (sekali per proses) thread yang melepas model idle."""
+    global _reaper_thread
+    with _reaper_lock:
+        if _reaper_thread is None:
+            _reaper_thread = threading.Thread(target=_reap_forever, args=(interval,), name="model-reaper", daemon=True)
+            _reaper_thread.start()
@@ -0,0 +1,383 @@
+"""Pool proses model di luar proses Streamlit (opsional).
+
+    python model_worker.py --address /tmp/dashboard-models --workers 2 --preload
+
+Setiap worker adalah proses terpisah yang memuat classifier dan YOLO (backend
+sesuai DASHBOARD_CLASSIFIER_BACKEND / DASHBOARD_DETECTOR_BACKEND) dan menerima
+tensor yang sudah dipreprocess lewat socket Unix `<address>/worker-<i>.sock`.
+`<address>` adalah direktori privat (0700) milik user yang menjalankan pool.
+Supervisor menulis `<address>/pool.json` (0600) berisi indeks worker dan authkey
+acak untuk pool ini (kecuali DASHBOARD_MODEL_WORKER_AUTHKEY diisi), mem-ping
+setiap worker secara berkala dan me-restart worker yang mati atau tidak menjawab.
+
+Proses dashboard / API memakai pool ini bila DASHBOARD_MODEL_WORKER_ADDRESS
+diisi alamat yang sama: model_handles lalu mengembalikan proxy remote, bukan
+memuat TensorFlow / Ultralytics di prosesnya sendiri. Dengan begitu jumlah
+proses UI bisa ditambah tanpa menggandakan memori model. Klien hanya terhubung
+ke worker yang tercantum di pool.json, dan hanya bila direktorinya privat.
+"""
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing as mp
+import os
+import queue
+import secrets
+import stat
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+logger = logging.getLogger("model_worker")
+
+# Tanpa nilai ini supervisor membuat authkey acak per pool dan membagikannya lewat pool.json
+WORKER_AUTHKEY = os.environ.get("DASHBOARD_MODEL_WORKER_AUTHKEY", "").encode() or None
+REQUEST_TIMEOUT = float(os.environ.get("DASHBOARD_MODEL_WORKER_TIMEOUT", 120))
+HEALTH_INTERVAL = 5.0  # detik antar ping supervisor
+HEALTH_TIMEOUT = 10.0  # ping yang tidak dijawab selama ini dihitung gagal
+MAX_HEALTH_FAILURES = 3  # gagal berturut-turut sebelum worker di-restart
+
+
+class WorkerUnavailable(RuntimeError):
+    pass
+
+
+def worker_socket(address, index):
+    return os.path.join(address, f"worker-{index}.sock")
+
+
+def pool_manifest(address):
+    return os.path.join(address, 'pool.json')
+
+
+def _check_private_dir(address):
+    """Tolak direktori pool yang bukan milik user ini atau bisa dibuka user lain."""
+    st = os.lstat(address)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise WorkerUnavailable(f"{address} must be a directory owned by this user with mode 0700")
+
+
+def _make_private_dir(address):
+    try:
+        os.mkdir(address, 0o700)
+    except FileExistsError:
+        pass
+    _check_private_dir(address)
+
+
+def read_manifest(address):
+    """(indeks worker, authkey) yang dilaporkan supervisor di pool.json."""
+    _check_private_dir(address)
+    with open(pool_manifest(address), encoding='utf-8') as f:
+        manifest = json.load(f)
+    return [int(i) for i in manifest['workers']], bytes.fromhex(manifest['authkey'])
+
+
+def _write_manifest(address, workers, authkey):
+    tmp = pool_manifest(address) + '.tmp'
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'workers': list(workers), 'authkey': authkey.hex()}, f)
+    os.replace(tmp, pool_manifest(address))
+
+
+# --- SISI WORKER ---
+
+class _WorkerModels:
+    """Model milik satu proses worker; setiap model dipakai satu request sekaligus."""
+
+    def __init__(self):
+        from backends import CLASSIFIER_BACKEND, DETECTOR_BACKEND, load_classifier_backend, load_detector_backend
+        from model_handles import CLASSIFIER_MODEL_PATH, YOLO_MODEL_PATH, ModelHandle
+
+        # idle_ttl=0: worker ada untuk menahan model di memori
+        self.classifier = ModelHandle('classifier', CLASSIFIER_MODEL_PATH,
+                                      lambda path: load_classifier_backend(path, CLASSIFIER_BACKEND), idle_ttl=0)
+        self.yolo = ModelHandle('yolo', YOLO_MODEL_PATH,
+                                lambda path: load_detector_backend(path, DETECTOR_BACKEND), idle_ttl=0)
+        self._locks = {'classifier': threading.Lock(), 'yolo': threading.Lock()}
+
+    def handle(self, op, payload):
+        if op == 'ping':
+            return {'pid': os.getpid(), 'models': {h.name: h.status() for h in (self.classifier, self.yolo)}}
+        if op == 'classify':
+            model = self.classifier.get()
+            with self._locks['classifier']:
+                return np.asarray(model.predict(payload))
+        if op == 'detect':
+            inputs, conf, iou = payload
+            model = self.yolo.get()
+            with self._locks['yolo']:
+                results = model(inputs, conf=conf, iou=iou, verbose=False)
+            return [r.boxes.data.cpu().numpy() for r in results]
+        raise ValueError(f"Unknown op {op!r}")
+
+
+def _serve_connection(conn, models):
+    with conn:
+        while True:
+            try:
+                op, payload = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                reply = ('ok', models.handle(op, payload))
+            except Exception as e:
+                reply = ('error', f"{type(e).__name__}: {e}")
+            try:
+                conn.send(reply)
+            except (BrokenPipeError, OSError):
+                return
+
+
+def _worker_main(path, authkey, preload):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s[%(process)d]: %(message)s')
+    os.umask(0o077)  # socket dibuat 0600 sejak bind, bukan di-chmod sesudahnya
+    if os.path.exists(path):
+        os.unlink(path)
+    models = _WorkerModels()
+    if preload:
+        models.classifier.preload()
+        models.yolo.preload()
+    with Listener(path, family='AF_UNIX', authkey=authkey) as listener:
+        logger.info("Worker listening on %s", path)
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, mp.AuthenticationError) as e:
+                logger.warning("Rejected connection: %s", e)
+                continue
+            threading.Thread(target=_serve_connection, args=(conn, models), daemon=True).start()
+
+
+class WorkerSupervisor:
+    """Menjalankan N proses worker, health check berkala, restart bila crash / macet."""
+
+    def __init__(self, address, n_workers=2, authkey=WORKER_AUTHKEY, preload=False,
+                 health_interval=HEALTH_INTERVAL, health_timeout=HEALTH_TIMEOUT, max_failures=MAX_HEALTH_FAILURES):
+        self.address = address
+        self.n_workers = n_workers
+        self.authkey = authkey or secrets.token_bytes(32)
+        self.preload = preload
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.max_failures = max_failures
+        self._ctx = mp.get_context('spawn')  # TensorFlow / PyTorch tidak aman di-fork
+        self._procs = [None] * n_workers
+        self._failures = [0] * n_workers
+        self.restarts = 0
+
+    def _spawn(self, i):
+        proc = self._ctx.Process(target=_worker_main, args=(worker_socket(self.address, i), self.authkey, self.preload),
+                                 name=f"model-worker-{i}", daemon=True)
+        proc.start()
+        self._procs[i] = proc
+        self._failures[i] = 0
+
+    def _restart(self, i, reason):
+        logger.warning("Restarting worker %d (%s)", i, reason)
+        proc = self._procs[i]
+        if proc.is_alive():
+            proc.terminate()
+            proc.join(5)
+            if proc.is_alive():
+                proc.kill()
+        proc.join()
+        self.restarts += 1
+        self._spawn(i)
+
+    def ping(self, i):
+        """True bila worker i menjawab ping dalam health_timeout."""
+        try:
+            with Client(worker_socket(self.address, i), family='AF_UNIX', authkey=self.authkey) as conn:
+                conn.send(('ping', None))
+                return conn.poll(self.health_timeout) and conn.recv()[0] == 'ok'
+        except (OSError, EOFError, mp.AuthenticationError):
+            return False
+
+    def check(self):
+        for i, proc in enumerate(self._procs):
+            if not proc.is_alive():
+                self._restart(i, f"exit code {proc.exitcode}")
+            elif self.ping(i):
+                self._failures[i] = 0
+            else:
+                self._failures[i] += 1
+                if self._failures[i] >= self.max_failures:
+                    self._restart(i, f"{self._failures[i]} failed health checks")
+
+    def start(self):
+        _make_private_dir(self.address)
+        for i in range(self.n_workers):
+            self._spawn(i)
+        _write_manifest(self.address, range(self.n_workers), self.authkey)
+
+    def stop(self):
+        for i, proc in enumerate(self._procs):
+            if proc is not None and proc.is_alive():
+                proc.terminate()
+                proc.join(5)
+            path = worker_socket(self.address, i)
+            if os.path.exists(path):
+                os.unlink(path)
+        if os.path.exists(pool_manifest(self.address)):
+            os.unlink(pool_manifest(self.address))
+
+    def run_forever(self):
+        self.start()
+        try:
+            while True:
+                time.sleep(self.health_interval)
+                self.check()
+        finally:
+            self.stop()
+
+
+# --- SISI KLIEN (PROSES DASHBOARD / API) ---
+
+class WorkerClient:
+    """Kirim request ke worker pool: round-robin, koneksi dipakai ulang, pindah worker bila gagal."""
+
+    def __init__(self, address, authkey=WORKER_AUTHKEY, timeout=REQUEST_TIMEOUT):
+        self.address = address
+        self.authkey = authkey  # None: pakai authkey dari pool.json
+        self.timeout = timeout
+        self._idle = {}  # path socket -> Queue koneksi idle
+        self._lock = threading.Lock()
+        self._next = itertools.count()
+        self._manifest_mtime = None
+        self._paths = []
+        self._pool_authkey = None
+
+    def sockets(self):
+        """Socket worker yang dilaporkan supervisor (dibaca ulang bila pool.json berubah)."""
+        try:
+            mtime = os.stat(pool_manifest(self.address)).st_mtime_ns
+        except FileNotFoundError:
+            raise WorkerUnavailable(f"No model worker pool at {self.address} (missing pool.json)") from None
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                try:
+                    workers, authkey = read_manifest(self.address)
+                except (OSError, ValueError, KeyError) as e:
+                    raise WorkerUnavailable(f"Invalid model worker pool manifest: {e}") from e
+                if authkey != self._pool_authkey:
+                    self._idle = {}  # pool baru: koneksi lama tidak berlaku
+                self._paths = [worker_socket(self.address, i) for i in workers]
+                self._pool_authkey = authkey
+                self._manifest_mtime = mtime
+            return list(self._paths)
+
+    def _checkout(self, path):
+        with self._lock:
+            pool = self._idle.setdefault(path, queue.SimpleQueue())
+            authkey = self.authkey or self._pool_authkey
+        try:
+            return pool.get_nowait()
+        except queue.Empty:
+            return Client(path, family='AF_UNIX', authkey=authkey)
+
+    def _checkin(self, path, conn):
+        with self._lock:
+            self._idle.setdefault(path, queue.SimpleQueue()).put(conn)
+
+    def call(self, op, payload=None):
+        paths = self.sockets()
+        if not paths:
+            raise WorkerUnavailable(f"No model workers listed in {pool_manifest(self.address)}")
+        start = next(self._next)
+        last_error = None
+        for k in range(len(paths)):
+            path = paths[(start + k) % len(paths)]
+            try:
+                conn = self._checkout(path)
+            except (OSError, mp.AuthenticationError) as e:
+                last_error = e
+                continue
+            try:
+                conn.send((op, payload))
+                if not conn.poll(self.timeout):
+                    raise TimeoutError(f"Model worker {path} did not answer within {self.timeout:.0f}s")
+                status, reply = conn.recv()
+            except (OSError, EOFError, TimeoutError) as e:
+                # Worker crash / restart: buang koneksi, coba worker berikutnya
+                conn.close()
+                last_error = e
+                continue
+            self._checkin(path, conn)
+            if status != 'ok':
+                raise RuntimeError(f"Model worker error: {reply}")
+            return reply
+        raise WorkerUnavailable(f"All model workers failed: {last_error}")
+
+
+class RemoteClassifier:
+    """Pengganti classifier lokal: predict(batch NHWC float32) -> probabilitas (N, kelas)."""
+
+    def __init__(self, client):
+        self.client = client
+        self.client.call('ping')  # gagal cepat bila pool belum berjalan
+
+    def predict(self, batch):
+        return self.client.call('classify', np.ascontiguousarray(batch, dtype=np.float32))
+
+
+class _RemoteBoxes:
+    def __init__(self, data):
+        self.data = data
+
+
+class _RemoteResult:
+    """Bagian Results Ultralytics yang dibaca _detection_result: r.boxes.data (N, 6)."""
+
+    def __init__(self, data):
+        self.boxes = _RemoteBoxes(data)
+
+
+class RemoteDetector:
+    """Pengganti model YOLO lokal: dipanggil seperti YOLO(...)(source, conf=, iou=)."""
+
+    def __init__(self, client):
+        self.client = client
+        self.client.call('ping')
+
+    def __call__(self, source, conf, iou, verbose=False):
+        inputs = source if isinstance(source, list) else [source]
+        return [_RemoteResult(data) for data in self.client.call('detect', (inputs, conf, iou))]
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(address):
+    with _clients_lock:
+        if address not in _clients:
+            _clients[address] = WorkerClient(address)
+        return _clients[address]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Out-of-process model worker pool.")
+    parser.add_argument('--address', default=os.environ.get("DASHBOARD_MODEL_WORKER_ADDRESS", "/tmp/dashboard-models"),
+                        help="private (0700) directory; workers listen on <address>/worker-<i>.sock")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--preload', action='store_true', help="load both models at worker start")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    supervisor = WorkerSupervisor(args.address, args.workers, preload=args.preload)
+    logger.info("Starting %d model workers in %s", args.workers, args.address)
+    try:
+        supervisor.run_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+import copy
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import combinations
+
+import numpy as np
+
+from input_gate import THUMBNAIL_SIZE, thumbnail
+
+# --- NEAR-DUPLICATE (HASH PERSEPTUAL + MULTI-INDEX HASHING) ---
+# Hash konten (inference_cache.image_digest) hanya cocok untuk piksel yang identik.
+# Foto yang di-upload ulang setelah di-encode ulang, di-resize atau sedikit di-crop
+# mendapat digest baru, padahal hasil modelnya praktis sama. Di sini setiap hasil
+# model disimpan bersama hash perseptual 64-bit (pHash dari thumbnail yang juga
+# dipakai input gate), per kombinasi task + model + threshold. Gambar dalam jarak
+# Hamming <= NEAR_DUP_MAX_DISTANCE memakai ulang hasil sebelumnya tanpa memanggil
+# model. Hash dipecah menjadi 4 blok 16 bit dengan tabel hash per blok
+# (multi-index hashing), sehingga lookup hanya memeriksa beberapa bucket, bukan
+# menelusuri seluruh indeks.
+
+# Korpus sample image/: jarak terkecil antar gambar yang berbeda adalah 6, jadi
+# batas harus di bawahnya (cek dengan benchmarks/near_duplicates.py)
+NEAR_DUP_MAX_DISTANCE = int(os.environ.get("DASHBOARD_NEAR_DUP_MAX_DISTANCE", 4))  # < 0 = nonaktif
+NEAR_DUP_MAX_ENTRIES = int(os.environ.get("DASHBOARD_NEAR_DUP_MAX_ENTRIES", 20_000))
+HASH_SIZE = 8  # 8x8 koefisien DCT -> 64 bit
+HASH_BLOCKS = 4
+BLOCK_BITS = HASH_SIZE * HASH_SIZE // HASH_BLOCKS
+BLOCK_MASK = (1 << BLOCK_BITS) - 1
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0] /= np.sqrt(2.0)
+    return m.astype(np.float32)
+
+
+_DCT = _dct_matrix(THUMBNAIL_SIZE)
+_BIT_WEIGHTS = 1 << np.arange(HASH_SIZE * HASH_SIZE - 1, -1, -1, dtype=np.uint64)
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def gray_thumbnail(image):
+    """Luminans thumbnail (float32 THUMBNAIL_SIZE x THUMBNAIL_SIZE, 0-255)."""
+    return thumbnail(image).astype(np.float32) @ _LUMA
+
+
+def perceptual_hash(image, gray=None):
+    """pHash 64-bit: frekuensi rendah DCT luminans thumbnail dibandingkan dengan mediannya."""
+    gray = gray_thumbnail(image) if gray is None else gray
+    low = (_DCT @ gray @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = low > np.median(low[1:])  # koefisien DC (kecerahan rata-rata) tidak ikut menentukan median
+    return int((bits.astype(np.uint64) * _BIT_WEIGHTS).sum())
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _blocks(key):
+    return [(key >> (BLOCK_BITS * i)) & BLOCK_MASK for i in range(HASH_BLOCKS)]
+
+
+@lru_cache(maxsize=8)
+def _flip_masks(radius):
+    """Semua mask BLOCK_BITS bit dengan paling banyak `radius` bit menyala (termasuk 0)."""
+    masks = [0]
+    for r in range(1, radius + 1):
+        masks += [sum(1 << b for b in bits) for bits in combinations(range(BLOCK_BITS), r)]
+    return tuple(masks)
+
+
+class MultiIndexHash:
+    """Hash 64-bit -> value, dengan pencarian radius Hamming lewat HASH_BLOCKS tabel blok.
+
+    Dua hash berjarak <= r berbeda paling banyak r // HASH_BLOCKS bit di salah satu
+    blok (pigeonhole). Kandidat diambil dari bucket blok dalam radius itu, lalu
+    jarak penuhnya dicek. Untuk r <= 7 itu 17 bucket per blok.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._tables = [{} for _ in range(HASH_BLOCKS)]
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def add(self, key, value):
+        if key not in self._values:
+            for table, block in zip(self._tables, _blocks(key)):
+                table.setdefault(block, set()).add(key)
+        self._values[key] = value  # hash sama: simpan hasil terbaru
+
+    def remove(self, key):
+        if key not in self._values:
+            return
+        del self._values[key]
+        for table, block in zip(self._tables, _blocks(key)):
+            bucket = table[block]
+            bucket.discard(key)
+            if not bucket:
+                del table[block]
+
+    def nearest(self, key, max_distance):
+        """(jarak, value) terdekat dalam max_distance, atau None."""
+        if max_distance < 0 or not self._values:
+            return None
+        if key in self._values:
+            return 0, self._values[key]
+        best = None
+        masks = _flip_masks(max_distance // HASH_BLOCKS)
+        for table, block in zip(self._tables, _blocks(key)):
+            for mask in masks:
+                for candidate in table.get(block ^ mask, ()):
+                    d = hamming(key, candidate)
+                    if d <= max_distance and (best is None or d < best[0]):
+                        best = (d, candidate)
+        return None if best is None else (best[0], self._values[best[1]])
+
+
+class NearDuplicateIndex:
+    """Hasil model per namespace (task + model + threshold), dicari lewat hash perseptual."""
+
+    def __init__(self, max_distance=NEAR_DUP_MAX_DISTANCE, max_entries=NEAR_DUP_MAX_ENTRIES):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self._indexes = {}
+        self._order = OrderedDict()  # (namespace, hash) sesuai urutan masuk; yang terlama dibuang saat penuh
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_distance >= 0 and self.max_entries > 0
+
+    def lookup(self, namespace, key):
+        """(hasil tersimpan (salinan), data tambahan, jarak Hamming) dari gambar terdekat, atau None."""
+        with self._lock:
+            index = self._indexes.get(namespace)
+            match = index.nearest(key, self.max_distance) if index is not None else None
+            if match is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            distance, (result, extra) = match
+        return copy.deepcopy(result), extra, distance
+
+    def add(self, namespace, key, result, extra=None):
+        value = (copy.deepcopy(result), extra)
+        with self._lock:
+            self._indexes.setdefault(namespace, MultiIndexHash()).add(key, value)
+            self._order[(namespace, key)] = None
+            self._order.move_to_end((namespace, key))  # hash yang sudah ada hanya diperbarui, tidak digandakan
+            while len(self._order) > self.max_entries:
+                (old_namespace, old_key), _ = self._order.popitem(last=False)
+                self._indexes[old_namespace].remove(old_key)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+            self._order.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {'entries': len(self._order), 'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': (self.hits / total) if total else 0.0, 'max_distance': self.max_distance}
+
+
+near_duplicate_index = NearDuplicateIndex()
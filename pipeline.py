@@ -0,0 +1,280 @@
+import contextvars
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from image_ops import get_ops
+from inference import (
+    BATCH_SIZE, CLASSIFICATION_CATEGORIES, CLASSIFIER_INPUT_SIZE, DECODE_MAX_SIDE, DETECTION_CLASSES,
+    YOLO_CONF_THRESHOLD, YOLO_IOU_THRESHOLD, _busy_result, _classification_cache_key, _classification_error,
+    _classification_rejection, _classification_result, _detection_cache_key, _detection_error,
+    _BatchDuplicates, _copy_result, _detection_model_unavailable, _detection_rejection, _detection_result,
+    _lookup_result, _store_result, _yolo_input, decode_image, get_classifier, get_yolo_model,
+)
+from metrics import span
+from preprocessing import preprocess_batch
+from scheduler import SchedulerBusy, classifier_scheduler, yolo_scheduler
+
+# --- PIPELINE DECODE -> PREPROCESS -> INFER -> POSTPROCESS ---
+# Batch biasa menjalankan tahap satu per satu: decode semua gambar, resize, baru
+# model.predict, lalu format hasil, sehingga CPU menganggur di satu tahap selagi
+# tahap lain bekerja. Di sini decode + filter input + resize/letterbox berjalan di
+# thread pool (PIL dan OpenCV melepas GIL), inferensi di satu thread khusus yang
+# membentuk batch dari item yang sudah siap, dan pembentukan hasil + cache
+# (termasuk indeks near-duplicate) di thread lain. Antar tahap dipakai antrean
+# terbatas (memori konstan), dan hasil dikeluarkan sesuai urutan input.
+
+PIPELINE_WORKERS = int(os.environ.get("DASHBOARD_PIPELINE_WORKERS", min(4, os.cpu_count() or 1)))
+PIPELINE_QUEUE_SIZE = int(os.environ.get("DASHBOARD_PIPELINE_QUEUE_SIZE", 64))
+TASKS = ('classify', 'detect')
+QUEUE_POLL_INTERVAL = 0.1
+
+_END = object()
+
+
+class _Failure:
+    __slots__ = ('error',)
+
+    def __init__(self, error):
+        self.error = error
+
+
+class PipelineItem:
+    """Satu gambar yang melewati pipeline. Setelah keluar, hanya name/result/error/ukuran yang tersisa."""
+
+    __slots__ = ('index', 'name', 'size', 'original_size', 'cache_key', 'fingerprint', 'model_input', 'letterbox',
+                 'prediction', 'source', 'distance', 'result', 'error')
+
+    def __init__(self, index, name):
+        self.index = index
+        self.name = name
+        self.size = self.original_size = None
+        self.cache_key = self.fingerprint = self.model_input = self.letterbox = self.prediction = None
+        self.source = self.distance = None  # item sebelumnya yang hasilnya disalin (duplikat dalam run)
+        self.result = None
+        self.error = None  # "Tipe: pesan" bila decode / persiapan gagal (result tetap None)
+
+    @property
+    def needs_model(self):
+        return self.result is None and self.error is None
+
+
+def _put(q, item, stop):
+    """put() yang berhenti menunggu saat pipeline dihentikan."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=QUEUE_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=QUEUE_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+    return _END
+
+
+class InferencePipeline:
+    """Klasifikasi / deteksi banyak gambar dengan tahap yang saling tumpang tindih.
+
+    pipeline = InferencePipeline('classify', workers=4)
+    for item in pipeline.run([(name, path_or_file_or_pil), ...]):
+        item.name, item.result, item.error
+    """
+
+    def __init__(self, task, batch_size=BATCH_SIZE, workers=PIPELINE_WORKERS, queue_size=PIPELINE_QUEUE_SIZE,
+                 max_side=DECODE_MAX_SIDE):
+        if task not in TASKS:
+            raise ValueError(f"Unknown task {task!r}, expected one of {TASKS}")
+        self.task = task
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.max_side = max_side
+        self.ops = get_ops()
+
+    # --- tahap 1: decode + filter + cache + resize/letterbox (thread pool) ---
+
+    def _prepare(self, index, name, source):
+        item = PipelineItem(index, name)
+        classify = self.task == 'classify'
+        try:
+            with span('pipeline.decode'):
+                image = source if isinstance(source, Image.Image) else decode_image(source, max_side=self.max_side)
+            item.size = image.size
+            item.original_size = image.info.get('original_size', image.size)
+
+            rejection = _classification_rejection(image) if classify else _detection_rejection(image)
+            if rejection is not None:
+                item.result = rejection
+                return item
+            item.cache_key = _classification_cache_key(image) if classify else _detection_cache_key(image)
+            item.result, item.fingerprint = _lookup_result(image, item.cache_key)
+            if item.result is not None:
+                return item
+
+            with span('pipeline.preprocess'):
+                if classify:
+                    item.model_input = self.ops.resize(image, CLASSIFIER_INPUT_SIZE)
+                else:
+                    item.model_input, item.letterbox = _yolo_input(image)
+        except Exception as e:
+            item.error = f"{type(e).__name__}: {e}"
+        return item
+
+    def _feed(self, sources, pool, prepared, stop):
+        try:
+            for index, (name, source) in enumerate(sources):
+                if not _put(prepared, pool.submit(self._prepare, index, name, source), stop):
+                    return
+            _put(prepared, _END, stop)
+        except BaseException as e:
+            _put(prepared, _Failure(e), stop)
+
+    # --- tahap 2: inferensi (satu thread, batch dari item yang sudah siap) ---
+
+    def _infer(self, pending):
+        classify = self.task == 'classify'
+        try:
+            if classify:
+                model = get_classifier()
+                if model is None:
+                    raise RuntimeError("Model Klasifikasi tidak dapat dimuat.")
+                batch = preprocess_batch([item.model_input for item in pending])
+                with classifier_scheduler.slot(), span('pipeline.inference'):
+                    predictions = model.predict(batch)
+            else:
+                model = get_yolo_model()
+                if model is None:
+                    for item in pending:
+                        item.result = _detection_model_unavailable()
+                    return
+                with yolo_scheduler.slot(), span('pipeline.inference'):
+                    predictions = model([item.model_input for item in pending],
+                                        conf=YOLO_CONF_THRESHOLD, iou=YOLO_IOU_THRESHOLD, verbose=False)
+        except SchedulerBusy:
+            for item in pending:
+                item.result = _busy_result('Classification' if classify else 'Detection',
+                                           CLASSIFICATION_CATEGORIES if classify else DETECTION_CLASSES)
+            return
+        except Exception as e:
+            for item in pending:
+                item.result = _classification_error(e) if classify else _detection_error(e)
+            return
+        for item, prediction in zip(pending, predictions):
+            item.prediction = prediction
+            item.model_input = None
+
+    def _infer_loop(self, prepared, inferred, stop):
+        carry = None
+        # Duplikat yang disiapkan sebelum hasil sumbernya tersimpan di cache; cukup sebanyak item yang sedang diproses
+        duplicates = _BatchDuplicates(max_sources=2 * self.queue_size + self.batch_size)
+        try:
+            while True:
+                head = carry if carry is not None else _get(prepared, stop)
+                carry = None
+                if head is _END or isinstance(head, _Failure):
+                    _put(inferred, head, stop)
+                    return
+                batch = [head.result()]
+                # Tambahkan item yang sudah selesai disiapkan; yang belum, tunggu di batch berikutnya
+                while len(batch) < self.batch_size:
+                    try:
+                        nxt = prepared.get_nowait()
+                    except queue.Empty:
+                        break
+                    if nxt is _END or isinstance(nxt, _Failure) or not nxt.done():
+                        carry = nxt
+                        break
+                    batch.append(nxt.result())
+                pending = []
+                for item in batch:
+                    if not item.needs_model:
+                        continue
+                    match = duplicates.source_of(item, item.cache_key, item.fingerprint)
+                    if match is None:
+                        pending.append(item)
+                    else:
+                        item.source, item.distance = match
+                        item.model_input = None
+                if pending:
+                    self._infer(pending)
+                if not _put(inferred, batch, stop):
+                    return
+        except BaseException as e:
+            if not stop.is_set():
+                _put(inferred, _Failure(e), stop)
+
+    # --- tahap 3: pembentukan hasil + cache ---
+
+    def _postprocess_loop(self, inferred, done, stop):
+        try:
+            while True:
+                batch = _get(inferred, stop)
+                if batch is _END or isinstance(batch, _Failure):
+                    _put(done, batch, stop)
+                    return
+                with span('pipeline.postprocess'):
+                    for item in batch:
+                        if item.source is not None:
+                            # Sumber ada lebih dulu di urutan input, jadi hasilnya sudah dibentuk
+                            item.result = _copy_result(item.source.result, item.source.size, item.cache_key,
+                                                       item.size, item.distance)
+                            item.source = None
+                        elif item.prediction is not None:
+                            if self.task == 'classify':
+                                item.result = _classification_result(item.prediction)
+                            else:
+                                item.result = _detection_result(item.prediction, item.letterbox)
+                            _store_result(item.cache_key, item.result, item.fingerprint)
+                        item.model_input = item.prediction = item.letterbox = None
+                for item in batch:
+                    if not _put(done, item, stop):
+                        return
+        except BaseException as e:
+            if not stop.is_set():
+                _put(done, _Failure(e), stop)
+
+    def run(self, sources):
+        """Iterasi PipelineItem sesuai urutan `sources` ((nama, PIL Image / path / file-like), ...)."""
+        stop = threading.Event()
+        prepared = queue.Queue(maxsize=self.queue_size)
+        inferred = queue.Queue(maxsize=max(1, self.queue_size // self.batch_size))
+        done = queue.Queue(maxsize=self.queue_size)
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pipeline-prepare')
+        # Thread inferensi memakai context pemanggil (current_session untuk antrean adil scheduler)
+        context = contextvars.copy_context()
+        threads = [
+            threading.Thread(target=self._feed, args=(sources, pool, prepared, stop), name='pipeline-feed', daemon=True),
+            threading.Thread(target=context.run, args=(self._infer_loop, prepared, inferred, stop),
+                             name='pipeline-infer', daemon=True),
+            threading.Thread(target=self._postprocess_loop, args=(inferred, done, stop),
+                             name='pipeline-postprocess', daemon=True),
+        ]
+        for t in threads:
+            t.start()
+        try:
+            while True:
+                item = done.get()
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            for t in threads:
+                t.join()
+
+    def predict(self, sources):
+        """Semua hasil sebagai list (urutan input)."""
+        return list(self.run(sources))
@@ -0,0 +1,58 @@
+import threading
+
+import numpy as np
+
+from image_ops import get_ops
+
+# --- PREPROCESSING CLASSIFIER (FLOAT32, BUFFER DIPAKAI ULANG) ---
+# `np.array(img) / 255.0` membuat array float64 per gambar, lalu expand_dims
+# dan cast balik ke float32 di Keras. Di sini piksel uint8 ditulis langsung ke
+# buffer batch float32 yang dialokasikan sekali per thread, lalu diskalakan in-place.
+# Pembagian float32 dengan 255 memberi nilai yang sama persis dengan
+# float32(x / 255.0) untuk x = 0..255, jadi prediksi tidak berubah.
+
+CLASSIFIER_INPUT_SIZE = (128, 128)
+
+
+class BatchBuffer:
+    """Buffer NHWC float32 yang tumbuh sesuai kebutuhan dan dipakai ulang antar pemanggilan."""
+
+    def __init__(self, size=CLASSIFIER_INPUT_SIZE, capacity=32, ops=None):
+        self.size = size
+        self.ops = ops or get_ops()
+        self._buf = np.empty((capacity, size[1], size[0], 3), dtype=np.float32)
+
+    def fill(self, images):
+        """Tulis gambar (PIL atau array RGB uint8) ke buffer dan kembalikan view (N, H, W, 3) bernilai 0-1.
+
+        View ini ditimpa oleh pemanggilan berikutnya dari thread yang sama; pakai
+        (mis. model.predict) sebelum memanggil fill lagi.
+        """
+        n = len(images)
+        if n > self._buf.shape[0]:
+            self._buf = np.empty((n,) + self._buf.shape[1:], dtype=np.float32)
+        batch = self._buf[:n]
+        for i, image in enumerate(images):
+            size = image.shape[1::-1] if isinstance(image, np.ndarray) else image.size
+            pixels = image if size == self.size else self.ops.resize(image, self.size)
+            np.copyto(batch[i], np.asarray(pixels), casting='unsafe')
+        np.divide(batch, np.float32(255.0), out=batch)
+        return batch
+
+
+_local = threading.local()
+
+
+def _thread_buffer(size, ops):
+    buffers = getattr(_local, 'buffers', None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    key = (size, ops.name)
+    if key not in buffers:
+        buffers[key] = BatchBuffer(size, ops=ops)
+    return buffers[key]
+
+
+def preprocess_batch(images, size=CLASSIFIER_INPUT_SIZE, ops=None):
+    """Resize + tumpuk gambar ke buffer float32 milik thread ini (lihat BatchBuffer.fill)."""
+    return _thread_buffer(size, ops or get_ops()).fill(images)
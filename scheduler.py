@@ -0,0 +1,126 @@
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from metrics import stage_metrics
+
+# --- PENJADWALAN INFERENSI (ADMISSION CONTROL + FAIR QUEUE) ---
+# Setiap sesi Streamlit (dan setiap request API) berjalan di thread sendiri dan
+# memanggil model bersama secara bersamaan. Scheduler membatasi jumlah pemanggilan
+# serentak per model. Pemanggil yang harus menunggu diantrekan FIFO per sesi, dan
+# slot yang bebas dibagikan bergiliran antar sesi, sehingga satu sesi yang
+# mengirim banyak batch tidak menghabiskan giliran sesi lain. Bila antrean penuh
+# (atau menunggu terlalu lama), pemanggil mendapat SchedulerBusy ("sibuk, coba lagi").
+
+INFERENCE_CONCURRENCY = int(os.environ.get("DASHBOARD_INFERENCE_CONCURRENCY", 1))
+INFERENCE_MAX_QUEUE = int(os.environ.get("DASHBOARD_INFERENCE_MAX_QUEUE", 16))
+INFERENCE_MAX_WAIT = float(os.environ.get("DASHBOARD_INFERENCE_MAX_WAIT", 30))
+
+# Sesi pemanggil saat ini (diisi dashboard per rerun / API per request)
+current_session = contextvars.ContextVar('inference_session', default=None)
+
+
+class SchedulerBusy(RuntimeError):
+    pass
+
+
+class _Ticket:
+    __slots__ = ('granted',)
+
+    def __init__(self):
+        self.granted = False
+
+
+class InferenceScheduler:
+    """Batas konkurensi untuk satu model dengan antrean FIFO per sesi yang dilayani round-robin."""
+
+    def __init__(self, name, max_concurrency=INFERENCE_CONCURRENCY, max_queue=INFERENCE_MAX_QUEUE,
+                 max_wait=INFERENCE_MAX_WAIT, metrics=stage_metrics):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.metrics = metrics
+        self.rejected = 0
+        self._active = 0
+        self._depth = 0
+        self._queues = OrderedDict()  # session -> deque[_Ticket], urutan = giliran berikutnya
+        self._cond = threading.Condition()
+
+    def acquire(self, session=None):
+        """Ambil satu slot (menunggu bila perlu). Mengembalikan lama menunggu dalam detik."""
+        t0 = time.perf_counter()
+        with self._cond:
+            if self._active < self.max_concurrency and self._depth == 0:
+                self._active += 1
+                return self._observe_wait(t0)
+            if self._depth >= self.max_queue:
+                self.rejected += 1
+                raise SchedulerBusy(f"{self.name}: {self._depth} requests already queued")
+
+            ticket = _Ticket()
+            self._queues.setdefault(session, deque()).append(ticket)
+            self._depth += 1
+            deadline = time.monotonic() + self.max_wait
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._withdraw(session, ticket)
+                    self.rejected += 1
+                    raise SchedulerBusy(f"{self.name}: no slot within {self.max_wait:.0f}s")
+                self._cond.wait(remaining)
+        return self._observe_wait(t0)
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._grant_next()
+
+    def _grant_next(self):
+        while self._queues and self._active < self.max_concurrency:
+            session, tickets = next(iter(self._queues.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                self._queues.move_to_end(session)  # sesi ini kembali ke akhir giliran
+            else:
+                del self._queues[session]
+            self._depth -= 1
+            ticket.granted = True
+            self._active += 1
+        self._cond.notify_all()
+
+    def _withdraw(self, session, ticket):
+        tickets = self._queues.get(session)
+        if tickets is not None and ticket in tickets:
+            tickets.remove(ticket)
+            self._depth -= 1
+            if not tickets:
+                del self._queues[session]
+
+    def _observe_wait(self, t0):
+        waited = time.perf_counter() - t0
+        self.metrics.observe(f'queue.{self.name}.wait', waited)
+        return waited
+
+    @contextlib.contextmanager
+    def slot(self, session=None):
+        """`with scheduler.slot(): model(...)`. Sesi default diambil dari current_session."""
+        self.acquire(current_session.get() if session is None else session)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def status(self):
+        with self._cond:
+            return {'name': self.name, 'active': self._active, 'queued': self._depth,
+                    'sessions_waiting': len(self._queues), 'max_concurrency': self.max_concurrency,
+                    'max_queue': self.max_queue, 'rejected': self.rejected}
+
+
+classifier_scheduler = InferenceScheduler('classifier')
+yolo_scheduler = InferenceScheduler('yolo')
+SCHEDULERS = {'classifier': classifier_scheduler, 'yolo': yolo_scheduler}
@@ -0,0 +1,171 @@
+"""Batch scorer untuk folder gambar (tanpa UI).
+
+    python -m dashboard score "sample image" --task classify --output scores.csv
+    python -m dashboard score /data/cctv --task detect --output scores.jsonl --workers 8
+
+Gambar diproses lewat InferencePipeline (pipeline.py): decode + resize di thread
+pool, inferensi per batch di thread khusus, dan setiap batch hasil langsung
+ditulis ke CSV/JSONL. File yang sudah berstatus OK / REJECTED di output
+dilewati, sehingga run yang terputus bisa dilanjutkan dengan perintah yang sama;
+baris ERROR dan BUSY (antrean inferensi penuh) dicoba lagi.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from inference import BATCH_SIZE, CLASSIFIER_INPUT_SIZE
+from metrics import stage_metrics
+from pipeline import PIPELINE_WORKERS, InferencePipeline
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+DETECTION_MAX_SIDE = 640  # YOLO me-letterbox ke ~640, decode lebih besar tidak berguna
+
+CSV_FIELDS = ['file', 'task', 'class', 'confidence', 'total_objects', 'status', 'error']
+# Status yang tidak diproses ulang saat resume; ERROR dan BUSY dicoba lagi
+DONE_STATUSES = ('OK', 'REJECTED')
+
+
+def iter_images(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.relpath(os.path.join(dirpath, name), root)
+
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ResultWriter:
+    """Menulis hasil secara inkremental ke .csv atau .jsonl (append)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.jsonl = path.lower().endswith(('.jsonl', '.ndjson'))
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._f = open(path, 'a', newline='', encoding='utf-8')
+        if not self.jsonl:
+            self._csv = csv.DictWriter(self._f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            if new_file:
+                self._csv.writeheader()
+
+    @staticmethod
+    def done_files(path):
+        """Nama file yang baris terakhirnya di output berstatus DONE_STATUSES (untuk resume)."""
+        if not os.path.exists(path):
+            return set()
+        status = {}
+        with open(path, newline='', encoding='utf-8') as f:
+            if path.lower().endswith(('.jsonl', '.ndjson')):
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                        status[row['file']] = row.get('status')
+                    except (ValueError, KeyError, TypeError):
+                        continue  # baris terakhir bisa terpotong jika run sebelumnya dihentikan
+            else:
+                for row in csv.DictReader(f):
+                    if row.get('file'):
+                        status[row['file']] = row.get('status')
+        return {name for name, s in status.items() if s in DONE_STATUSES}
+
+    def write(self, rows):
+        for row in rows:
+            if self.jsonl:
+                self._f.write(json.dumps(row, default=lambda o: o.item() if isinstance(o, np.generic) else str(o)) + '\n')
+            else:
+                self._csv.writerow(row)
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+def _status(result):
+    # "Tidak ada objek" adalah hasil model yang sah, bukan error yang perlu diulang
+    if 'error_message' not in result or result['class'] == "OBJEK TIDAK DITEMUKAN":
+        return 'OK'
+    if result.get('retry'):
+        return 'BUSY'
+    return 'REJECTED' if result['class'] == "INPUT TIDAK COCOK" else 'ERROR'
+
+
+def _to_row(rel_path, task, result, scale):
+    row = {
+        'file': rel_path, 'task': task, 'class': result['class'],
+        'confidence': round(float(result['confidence']), 4),
+        'status': _status(result),
+        'error': result.get('error_message', ''),
+    }
+    if result.get('reused'):
+        row['reused_distance'] = result['reused']['distance']  # hanya JSONL; kolom CSV tetap
+    if task == 'detect':
+        row['total_objects'] = result['total_objects']
+        # Box dikembalikan ke koordinat gambar asli
+        row['objects'] = [dict(obj, bbox=[v / scale for v in obj['bbox']]) for obj in result['objects']]
+    else:
+        row['probabilities'] = {k: round(float(v), 4) for k, v in result['probabilities'].items()}
+    return row
+
+
+def _item_row(item, task):
+    if item.error:
+        return {'file': item.name, 'task': task, 'class': 'DECODE ERROR', 'confidence': 0.0, 'status': 'ERROR',
+                'error': item.error}
+    return _to_row(item.name, task, item.result, item.size[0] / item.original_size[0])
+
+
+def score(root, task, output, batch_size=BATCH_SIZE, workers=None, log=print):
+    done = ResultWriter.done_files(output)
+    todo = ((p, os.path.join(root, p)) for p in iter_images(root) if p not in done)
+    max_side = 2 * max(CLASSIFIER_INPUT_SIZE) if task == 'classify' else DETECTION_MAX_SIDE
+    pipeline = InferencePipeline(task, batch_size, workers or PIPELINE_WORKERS, max_side=max_side)
+
+    writer = ResultWriter(output)
+    scored, t0 = 0, time.perf_counter()
+    try:
+        for batch in _batched(pipeline.run(todo), batch_size):
+            writer.write([_item_row(item, task) for item in batch])
+            scored += len(batch)
+            log(f"{scored} scored, {scored / (time.perf_counter() - t0):.1f} img/s")
+    finally:
+        writer.close()
+    log(f"Done: {scored} new, {len(done)} skipped (already in {output})")
+    return scored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m dashboard score', description="Score a directory of images.")
+    parser.add_argument('directory')
+    parser.add_argument('--task', choices=('classify', 'detect'), required=True)
+    parser.add_argument('--output', default=None, help="Output .csv or .jsonl (default: scores_<task>.csv)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help=f"Decode / preprocess threads (default: {PIPELINE_WORKERS})")
+    parser.add_argument('--metrics-file', default=None, help="Write per-stage timings in Prometheus text format")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"Not a directory: {args.directory}")
+    try:
+        score(args.directory, args.task, args.output or f"scores_{args.task}.csv", args.batch_size, args.workers)
+    finally:
+        if args.metrics_file:
+            stage_metrics.write_textfile(args.metrics_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from history_store import HistoryStore
+
+
+def test_writer_survives_a_failing_batch(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.sqlite3'), flush_interval=0.01)
+
+    store.append(None, 'Arborio', 0.9)  # task_type NOT NULL: batch ini gagal ditulis
+    assert store.flush(timeout=5)
+    assert store._writer.is_alive()
+
+    store.append('Classification', 'Arborio', 0.9, session_id='a')
+    assert store.flush(timeout=5)
+    assert store.count() == 1
+    assert store.class_stats(task_type='Classification')['Arborio'][0] == 1
+
+
+def test_flush_timeout_returns_when_queue_is_stuck(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.sqlite3'), flush_interval=0.01)
+    with store._write_lock:  # writer tertahan di lock, baris tetap di antrean
+        store.append('Classification', 'Arborio', 0.9)
+        assert store.flush(timeout=0.05) is False
+    assert store.flush(timeout=5)
+    assert store.count() == 1
+
+
+def test_read_and_clear_close_their_connections(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path / 'history.sqlite3'), flush_interval=0.01)
+    store.append('Classification', 'Arborio', 0.9, session_id='a')
+    assert store.flush(timeout=5)
+
+    opened = []
+    connect = store._connect
+
+    def tracking_connect():
+        conn = connect()
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(store, '_connect', tracking_connect)
+    store.count()
+    store.class_stats()
+    store.minute_series()
+    b''.join(store.iter_csv())
+    store.clear(session_id='a')
+
+    assert len(opened) == 5
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")  # koneksi sudah ditutup
+    assert store.count() == 0
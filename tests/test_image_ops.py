@@ -0,0 +1,78 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from image_ops import LETTERBOX_COLOR, get_ops, unletterbox_box
+from preprocessing import preprocess_batch
+
+pytest.importorskip('cv2')
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample image')
+SAMPLES = sorted(glob.glob(os.path.join(SAMPLE_DIR, '*.jpg')))
+
+# Batas selisih rata-rata piksel (skala 0-255) antara backend PIL dan OpenCV
+RESIZE_MEAN_TOLERANCE = 2.0
+LETTERBOX_MEAN_TOLERANCE = 2.0
+# Batas pergeseran probabilitas (0-1) classifier uji antara kedua backend
+PROB_TOLERANCE = 0.01
+
+
+@pytest.fixture(scope='module')
+def ops():
+    return get_ops('pil'), get_ops('opencv')
+
+
+def _mean_abs_diff(a, b):
+    return float(np.abs(a.astype(np.int16) - b.astype(np.int16)).mean())
+
+
+@pytest.mark.parametrize('path', SAMPLES, ids=os.path.basename)
+def test_decode_matches(ops, path):
+    pil, cv = ops
+    assert np.array_equal(pil.decode(path), cv.decode(path))
+    reduced_pil, reduced_cv = pil.decode(path, target_side=200), cv.decode(path, target_side=200)
+    assert reduced_pil.shape == reduced_cv.shape
+    assert _mean_abs_diff(reduced_pil, reduced_cv) <= RESIZE_MEAN_TOLERANCE
+
+
+@pytest.mark.parametrize('path', SAMPLES, ids=os.path.basename)
+def test_resize_and_letterbox_within_tolerance(ops, path):
+    pil, cv = ops
+    rgb = pil.decode(path)
+    assert _mean_abs_diff(pil.resize(rgb, (128, 128)), cv.resize(rgb, (128, 128))) <= RESIZE_MEAN_TOLERANCE
+
+    box_pil, ratio_pil, pad_pil = pil.letterbox(rgb)
+    box_cv, ratio_cv, pad_cv = cv.letterbox(rgb)
+    assert box_pil.shape == box_cv.shape
+    assert (ratio_pil, pad_pil) == (ratio_cv, pad_cv)
+    assert _mean_abs_diff(box_pil, box_cv) <= LETTERBOX_MEAN_TOLERANCE
+
+
+def test_letterbox_padding_and_box_mapping(ops):
+    rgb = np.zeros((290, 500, 3), dtype=np.uint8)
+    for backend in ops:
+        out, ratio, (pad_left, pad_top) = backend.letterbox(rgb, 640)
+        assert out.shape[1] == 640 and out.shape[0] % 32 == 0 and pad_top > 0
+        assert tuple(out[0, 0][::-1]) == LETTERBOX_COLOR  # BGR
+        box = [pad_left + 50 * ratio, pad_top + 20 * ratio, pad_left + 400 * ratio, pad_top + 280 * ratio]
+        assert unletterbox_box(box, ratio, (pad_left, pad_top), (500, 290)) == pytest.approx([50, 20, 400, 280])
+
+
+def test_classifier_output_within_tolerance(ops):
+    pil, cv = ops
+    rice = [p for p in SAMPLES if not os.path.basename(p).lower().startswith(('smoking', 'notsmoking'))]
+    images = [pil.decode(p) for p in rice]
+    rng = np.random.default_rng(0)
+    weights = rng.normal(scale=1e-3, size=(128 * 128 * 3, 5)).astype(np.float32)
+
+    def predict(batch):
+        logits = batch.reshape(len(batch), -1) @ weights
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    probs_pil = predict(preprocess_batch(images, ops=pil).copy())
+    probs_cv = predict(preprocess_batch(images, ops=cv).copy())
+    assert np.abs(probs_pil - probs_cv).max() <= PROB_TOLERANCE
+    assert np.array_equal(probs_pil.argmax(axis=1), probs_cv.argmax(axis=1))
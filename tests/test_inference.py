@@ -0,0 +1,142 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import inference
+import tiling
+from inference_cache import result_cache
+from model_handles import yolo_handle
+from near_duplicates import near_duplicate_index
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample image')
+
+
+class _Boxes:
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32)
+
+
+class _Result:
+    def __init__(self, data):
+        self.boxes = _Boxes(data)
+
+
+class StubYolo:
+    """Pengganti model YOLO: menghitung pemanggilan dan mengembalikan satu box tetap (ruang letterbox)."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, source, **kwargs):
+        self.calls += 1
+        batch = source if isinstance(source, list) else [source]
+        return [_Result([[40.0, 30.0, 200.0, 180.0, 0.9, 1.0]]) for _ in batch]
+
+
+@pytest.fixture
+def stub_yolo(monkeypatch):
+    stub = StubYolo()
+    monkeypatch.setattr(yolo_handle, '_model', stub)
+    monkeypatch.setattr(near_duplicate_index, 'max_distance', -1)
+    result_cache.clear()
+    yield stub
+    result_cache.clear()
+
+
+def _scene_image():
+    path = sorted(glob.glob(os.path.join(SAMPLE_DIR, 'smoking_*.jpg')))[0]
+    return Image.open(path).convert('RGB')
+
+
+def test_detect_and_draw_runs_model_once(stub_yolo):
+    image = _scene_image()
+
+    result = inference.predict_detection(image)
+    annotated = inference.draw_bounding_boxes(image, result['objects'])
+
+    assert stub_yolo.calls == 1
+    assert result['total_objects'] == 1
+    assert result['class'] == 'Smoking'
+    assert annotated.size == image.size
+
+
+def test_repeated_detection_is_served_from_cache(stub_yolo):
+    image = _scene_image()
+
+    first = inference.predict_detection(image)
+    second = inference.predict_detection(image.copy())
+
+    assert stub_yolo.calls == 1
+    assert second['objects'] == first['objects']
+
+
+# --- DETEKSI BERTILE ---
+
+def _large_scene_image(side=1600):
+    return _scene_image().resize((side, side), Image.BICUBIC)
+
+
+def test_tiled_detection_runs_one_batch(stub_yolo):
+    image = _large_scene_image()
+
+    result = inference.predict_detection_tiled(image, tile_size=640, overlap=0.2)
+
+    assert stub_yolo.calls == 1  # pass utuh + semua tile dalam satu pemanggilan
+    assert result['class'] == 'Smoking'
+    assert result['tiles']['run'] >= 1
+    assert result['tiles']['run'] + result['tiles']['skipped'] == len(tiling.tile_grid(1600, 1600, 640, 0.2))
+    for obj in result['objects']:
+        x1, y1, x2, y2 = obj['bbox']
+        assert 0 <= x1 < x2 <= image.width and 0 <= y1 < y2 <= image.height
+
+
+def test_tiled_result_is_cached_apart_from_single_pass(stub_yolo):
+    image = _large_scene_image()
+
+    inference.predict_detection(image)
+    inference.predict_detection_tiled(image)
+    repeat = inference.predict_detection_tiled(image)
+
+    assert stub_yolo.calls == 2
+    assert 'tiles' in repeat
+
+
+def test_select_tiles_skips_flat_tiles():
+    rng = np.random.default_rng(0)
+    rgb = np.full((640, 1920, 3), 128, dtype=np.uint8)
+    rgb[:, :640] = rng.integers(0, 256, (640, 640, 3), dtype=np.uint8)  # hanya sepertiga kiri bertekstur
+
+    tiles, skipped = tiling.select_tiles(rgb, tile_size=640, overlap=0.0)
+
+    assert tiles == [(0, 0, 640, 640)]
+    assert skipped == 2
+
+
+def test_select_tiles_respects_max_tiles():
+    rng = np.random.default_rng(1)
+    rgb = rng.integers(0, 256, (1280, 1280, 3), dtype=np.uint8)
+
+    tiles, skipped = tiling.select_tiles(rgb, tile_size=640, overlap=0.0, max_tiles=3)
+
+    assert len(tiles) == 3
+    assert skipped == 1
+
+
+def test_select_tiles_small_image_uses_full_pass_only():
+    assert tiling.select_tiles(np.zeros((480, 640, 3), dtype=np.uint8), tile_size=640) == ([], 0)
+
+
+def test_nms_merges_box_split_across_tile_seam():
+    # Objek yang sama terdeteksi di dua tile bertetangga (tumpang tindih) dan di pass utuh
+    left_tile = [600.0, 100.0, 700.0, 300.0, 0.80, 1.0]
+    right_tile = [604.0, 102.0, 702.0, 298.0, 0.90, 1.0]
+    full_pass = [598.0, 96.0, 706.0, 304.0, 0.70, 1.0]
+    other_class = [600.0, 100.0, 700.0, 300.0, 0.85, 0.0]
+    elsewhere = [10.0, 10.0, 60.0, 60.0, 0.75, 1.0]
+
+    kept = tiling.nms([left_tile, right_tile, full_pass, other_class, elsewhere])
+
+    assert kept == [right_tile, other_class, elsewhere]
@@ -0,0 +1,89 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import inference
+from input_gate import (
+    FEATURE_NAMES, OTHER, RICE, SCENE, UNKNOWN, InputGate, _labelled_samples, gate_features, input_gate, train,
+)
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample image')
+
+
+def _synthetic():
+    rng = np.random.default_rng(0)
+    return {
+        'black': Image.new('RGB', (320, 240), (0, 0, 0)),
+        'white': Image.new('RGB', (320, 240), (255, 255, 255)),
+        'gray': Image.new('RGB', (320, 240), (128, 128, 128)),
+        'noise': Image.fromarray(rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)),
+        'gray_noise': Image.fromarray(rng.integers(0, 256, (240, 320, 1), dtype=np.uint8).repeat(3, axis=2)),
+    }
+
+
+SCENE_PATHS = sorted(glob.glob(os.path.join(SAMPLE_DIR, '*smoking_*.jpg')))
+
+
+def _dark_scene(path=SCENE_PATHS[0], factor=0.1):
+    """Adegan malam / CCTV: foto adegan sample image/ yang digelapkan (fraksi latar gelap tinggi)."""
+    rgb = np.asarray(Image.open(path).convert('RGB'), dtype=np.float32)
+    return Image.fromarray((rgb * factor).astype(np.uint8))
+
+
+@pytest.fixture
+def gate(tmp_path):
+    # Tanpa file bobot, cache sendiri
+    return InputGate(path=str(tmp_path / 'missing.npz'))
+
+
+@pytest.fixture(scope='module')
+def trained_gate(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('gate') / 'input_gate.npz')
+    train(_labelled_samples(SAMPLE_DIR)).save(path)
+    return InputGate(path=path)
+
+
+@pytest.mark.parametrize('path,label', _labelled_samples(SAMPLE_DIR), ids=lambda v: os.path.basename(str(v)))
+def test_untrained_gate_does_not_guess(gate, path, label):
+    assert gate.classify(Image.open(path).convert('RGB'))[0] == UNKNOWN
+
+
+@pytest.mark.parametrize('path,label', _labelled_samples(SAMPLE_DIR), ids=lambda v: os.path.basename(str(v)))
+def test_trained_gate_on_sample_corpus(trained_gate, path, label):
+    assert trained_gate.classify(Image.open(path).convert('RGB'))[0] == label
+
+
+@pytest.mark.parametrize('path', SCENE_PATHS, ids=os.path.basename)
+def test_untrained_gate_passes_dark_scene(gate, path):
+    image = _dark_scene(path)
+    assert gate_features(image)[FEATURE_NAMES.index('dark_fraction')] > 0.6
+    assert gate.classify(image)[0] == UNKNOWN  # bukan OTHER (datar) dan bukan RICE
+
+
+@pytest.mark.parametrize('name', list(_synthetic()))
+def test_blank_and_noise_images_are_other(gate, name):
+    label, probs = gate.classify(_synthetic()[name])
+    assert label == OTHER
+    assert probs[OTHER] == 1.0 and probs[RICE] == probs[SCENE] == 0.0
+
+
+def test_blank_image_is_rejected_before_yolo(monkeypatch):
+    calls = []
+    monkeypatch.setattr(inference, 'get_yolo_model', lambda: calls.append(1))
+    for name in ('white', 'noise'):
+        result = inference.predict_detection(_synthetic()[name])
+        assert result['class'] == "INPUT TIDAK COCOK"
+    assert inference.predict_classification(_synthetic()['black'])['class'] == "INPUT TIDAK COCOK"
+    assert calls == []
+
+
+def test_dark_scene_reaches_yolo(monkeypatch, tmp_path):
+    monkeypatch.setattr(input_gate, 'path', str(tmp_path / 'missing.npz'))
+    calls = []
+    monkeypatch.setattr(inference, 'get_yolo_model', lambda: calls.append(1))  # None: model gagal dimuat
+    result = inference.predict_detection(_dark_scene())
+    assert result['class'] == "MODEL GAGAL DIMUAT"
+    assert calls == [1]
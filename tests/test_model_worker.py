@@ -0,0 +1,58 @@
+import os
+import time
+
+import pytest
+
+import model_worker as mw
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'getuid'), reason="Unix sockets only")
+
+
+def _wait_for_ping(client, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return client.call('ping')
+        except mw.WorkerUnavailable:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def test_client_uses_only_workers_listed_by_supervisor(tmp_path):
+    address = str(tmp_path / 'pool')
+    os.mkdir(address, 0o700)
+    mw._write_manifest(address, [1], b'k' * 32)
+    open(os.path.join(address, 'worker-0.sock'), 'w').close()  # socket lain di direktori diabaikan
+
+    assert mw.WorkerClient(address, authkey=None).sockets() == [mw.worker_socket(address, 1)]
+
+
+def test_client_refuses_shared_directory(tmp_path):
+    address = str(tmp_path / 'pool')
+    os.mkdir(address, 0o700)
+    mw._write_manifest(address, [0], b'k' * 32)
+    os.chmod(address, 0o755)
+
+    with pytest.raises(mw.WorkerUnavailable, match='0700'):
+        mw.WorkerClient(address, authkey=None).sockets()
+
+
+def test_pool_uses_private_sockets_and_random_authkey(tmp_path):
+    address = str(tmp_path / 'pool')
+    supervisor = mw.WorkerSupervisor(address, n_workers=1)
+    supervisor.start()
+    try:
+        reply = _wait_for_ping(mw.WorkerClient(address, authkey=None))
+        assert reply['pid'] == supervisor._procs[0].pid
+
+        assert os.stat(address).st_mode & 0o077 == 0
+        assert os.stat(mw.worker_socket(address, 0)).st_mode & 0o077 == 0
+        assert os.stat(mw.pool_manifest(address)).st_mode & 0o077 == 0
+        assert mw.read_manifest(address) == ([0], supervisor.authkey)
+
+        with pytest.raises(mw.WorkerUnavailable):
+            mw.WorkerClient(address, authkey=b'dashboard-models').call('ping')
+    finally:
+        supervisor.stop()
+    assert not os.path.exists(mw.pool_manifest(address))
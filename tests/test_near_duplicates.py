@@ -0,0 +1,211 @@
+import glob
+import os
+import random
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import inference
+from inference_cache import result_cache
+from model_handles import classifier_handle, yolo_handle
+from near_duplicates import MultiIndexHash, NearDuplicateIndex, hamming, near_duplicate_index, perceptual_hash
+from pipeline import InferencePipeline
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample image')
+
+
+def _flip(key, n, rng):
+    for bit in rng.sample(range(64), n):
+        key ^= 1 << bit
+    return key
+
+
+@pytest.mark.parametrize('radius', [0, 3, 4, 6, 8])
+def test_multi_index_matches_linear_scan(radius):
+    rng = random.Random(radius)
+    keys = [rng.getrandbits(64) for _ in range(500)]
+    index = MultiIndexHash()
+    for k in keys:
+        index.add(k, k)
+    queries = [_flip(rng.choice(keys), rng.randint(0, 10), rng) for _ in range(300)]
+    for q in queries:
+        expected = min((hamming(q, k) for k in keys), default=None)
+        found = index.nearest(q, radius)
+        if expected is None or expected > radius:
+            assert found is None
+        else:
+            assert found is not None and found[0] == expected and hamming(q, found[1]) == expected
+
+
+def test_index_does_not_duplicate_and_evicts_oldest():
+    index = NearDuplicateIndex(max_distance=0, max_entries=2)
+    index.add('ns', 1, {'v': 1})
+    index.add('ns', 1, {'v': 2})
+    assert index.stats()['entries'] == 1
+    assert index.lookup('ns', 1)[0] == {'v': 2}
+
+    index.add('ns', 2, {'v': 3})
+    index.add('ns', 3, {'v': 4})
+    assert index.stats()['entries'] == 2
+    assert index.lookup('ns', 1) is None
+    assert index.lookup('ns', 3)[0] == {'v': 4}
+
+
+class _Boxes:
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32)
+
+
+class _Result:
+    def __init__(self, data):
+        self.boxes = _Boxes(data)
+
+
+class StubYolo:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, source, **kwargs):
+        self.calls += 1
+        batch = source if isinstance(source, list) else [source]
+        return [_Result([[40.0, 30.0, 200.0, 180.0, 0.9, 1.0]]) for _ in batch]
+
+
+@pytest.fixture
+def stub_yolo(monkeypatch):
+    stub = StubYolo()
+    monkeypatch.setattr(yolo_handle, '_model', stub)
+    monkeypatch.setattr(near_duplicate_index, 'max_distance', 4)
+    near_duplicate_index.clear()
+    result_cache.clear()
+    yield stub
+    near_duplicate_index.clear()
+    result_cache.clear()
+
+
+def _scene_image():
+    path = sorted(glob.glob(os.path.join(SAMPLE_DIR, 'smoking_*.jpg')))[0]
+    return Image.open(path).convert('RGB')
+
+
+def test_detection_reused_for_resize_with_scaled_boxes(stub_yolo):
+    image = _scene_image()
+    first = inference.predict_detection(image)
+    resized = image.resize((image.width // 2, image.height // 2), Image.BILINEAR)
+    reused = inference.predict_detection(resized)
+
+    assert stub_yolo.calls == 1
+    assert 'reused' in reused
+    assert reused['objects'][0]['bbox'] == pytest.approx([v / 2 for v in first['objects'][0]['bbox']])
+
+
+def test_detection_not_reused_for_crop(stub_yolo):
+    image = _scene_image()
+    inference.predict_detection(image)
+    dx, dy = round(image.width * 0.01), round(image.height * 0.01)
+    cropped = image.crop((dx, dy, image.width, image.height))  # rasio aspek sama, isi bergeser
+    # Hash perseptualnya masih dalam batas jarak: yang menolak adalah cek tata letak
+    assert hamming(perceptual_hash(image.copy()), perceptual_hash(cropped)) <= near_duplicate_index.max_distance
+
+    result = inference.predict_detection(cropped)
+    assert stub_yolo.calls == 2
+    assert 'reused' not in result
+
+
+# --- DUPLIKAT DALAM SATU BATCH ---
+
+class StubClassifier:
+    """Menghitung baris input yang benar-benar dikirim ke model."""
+
+    def __init__(self):
+        self.rows = 0
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        self.rows += len(batch)
+        scores = batch.reshape(len(batch), -1)[:, :5] + 1e-3
+        return scores / scores.sum(axis=1, keepdims=True)
+
+
+class CountingYolo(StubYolo):
+    def __init__(self):
+        super().__init__()
+        self.rows = 0
+
+    def __call__(self, source, **kwargs):
+        self.rows += len(source) if isinstance(source, list) else 1
+        return super().__call__(source, **kwargs)
+
+
+@pytest.fixture
+def stub_models(monkeypatch):
+    classifier, yolo = StubClassifier(), CountingYolo()
+    monkeypatch.setattr(classifier_handle, '_model', classifier)
+    monkeypatch.setattr(yolo_handle, '_model', yolo)
+    monkeypatch.setattr(near_duplicate_index, 'max_distance', 4)
+    near_duplicate_index.clear()
+    result_cache.clear()
+    yield classifier, yolo
+    near_duplicate_index.clear()
+    result_cache.clear()
+
+
+def _rice(name):
+    return Image.open(os.path.join(SAMPLE_DIR, name)).convert('RGB')
+
+
+def test_classification_batch_runs_model_once_per_duplicate_group(stub_models):
+    classifier, _ = stub_models
+    a, b = _rice('Arborio (25).jpg'), _rice('Ipsala (232).jpg')
+    images = [a, a.copy(), a.resize((200, 200), Image.BICUBIC), b]
+
+    results = inference.predict_classification_batch(images)
+
+    assert classifier.rows == 2
+    assert results[1] == results[0]
+    assert 'reused' in results[2] and results[2]['class'] == results[0]['class']
+    assert 'reused' not in results[3]
+
+
+def test_detection_batch_copies_boxes_to_resized_duplicate(stub_models):
+    _, yolo = stub_models
+    image = _scene_image()
+    half = image.resize((image.width // 2, image.height // 2), Image.BILINEAR)
+
+    results = inference.predict_detection_batch([image, half, image.copy()])
+
+    assert yolo.rows == 1
+    assert results[2]['objects'] == results[0]['objects']
+    assert results[1]['objects'][0]['bbox'] == pytest.approx([v / 2 for v in results[0]['objects'][0]['bbox']])
+
+
+def test_pipeline_runs_model_once_per_duplicate_group(stub_models):
+    classifier, _ = stub_models
+    a, b = _rice('Arborio (25).jpg'), _rice('Ipsala (232).jpg')
+    sources = [('a', a), ('b', b), ('a_copy', a.copy()), ('a_small', a.resize((200, 200), Image.BICUBIC)),
+               ('b_copy', b.copy())]
+
+    items = InferencePipeline('classify', batch_size=8, workers=2).predict(sources)
+
+    assert classifier.rows == 2
+    # Salinan yang disiapkan tepat saat hasil sumbernya disimpan bisa datang dari indeks (jarak 0)
+    by_name = {item.name: {k: v for k, v in item.result.items() if k != 'reused'} for item in items}
+    assert by_name['a_copy'] == by_name['a'] and by_name['b_copy'] == by_name['b']
+    assert by_name['a_small']['class'] == by_name['a']['class']
+
+
+def test_different_rice_grains_close_in_hash_are_not_reused(stub_models, monkeypatch):
+    classifier, _ = stub_models
+    first, second = _rice('Arborio (28).jpg'), _rice('Karacadag (79).jpg')
+    distance = hamming(perceptual_hash(first.copy()), perceptual_hash(second.copy()))
+    assert 5 <= distance <= 6
+    monkeypatch.setattr(near_duplicate_index, 'max_distance', distance)  # hash saja akan menganggapnya duplikat
+
+    inference.predict_classification(first)
+    separate = inference.predict_classification(second)
+    batch = inference.predict_classification_batch([first.copy(), second.copy()])
+
+    assert classifier.rows == 2  # pemanggilan ketiga dan keempat: hit cache per digest
+    assert 'reused' not in separate
+    assert all('reused' not in r for r in batch)
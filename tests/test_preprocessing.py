@@ -0,0 +1,87 @@
+import glob
+import os
+
+import numpy as np
+from PIL import Image
+
+import inference
+from image_ops import get_ops
+from inference_cache import result_cache
+from model_handles import classifier_handle
+from near_duplicates import near_duplicate_index
+from preprocessing import CLASSIFIER_INPUT_SIZE, BatchBuffer, preprocess_batch
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample image')
+
+
+def _rice_images():
+    paths = sorted(glob.glob(os.path.join(SAMPLE_DIR, '*.jpg')))
+    return [Image.open(p).convert('RGB') for p in paths if os.path.basename(p).lower().startswith('arborio')]
+
+
+def _float64_batch(images):
+    """Alur lama: np.array(img.resize) / 255.0 (float64), di-cast ke float32 oleh Keras."""
+    return np.stack([np.array(img.resize(CLASSIFIER_INPUT_SIZE)) / 255.0 for img in images]).astype(np.float32)
+
+
+class StubClassifier:
+    """Model linear float32 tetap + softmax, cukup peka untuk membedakan input yang tidak identik."""
+
+    def __init__(self):
+        rng = np.random.default_rng(0)
+        n = CLASSIFIER_INPUT_SIZE[0] * CLASSIFIER_INPUT_SIZE[1] * 3
+        self.weights = rng.normal(scale=1e-3, size=(n, len(inference.CLASSIFICATION_CATEGORIES))).astype(np.float32)
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        logits = batch.reshape(len(batch), -1) @ self.weights
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+def test_all_uint8_values_match_float64_division():
+    pixels = np.arange(256, dtype=np.uint8).reshape(16, 16, 1).repeat(3, axis=2)
+    batch = BatchBuffer(size=(16, 16), capacity=1, ops=get_ops('pil')).fill([pixels])
+    expected = (pixels / 255.0).astype(np.float32)
+    assert batch.dtype == np.float32
+    assert np.array_equal(batch[0], expected)
+
+
+def test_batch_buffer_matches_float64_path():
+    images = _rice_images()
+    batch = preprocess_batch(images, ops=get_ops('pil'))
+    assert np.array_equal(batch, _float64_batch(images))
+
+
+def test_buffer_is_reused_and_grows():
+    buffer = BatchBuffer(capacity=2, ops=get_ops('pil'))
+    images = _rice_images()
+    first = buffer.fill(images[:2])
+    assert np.shares_memory(first, buffer.fill(images[2:4]))
+    grown = buffer.fill(images)
+    assert grown.shape[0] == len(images)
+    assert np.array_equal(grown, _float64_batch(images))
+
+
+def test_classifier_predictions_identical_to_float64_path(monkeypatch):
+    stub = StubClassifier()
+    monkeypatch.setattr(classifier_handle, '_model', stub)
+    monkeypatch.setattr(inference, 'get_ops', lambda name=None: get_ops('pil'))
+    monkeypatch.setattr(near_duplicate_index, 'max_distance', -1)
+    result_cache.clear()
+    images = _rice_images()
+    try:
+        single = [inference.predict_classification(img) for img in images]
+        result_cache.clear()
+        batch = inference.predict_classification_batch(images, batch_size=4)
+    finally:
+        result_cache.clear()
+
+    # Bandingkan dengan bentuk batch yang sama (urutan penjumlahan BLAS bergantung pada ukuran batch)
+    expected_single = [stub.predict(_float64_batch([img]))[0] * 100 for img in images]
+    expected_batch = np.concatenate([stub.predict(_float64_batch(images[i:i + 4])) * 100
+                                     for i in range(0, len(images), 4)])
+    for results, expected in ((single, expected_single), (batch, expected_batch)):
+        for result, probs in zip(results, expected):
+            assert 'error_message' not in result
+            assert np.array_equal([result['probabilities'][c] for c in inference.CLASSIFICATION_CATEGORIES], probs)
@@ -0,0 +1,31 @@
+import pytest
+
+from scorer import ResultWriter, _status
+
+
+@pytest.mark.parametrize('name', ['scores.csv', 'scores.jsonl'])
+def test_resume_skips_only_finished_rows(tmp_path, name):
+    path = str(tmp_path / name)
+    writer = ResultWriter(path)
+    writer.write([
+        {'file': 'ok.jpg', 'status': 'OK'},
+        {'file': 'rejected.jpg', 'status': 'REJECTED'},
+        {'file': 'error.jpg', 'status': 'ERROR'},
+        {'file': 'busy.jpg', 'status': 'BUSY'},
+        {'file': 'retried.jpg', 'status': 'ERROR'},
+        {'file': 'retried.jpg', 'status': 'OK'},
+    ])
+    writer.close()
+
+    assert ResultWriter.done_files(path) == {'ok.jpg', 'rejected.jpg', 'retried.jpg'}
+
+
+def test_busy_result_gets_retryable_status():
+    busy = {'class': "SERVER BUSY", 'retry': True, 'error_message': "Server is busy"}
+    no_objects = {'class': "OBJEK TIDAK DITEMUKAN", 'error_message': "There is no object"}
+    rejected = {'class': "INPUT TIDAK COCOK", 'error_message': "Input Rejected"}
+
+    assert _status(busy) == 'BUSY'
+    assert _status(no_objects) == 'OK'
+    assert _status(rejected) == 'REJECTED'
+    assert _status({'class': "RUNTIME ERROR", 'error_message': "boom"}) == 'ERROR'
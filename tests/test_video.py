@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+
+from inference import _detection_error, _detection_summary  # noqa: E402
+from video import VideoDetectionError, VideoDetector  # noqa: E402
+
+FRAMES = 12
+FPS = 10.0
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    path = str(tmp_path / 'clip.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), FPS, (64, 48))
+    rng = np.random.default_rng(0)
+    for _ in range(FRAMES):
+        writer.write(rng.integers(0, 256, (48, 64, 3), dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def _detect_one(frame):
+    return _detection_summary([[5.0, 5.0, 30.0, 30.0, 0.9, 1.0]])
+
+
+def test_close_without_iterating_releases_capture(video_path):
+    detector = VideoDetector(video_path, target_fps=FPS, detect=_detect_one)
+    assert detector.reader.capture.isOpened()
+
+    detector.close()
+
+    assert not detector.reader.capture.isOpened()
+
+
+def test_every_frame_gets_tracked_objects(video_path):
+    detector = VideoDetector(video_path, target_fps=FPS / 2, detect=_detect_one)
+    items = list(detector)
+
+    assert len(items) == FRAMES
+    assert detector.detections_run < FRAMES
+    assert all(len(item['objects']) == 1 for item in items)
+    assert not detector.reader.capture.isOpened()
+
+
+def test_model_error_is_raised_not_tracked_as_empty_frame(video_path):
+    calls = []
+
+    def detect(frame):
+        calls.append(frame)
+        return _detect_one(frame) if len(calls) == 1 else _detection_error(RuntimeError('boom'))
+
+    detector = VideoDetector(video_path, target_fps=FPS, detect=detect)
+    seen = []
+    with pytest.raises(VideoDetectionError, match='boom') as excinfo:
+        for item in detector:
+            seen.append(item)
+    detector.close()
+
+    assert excinfo.value.result['class'] == 'RUNTIME ERROR'
+    assert len(seen) == 1
+    assert [t['missed'] for t in detector.tracker.tracks] == [0]  # track tidak ikut kedaluwarsa
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+
+# --- SLICED INFERENCE (TILE + NMS) ---
+# YOLO me-letterbox seluruh gambar ke ~640 px, sehingga orang / rokok kecil pada
+# foto lebar beresolusi tinggi hilang. Mode tile memotong gambar menjadi tile
+# yang saling tumpang tindih (masing-masing dijalankan pada resolusi penuh), ditambah
+# satu pass gambar utuh untuk objek besar, lalu box digabung dengan NMS per kelas.
+# Tile yang nyaris datar (langit, dinding) dilewati dan jumlah tile dibatasi,
+# sehingga biaya tetap terbatas.
+
+TILE_SIZE = int(os.environ.get("DASHBOARD_TILE_SIZE", 640))
+TILE_OVERLAP = float(os.environ.get("DASHBOARD_TILE_OVERLAP", 0.2))  # fraksi sisi tile
+TILE_MIN_ACTIVITY = float(os.environ.get("DASHBOARD_TILE_MIN_ACTIVITY", 4.0))  # rata-rata |gradien| (0-255)
+TILE_MAX_TILES = int(os.environ.get("DASHBOARD_TILE_MAX_TILES", 16))
+TILE_NMS_IOU = 0.5
+ACTIVITY_SAMPLE_STEP = 4  # aktivitas dihitung pada grid piksel yang dijarangkan
+
+
+def tile_grid(width, height, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Daftar (x0, y0, x1, y1) tile yang menutupi gambar; tile terakhir di tiap sumbu digeser ke tepi."""
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, stride))
+        return positions + [length - tile_size]
+
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in starts(height) for x in starts(width)]
+
+
+def tile_activity(rgb, tile):
+    """Rata-rata |gradien| luminans pada tile (piksel dijarangkan): ukuran tekstur yang murah."""
+    x0, y0, x1, y1 = tile
+    gray = rgb[y0:y1:ACTIVITY_SAMPLE_STEP, x0:x1:ACTIVITY_SAMPLE_STEP].mean(axis=2, dtype=np.float32)
+    if gray.shape[0] < 2 or gray.shape[1] < 2:
+        return 0.0
+    return float((np.abs(np.diff(gray, axis=0)).mean() + np.abs(np.diff(gray, axis=1)).mean()) / 2)
+
+
+def select_tiles(rgb, tile_size=TILE_SIZE, overlap=TILE_OVERLAP, min_activity=TILE_MIN_ACTIVITY, max_tiles=TILE_MAX_TILES):
+    """Tile yang layak diproses: aktivitas >= min_activity, paling banyak max_tiles (aktivitas tertinggi).
+
+    Mengembalikan (tiles, jumlah tile yang dilewati).
+    """
+    height, width = rgb.shape[:2]
+    if width <= tile_size and height <= tile_size:
+        return [], 0  # pass gambar utuh sudah beresolusi penuh
+    tiles = tile_grid(width, height, tile_size, overlap)
+    scored = sorted(((tile_activity(rgb, t), t) for t in tiles), reverse=True)
+    kept = [t for activity, t in scored if activity >= min_activity][:max_tiles]
+    return kept, len(tiles) - len(kept)
+
+
+def nms(boxes, iou_threshold=TILE_NMS_IOU):
+    """NMS per kelas atas box [x1, y1, x2, y2, conf, cls]; mengembalikan list box yang dipertahankan."""
+    if not boxes:
+        return []
+    arr = np.asarray(boxes, dtype=np.float64)
+    areas = (arr[:, 2] - arr[:, 0]) * (arr[:, 3] - arr[:, 1])
+    keep = []
+    for cls in np.unique(arr[:, 5]):
+        idx = np.flatnonzero(arr[:, 5] == cls)
+        idx = idx[np.argsort(-arr[idx, 4])]
+        while idx.size:
+            best, rest = idx[0], idx[1:]
+            keep.append(best)
+            x1 = np.maximum(arr[best, 0], arr[rest, 0])
+            y1 = np.maximum(arr[best, 1], arr[rest, 1])
+            x2 = np.minimum(arr[best, 2], arr[rest, 2])
+            y2 = np.minimum(arr[best, 3], arr[rest, 3])
+            inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+            iou = inter / np.maximum(areas[best] + areas[rest] - inter, 1e-9)
+            idx = rest[iou <= iou_threshold]
+    keep.sort(key=lambda i: -arr[i, 4])
+    return [boxes[i] for i in keep]
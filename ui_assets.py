@@ -0,0 +1,114 @@
+import base64
+import functools
+import io
+import os
+import re
+import secrets
+import time
+
+import streamlit as st
+
+# --- ASET UI (CSS & LOGO) ---
+# Streamlit mengirim ulang semua elemen pada setiap rerun. Sebelumnya CSS (~16 KB)
+# dikirim apa adanya dan logo PNG 160 KB di-base64 inline (sidebar + Home, ~430 KB
+# per rerun Home). Di sini CSS dibaca dan diminify sekali per proses, dan logo
+# disajikan lewat static file serving Streamlit (di-cache browser), dengan
+# fallback data URI dari logo yang sudah diperkecil ke ukuran tampilan.
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CSS_PATH = os.path.join(APP_DIR, "assets", "dashboard.css")
+LOGO_PATH = os.path.join(APP_DIR, "assets", "Logo Dashboard.png")
+STATIC_DIR = os.path.join(APP_DIR, "static")  # folder yang disajikan Streamlit di app/static/
+STATIC_LOGO_NAME = "logo.png"
+STATIC_EXPORT_DIR = "exports"
+EXPORT_MAX_AGE = 3600  # detik; ekspor yang lebih tua dihapus saat ekspor baru dibuat
+LOGO_RENDER_PX = 160  # 2x ukuran tampilan terbesar (80 px) agar tetap tajam di layar HiDPI
+
+
+def minify_css(css):
+    """Buang komentar dan whitespace berlebih tanpa mengubah selector."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};,])\s*', r'\1', css).strip()
+
+
+@functools.lru_cache(maxsize=None)
+def dashboard_css():
+    """Blok <style> dashboard, dibangun sekali per proses."""
+    with open(CSS_PATH, encoding='utf-8') as f:
+        return f"<style>{minify_css(f.read())}</style>"
+
+
+@functools.lru_cache(maxsize=None)
+def _logo_png():
+    """Logo diperkecil ke LOGO_RENDER_PX sebagai bytes PNG (None bila file tidak ada)."""
+    if not os.path.exists(LOGO_PATH):
+        return None
+    from PIL import Image
+
+    with Image.open(LOGO_PATH) as img:
+        img.thumbnail((LOGO_RENDER_PX, LOGO_RENDER_PX))
+        buf = io.BytesIO()
+        img.save(buf, format='PNG', optimize=True)
+    return buf.getvalue()
+
+
+def _publish_static_logo(png):
+    """Tulis logo kecil ke static/ bila belum ada atau lebih tua dari sumbernya."""
+    target = os.path.join(STATIC_DIR, STATIC_LOGO_NAME)
+    if not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(LOGO_PATH):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(png)
+
+
+@functools.lru_cache(maxsize=None)
+def logo_src():
+    """`src` untuk <img> logo: URL static bila server.enableStaticServing aktif, selain itu data URI kecil."""
+    png = _logo_png()
+    if png is None:
+        return None
+    if static_serving_enabled():
+        try:
+            _publish_static_logo(png)
+            return f"app/static/{STATIC_LOGO_NAME}"
+        except OSError:
+            pass
+    return "data:image/png;base64," + base64.b64encode(png).decode()
+
+
+def static_serving_enabled():
+    return bool(st.get_option("server.enableStaticServing"))
+
+
+def _remove_old_exports(directory, max_age=EXPORT_MAX_AGE):
+    now = time.time()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                os.unlink(path)
+        except OSError:
+            pass
+
+
+def publish_export(write, extension):
+    """Tulis file ekspor lewat `write(file)` ke static/exports/ (nama acak) dan kembalikan URL app/static/.
+
+    download_button menyimpan seluruh payload di memori proses dan mengirimnya lewat websocket.
+    File static disajikan Streamlit langsung dari disk per chunk, jadi ukuran ekspor tidak dibatasi memori.
+    """
+    directory = os.path.join(STATIC_DIR, STATIC_EXPORT_DIR)
+    os.makedirs(directory, exist_ok=True)
+    _remove_old_exports(directory)
+    name = f"{secrets.token_urlsafe(16)}.{extension}"
+    partial = os.path.join(directory, f".{name}.part")
+    try:
+        with open(partial, 'wb') as f:
+            write(f)
+        os.replace(partial, os.path.join(directory, name))
+    except BaseException:
+        if os.path.exists(partial):
+            os.unlink(partial)
+        raise
+    return f"app/static/{STATIC_EXPORT_DIR}/{name}"
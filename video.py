@@ -0,0 +1,291 @@
+"""Deteksi YOLO pada file video atau kamera (tanpa Streamlit).
+
+    python video.py rekaman_cctv.mp4 --target-fps 5 --output deteksi.jsonl
+    python video.py 0 --target-fps 5            # kamera /dev/video0
+
+Frame didecode oleh thread background (OpenCV) ke antrean terbatas. YOLO hanya
+dijalankan pada frame sampel: jarak antar sampel menyesuaikan diri agar laju
+deteksi tidak melebihi target FPS maupun kemampuan model (latensi rata-rata).
+Box pada frame di antara sampel dibawa maju oleh tracker IoU sederhana dengan
+kecepatan konstan, sehingga setiap frame tetap punya hasil.
+"""
+import argparse
+import json
+import math
+import queue
+import sys
+import threading
+import time
+
+from inference import is_model_error, predict_detection_frame
+from metrics import span
+
+FRAME_QUEUE_SIZE = 8
+DEFAULT_TARGET_FPS = 5.0
+TRACK_IOU_THRESHOLD = 0.3
+TRACK_MAX_MISSED = 2  # sampel berturut-turut tanpa kecocokan sebelum track dihapus
+
+
+class VideoDetectionError(RuntimeError):
+    """Model gagal dimuat / gagal memproses frame; `result` = hasil error dari inference."""
+
+    def __init__(self, result):
+        super().__init__(result.get('error_message', result['class']))
+        self.result = result
+
+
+def parse_source(source):
+    """'0' -> indeks kamera 0; selain itu path file / URL stream."""
+    return int(source) if str(source).isdigit() else source
+
+
+class FrameReader:
+    """Decode frame di thread background ke antrean terbatas.
+
+    File: reader menunggu saat antrean penuh (tidak ada frame yang hilang).
+    Kamera: frame tertua dibuang agar konsumen selalu melihat frame terbaru.
+    """
+
+    def __init__(self, source, queue_size=FRAME_QUEUE_SIZE):
+        import cv2
+
+        self.cv2 = cv2
+        self.source = parse_source(source)
+        self.live = isinstance(self.source, int)
+        self.capture = cv2.VideoCapture(self.source)
+        if not self.capture.isOpened():
+            raise OSError(f"Cannot open video source {source!r}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._read_loop, name="video-reader", daemon=True)
+
+    def _put(self, item):
+        if not self.live:
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            return
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _read_loop(self):
+        cv2 = self.cv2
+        index = 0
+        try:
+            while not self._stop.is_set():
+                ok, bgr = self.capture.read()
+                if not ok:
+                    break
+                t = index / self.fps if not self.live else time.monotonic()
+                self._put((index, t, cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)))
+                index += 1
+        finally:
+            self.capture.release()
+            self._put(None)
+
+    def __iter__(self):
+        self._thread.start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        self._stop.set()
+        if self._thread.ident is None:
+            self.capture.release()  # thread belum pernah jalan: _read_loop tidak akan me-release
+
+
+def _iou(a, b):
+    ix1, iy1, ix2, iy2 = max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class IoUTracker:
+    """Tracker ringan: cocokkan deteksi ke track secara greedy (IoU), lalu ekstrapolasi dengan kecepatan konstan."""
+
+    def __init__(self, iou_threshold=TRACK_IOU_THRESHOLD, max_missed=TRACK_MAX_MISSED):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, detections, frame_index):
+        """Perbarui track dengan objek dari _detection_result (dict class/confidence/bbox)."""
+        pairs = sorted(
+            ((_iou(track['bbox'], det['bbox']), ti, di)
+             for ti, track in enumerate(self.tracks) for di, det in enumerate(detections)
+             if track['class'] == det['class']),
+            reverse=True,
+        )
+        matched_tracks, matched_dets = set(), set()
+        for score, ti, di in pairs:
+            if score < self.iou_threshold or ti in matched_tracks or di in matched_dets:
+                continue
+            track, det = self.tracks[ti], detections[di]
+            frames = max(1, frame_index - track['frame'])
+            track['velocity'] = [(n - o) / frames for n, o in zip(det['bbox'], track['bbox'])]
+            track.update(bbox=list(det['bbox']), confidence=det['confidence'], frame=frame_index, missed=0)
+            matched_tracks.add(ti)
+            matched_dets.add(di)
+
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track['missed'] += 1
+        self.tracks = [t for t in self.tracks if t['missed'] <= self.max_missed]
+        for di, det in enumerate(detections):
+            if di not in matched_dets:
+                self.tracks.append({'id': self._next_id, 'class': det['class'], 'confidence': det['confidence'],
+                                    'bbox': list(det['bbox']), 'velocity': [0.0] * 4, 'frame': frame_index, 'missed': 0})
+                self._next_id += 1
+        return self.objects(frame_index)
+
+    def objects(self, frame_index):
+        """Box semua track aktif yang diekstrapolasi ke `frame_index`."""
+        out = []
+        for t in self.tracks:
+            if t['missed']:
+                continue
+            dt = frame_index - t['frame']
+            out.append({'class': t['class'], 'confidence': t['confidence'], 'track_id': t['id'],
+                        'bbox': [c + v * dt for c, v in zip(t['bbox'], t['velocity'])]})
+        return out
+
+
+class VideoDetector:
+    """Jalankan deteksi pada sumber video; iterasi menghasilkan satu dict hasil per frame."""
+
+    def __init__(self, source, target_fps=DEFAULT_TARGET_FPS, detect=predict_detection_frame):
+        self.reader = FrameReader(source)
+        self.target_fps = target_fps
+        self.detect = detect
+        self.tracker = IoUTracker()
+        self.latency_ema = None
+        self.detect_every = max(1, round(self.reader.fps / target_fps))
+        self.detections_run = 0
+
+    def _adapt(self, latency):
+        """Perbarui EMA latensi dan jarak sampel: tidak lebih sering dari target FPS atau kemampuan model."""
+        self.latency_ema = latency if self.latency_ema is None else 0.8 * self.latency_ema + 0.2 * latency
+        interval = max(1.0 / self.target_fps, self.latency_ema)
+        self.detect_every = max(1, math.ceil(self.reader.fps * interval - 1e-6))
+
+    def __iter__(self):
+        last_detected = last_detect_time = None
+        for index, t, frame in self.reader:
+            if last_detected is None:
+                due = True
+            elif self.reader.live:
+                # Kamera: jarak berdasarkan waktu nyata (frame lama sudah dibuang reader)
+                due = time.monotonic() - last_detect_time >= max(1.0 / self.target_fps, self.latency_ema)
+            else:
+                due = index - last_detected >= self.detect_every
+            result = None
+            if due:
+                t0 = time.perf_counter()
+                with span('video.detect'):
+                    result = self.detect(frame)
+                self._adapt(time.perf_counter() - t0)
+                last_detect_time = time.monotonic()
+                if is_model_error(result):
+                    # Jangan diteruskan ke tracker sebagai frame tanpa objek (semua track akan kedaluwarsa)
+                    raise VideoDetectionError(result)
+                if result.get('retry'):
+                    result = None  # antrean model penuh: pakai box hasil tracking untuk frame ini
+                else:
+                    last_detected = index
+                    self.detections_run += 1
+                    objects = self.tracker.update(result.get('objects', []), index)
+            if result is None:
+                objects = self.tracker.objects(index)
+            yield {
+                'frame_index': index, 'time_s': t if not self.reader.live else None, 'frame': frame,
+                'detected': result is not None, 'result': result, 'objects': objects,
+                'detect_every': self.detect_every, 'dropped': self.reader.dropped,
+            }
+
+    def close(self):
+        self.reader.close()
+
+
+def summarize(objects):
+    """Ringkasan satu frame dalam bentuk hasil deteksi (class/confidence/total_objects) untuk riwayat."""
+    if not objects:
+        return None
+    best = max(objects, key=lambda o: o['confidence'])
+    return {'task_type': 'Detection', 'class': best['class'], 'confidence': best['confidence'],
+            'total_objects': len(objects)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="YOLO detection on a video file or camera.")
+    parser.add_argument('source', help="video file path / stream URL, or camera index (e.g. 0)")
+    parser.add_argument('--target-fps', type=float, default=DEFAULT_TARGET_FPS)
+    parser.add_argument('--output', help="JSONL file with one line per detected (sampled) frame")
+    parser.add_argument('--history', action='store_true', help="also append detected frames to the prediction history")
+    args = parser.parse_args(argv)
+
+    store = None
+    if args.history:
+        from history_store import get_history_store
+        store = get_history_store()
+
+    detector = VideoDetector(args.source, args.target_fps)
+    out = open(args.output, 'a', encoding='utf-8') if args.output else None
+    t0 = time.perf_counter()
+    n_frames = 0
+    status = 0
+    try:
+        for item in detector:
+            n_frames += 1
+            if not item['detected']:
+                continue
+            summary = summarize(item['objects'])
+            if out is not None:
+                out.write(json.dumps({
+                    'frame': item['frame_index'], 'time_s': item['time_s'],
+                    'objects': [{**o, 'bbox': [round(c, 1) for c in o['bbox']]} for o in item['objects']],
+                }) + '\n')
+            if store is not None and summary is not None:
+                store.append(summary['task_type'], summary['class'], summary['confidence'],
+                             objects_detected=summary['total_objects'], session_id=f"video:{args.source}")
+    except KeyboardInterrupt:
+        pass
+    except VideoDetectionError as e:
+        print(f"Detection failed at frame {n_frames - 1}: {e}", file=sys.stderr)
+        status = 1
+    finally:
+        detector.close()
+        if out is not None:
+            out.close()
+        if store is not None:
+            store.flush()
+    elapsed = time.perf_counter() - t0
+    print(f"{n_frames} frames in {elapsed:.1f}s ({n_frames / max(elapsed, 1e-9):.1f} fps), "
+          f"{detector.detections_run} YOLO runs, sampling every {detector.detect_every} frames, "
+          f"{detector.reader.dropped} frames dropped")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())